@@ -0,0 +1,106 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+# Token buckets kept before idle ones are pruned
+MAX_TRACKED_CLIENTS = 10000
+
+
+class AdmissionController:
+    """
+    Concurrency cap with a bounded wait queue, and per-client rate limits
+
+    At most `max_concurrency` requests run at once; up to `max_queue` more
+    wait for a slot for at most `queue_timeout` seconds, and the rest are
+    shed. Each client gets a token bucket refilled at `rate` requests per
+    second holding up to `burst` tokens. A limit of 0 disables it. Shed
+    requests are counted per reason.
+
+    All methods run on the event loop thread, so no locks are taken.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 0,
+        max_queue: int = 0,
+        queue_timeout: float = 1.0,
+        rate: float = 0.0,
+        burst: int = 1,
+        exempt_paths: Iterable[str] = ("/health", "/ready", "/metrics"),
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.exempt_paths = frozenset(exempt_paths)
+        self.active = 0
+        self.shed_overloaded = 0
+        self.shed_rate_limited = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # client -> [tokens, last refill (monotonic seconds)]
+        self._buckets: Dict[str, List[float]] = {}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def check_rate(self, client: str) -> Optional[float]:
+        """Take a token from the client's bucket; return the seconds to wait if it is empty"""
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_CLIENTS:
+                self._prune(now)
+            bucket = self._buckets[client] = [float(self.burst), now]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            self.shed_rate_limited += 1
+            return (1 - tokens) / self.rate
+        bucket[0] = tokens - 1
+        return None
+
+    async def acquire(self) -> bool:
+        """Wait for a concurrency slot; False if the request must be shed"""
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.shed_overloaded += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            # release() handed its slot over; `active` already counts it
+            return True
+        except asyncio.TimeoutError:
+            self.shed_overloaded += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self) -> None:
+        """Give the slot of a finished request to the oldest waiter, or free it"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _prune(self, now: float) -> None:
+        # A bucket that has refilled completely is the same as no bucket
+        full_after = self.burst / self.rate
+        self._buckets = {client: bucket for client, bucket in self._buckets.items() if now - bucket[1] < full_after}
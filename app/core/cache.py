@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+
+class CacheEntry:
+    """An encoded response body plus the headers that go with it, and its compressed variants"""
+
+    __slots__ = ("body", "headers", "tags", "size", "variants")
+
+    def __init__(self, body: bytes, headers: Dict[str, str], tags: Iterable[str]):
+        self.body = body
+        self.headers = headers
+        self.tags = tuple(tags)
+        self.size = len(body)
+        # Content-Encoding -> compressed body
+        self.variants: Dict[str, bytes] = {}
+
+
+class ResponseCache:
+    """
+    LRU cache of encoded response bodies bounded by their total size in bytes
+
+    Entries are tagged so that writes can invalidate exactly the responses
+    that depend on the data they change.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, body: bytes, headers: Optional[Dict[str, str]] = None, tags: Iterable[str] = ()) -> CacheEntry:
+        entry = CacheEntry(body, headers or {}, tags)
+        if entry.size > self.max_bytes:
+            # Too big to ever fit; don't flush the whole cache for it
+            return entry
+        self._remove(key)
+        self._entries[key] = entry
+        self.size += entry.size
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+        self._evict()
+        return entry
+
+    def add_variant(self, key: Hashable, entry: CacheEntry, encoding: str, body: bytes) -> None:
+        """Keep a compressed variant of a cached entry, unless the entry was dropped meanwhile"""
+        if self._entries.get(key) is not entry or encoding in entry.variants:
+            return
+        entry.variants[encoding] = body
+        entry.size += len(body)
+        self.size += len(body)
+        self._evict()
+
+    def invalidate(self, tag: str) -> None:
+        """Drop every entry carrying the given tag"""
+        for key in self._tags.pop(tag, ()):
+            if self._remove(key):
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
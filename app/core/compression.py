@@ -0,0 +1,56 @@
+import gzip
+from typing import Callable, Dict, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from .content import parse_accept
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+class ResponseCompressor:
+    """
+    Content-negotiated compression of response bodies
+
+    Supports zstd and brotli when their libraries are installed, and gzip
+    always; when the client accepts several equally, they are preferred in
+    that order. Bodies under `min_size` are sent as they are, and bodies of
+    at least `offload_size` are compressed in the thread pool so they don't
+    block the event loop.
+    """
+
+    def __init__(self, min_size: int = 1024, offload_size: int = 256 * 1024, gzip_level: int = 6):
+        self.min_size = min_size
+        self.offload_size = offload_size
+        self.encoders: Dict[str, Callable[[bytes], bytes]] = {}
+        if zstandard is not None:
+            # Compressor objects aren't thread-safe, so each call gets its own
+            self.encoders["zstd"] = lambda body: zstandard.ZstdCompressor(level=3).compress(body)
+        if brotli is not None:
+            self.encoders["br"] = lambda body: brotli.compress(body, quality=4)
+        # mtime=0 keeps the output identical for identical bodies
+        self.encoders["gzip"] = lambda body: gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+    def negotiate(self, accept_encoding: Optional[str], size: int) -> Optional[str]:
+        """Pick the encoding of a body of `size` bytes, or None to send it uncompressed"""
+        if not accept_encoding or size < self.min_size:
+            return None
+        accepted = parse_accept(accept_encoding)
+        best: Tuple[Optional[str], float] = (None, 0.0)
+        for encoding in self.encoders:
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            if q > best[1]:
+                best = (encoding, q)
+        return best[0]
+
+    async def compress(self, body: bytes, encoding: str) -> bytes:
+        encoder = self.encoders[encoding]
+        if len(body) >= self.offload_size:
+            return await run_in_threadpool(encoder, body)
+        return encoder(body)
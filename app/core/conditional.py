@@ -0,0 +1,59 @@
+from email.utils import formatdate
+from typing import AbstractSet, Optional
+
+
+def http_date(timestamp: float) -> str:
+    """Format a POSIX timestamp as an HTTP-date (for Last-Modified)"""
+    return formatdate(timestamp, usegmt=True)
+
+
+def representation_etag(etag: str, *suffixes: Optional[str]) -> str:
+    """
+    Entity tag of one representation of a resource
+
+    Each representation (media type, content coding) needs its own strong
+    tag, so `etag` gets a "-<suffix>" for every suffix that isn't None.
+    """
+    parts = [suffix for suffix in suffixes if suffix]
+    if not parts:
+        return etag
+    return f'{etag[:-1]}-{"-".join(parts)}"'
+
+
+def _strip_suffixes(etag: str, suffixes: AbstractSet[str]) -> str:
+    while True:
+        head, separator, tail = etag[:-1].rpartition("-")
+        if not separator or tail not in suffixes:
+            return etag
+        etag = f'{head}"'
+
+
+def etag_matches(header: Optional[str], etag: Optional[str], weak: bool = True,
+                 ignore_suffixes: AbstractSet[str] = frozenset()) -> bool:
+    """
+    Check an If-Match / If-None-Match header value against an entity tag
+
+    `etag` is None when the resource does not exist; it then only matches
+    nothing, not even "*". Weak comparison (used for If-None-Match) ignores
+    the W/ prefix, strong comparison (If-Match) requires strong tags.
+    Representation suffixes in `ignore_suffixes` (see representation_etag)
+    are stripped from the header's tags before comparing.
+    """
+    if header is None or etag is None:
+        return False
+    header = header.strip()
+    if header == "*":
+        return True
+    if weak:
+        etag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        elif candidate.startswith("W/"):
+            continue
+        if ignore_suffixes:
+            candidate = _strip_suffixes(candidate, ignore_suffixes)
+        if candidate == etag:
+            return True
+    return False
@@ -8,6 +8,19 @@ class Settings(BaseSettings):
     debug: bool = False
     host: str = "0.0.0.0"
     port: int = 8000
+    workers: int = 1  # 0: one per CPU; more than one requires a shared store backend (sqlite)
+    
+    # Server options used by run.py, defaulting to uvicorn's own; server_profile=production fills in
+    # tuned values (see app/core/server.py) for whichever of these and workers aren't set explicitly
+    server_profile: str = "default"  # default, production
+    server_loop: str = "auto"  # auto, asyncio, uvloop (asyncio when uvloop isn't installed)
+    server_http: str = "auto"  # auto, h11, httptools (h11 when httptools isn't installed)
+    server_backlog: int = 2048
+    server_keepalive_timeout_s: int = 5
+    server_limit_concurrency: int = 0  # per worker, connections + requests past it get 503; 0 disables
+    server_limit_max_requests: int = 0  # a worker exits after this many requests; 0 disables
+    server_access_log: bool = True  # uvicorn's access log, a duplicate of the request logs
+    server_graceful_shutdown_s: int = 0  # time open connections get to finish on shutdown; 0 waits for them
     
     # Logging settings
     log_level: str = "INFO"
@@ -15,6 +28,83 @@ class Settings(BaseSettings):
     log_file: str = "logs/app.log"
     enable_json_logs: bool = False
     enable_file_logging: bool = True
+    log_rotation: str = "none"  # none, size, time
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backup_count: int = 5
+    log_rotation_when: str = "midnight"
+    
+    # Asynchronous logging: records go through a bounded queue to a background writer
+    log_async: bool = False
+    log_queue_size: int = 10000
+    log_queue_overflow: str = "block"  # block, drop_oldest, drop
+    log_batch_size: int = 256
+    
+    # Request log sampling: comma-separated path-prefix=rate rules (e.g. "/health=0,/api/v1/items=0.1");
+    # server errors and requests slower than log_slow_request_ms are always logged
+    log_sample_rates: str = ""
+    log_sample_default_rate: float = 1.0
+    log_slow_request_ms: float = 1000.0
+    
+    # Item storage: memory, durable (change log + snapshots under store_path)
+    # or sqlite (store_path/items.db, shared by all workers on the host)
+    store_backend: str = "memory"
+    store_path: str = "data"
+    store_pool_size: int = 4
+    store_poll_interval_ms: float = 5.0  # sqlite: how often each worker checks for other workers' changes
+    store_fsync: str = "batch"  # always, batch, never
+    store_fsync_batch: int = 64
+    store_fsync_interval_ms: int = 50
+    store_snapshot_every: int = 100000
+    
+    # Admission control: at most admission_max_concurrency requests run at once, with up to
+    # admission_max_queue waiting admission_queue_timeout_ms for a slot (503 beyond that), and
+    # rate_limit_per_second requests per client with bursts of rate_limit_burst (429). 0 disables a limit
+    admission_max_concurrency: int = 0
+    admission_max_queue: int = 100
+    admission_queue_timeout_ms: int = 1000
+    rate_limit_per_second: float = 0
+    rate_limit_burst: int = 20
+    admission_exempt_paths: str = "/health,/ready,/metrics"
+    
+    # Event loop lag sampling every loop_monitor_interval_ms; stalls over loop_slow_callback_ms are
+    # logged with the route that caused them. /ready reports 503 while the recent lag exceeds
+    # ready_max_loop_lag_ms or more than ready_max_in_flight requests are being served (0 disables a check)
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_ms: float = 100
+    loop_slow_callback_ms: float = 250
+    ready_max_loop_lag_ms: float = 500
+    ready_max_in_flight: int = 0
+    
+    # Request tracing: traceparent is propagated and its trace id used as the request ID. Requests
+    # whose parent was sampled, and trace_sample_rate of the others, have their stages recorded and
+    # exported in batches as OTLP/JSON lines to trace_file, and optionally timed in Server-Timing
+    tracing_enabled: bool = False
+    trace_sample_rate: float = 0.0
+    trace_file: str = "traces/spans.jsonl"
+    trace_export_batch_size: int = 512
+    trace_export_interval_ms: int = 1000
+    trace_export_max_queue: int = 10000
+    trace_server_timing: bool = False
+    
+    # Token expected in X-Admin-Token by the /admin endpoints; they are disabled while empty
+    admin_token: str = ""
+    
+    # On-demand profiling of requests carrying X-Profile (cprofile or sample) and X-Admin-Token
+    profiling_enabled: bool = False
+    profile_dir: str = "profiles"
+    profile_max_concurrent: int = 1
+    profile_sample_interval_ms: float = 1.0
+    
+    # Cache of encoded item responses
+    response_cache_enabled: bool = True
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+    
+    # Compression of list and item responses (gzip, plus zstd/brotli when installed);
+    # bodies of at least compression_offload_bytes are compressed off the event loop
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024
+    compression_offload_bytes: int = 256 * 1024
+    compression_gzip_level: int = 6
 
     class Config:
         env_file = ".env"
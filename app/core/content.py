@@ -0,0 +1,165 @@
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from starlette.datastructures import Headers, MutableHeaders
+from .tracing import TracedRequest, TracedRoute
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# Media types MessagePack goes by, all accepted in Accept and Content-Type
+MSGPACK_MEDIA_TYPES = frozenset({MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"})
+
+
+@lru_cache(maxsize=256)
+def parse_accept(header: str) -> Dict[str, float]:
+    """Map each media type or coding of an Accept or Accept-Encoding header to its q-value"""
+    accepted = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None
+
+
+def is_msgpack(content_type: Optional[str]) -> bool:
+    return content_type is not None and content_type.partition(";")[0].strip().lower() in MSGPACK_MEDIA_TYPES
+
+
+@lru_cache(maxsize=256)
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """
+    Media type to answer with for an Accept header
+
+    MessagePack when the client accepts it at least as much as JSON itself
+    (wildcards don't count against it), JSON otherwise and whenever msgpack
+    isn't installed.
+    """
+    if msgpack is None or not accept:
+        return JSON_MEDIA_TYPE
+    accepted = parse_accept(accept)
+    msgpack_q = max((q for media_type, q in accepted.items() if media_type in MSGPACK_MEDIA_TYPES), default=0.0)
+    if msgpack_q > 0 and msgpack_q >= accepted.get(JSON_MEDIA_TYPE, 0.0):
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def response_media_type(request: Request) -> str:
+    return negotiate_media_type(request.headers.get("accept"))
+
+
+def _pack_model(value: Any) -> Any:
+    # Validated models are packed straight from their fields, without dumping them to dicts first.
+    # Checked by attribute: isinstance() against BaseModel goes through ABCMeta and costs more than the packing
+    if hasattr(value, "__pydantic_fields_set__"):
+        return value.__dict__
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+def packb(value: Any) -> bytes:
+    return msgpack.packb(value, default=_pack_model, use_bin_type=True)
+
+
+def unpackb(body: bytes) -> Any:
+    return msgpack.unpackb(body, raw=False)
+
+
+def encode(media_type: str, value: Any, adapter: Optional[TypeAdapter] = None) -> bytes:
+    """
+    Encode a response body in the given media type
+
+    With an `adapter` the value is validated by it first, as FastAPI does
+    with a response_model, so only the model's fields are sent.
+    """
+    if adapter is not None:
+        value = adapter.validate_python(value)
+        if media_type == MSGPACK_MEDIA_TYPE:
+            return packb(value)
+        return adapter.dump_json(value)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return packb(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump_json().encode()
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def render(request: Request, value: Any, adapter: Optional[TypeAdapter] = None,
+           headers: Optional[Dict[str, str]] = None) -> Any:
+    """
+    What an endpoint returns for `value`
+
+    For JSON without `headers` that is `value` itself, left to FastAPI to
+    serialize; otherwise it is a response encoded in the negotiated media
+    type carrying `headers`.
+    """
+    media_type = response_media_type(request)
+    if media_type == JSON_MEDIA_TYPE and not headers:
+        return value
+    return Response(content=encode(media_type, value, adapter), media_type=media_type, headers=headers)
+
+
+class MessagePackRequest(TracedRequest):
+    """
+    Request whose MessagePack body is decoded for validation
+
+    FastAPI only hands bodies with a JSON content type to json() and the
+    body models, so the request reports a JSON content type and json()
+    decodes the MessagePack body instead. The models validate the decoded
+    objects directly, without a detour through JSON.
+    """
+
+    @property
+    def headers(self) -> Headers:
+        if not hasattr(self, "_headers"):
+            headers = MutableHeaders(raw=list(self.scope["headers"]))
+            headers["content-type"] = JSON_MEDIA_TYPE
+            self._headers = headers
+        return self._headers
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = unpackb(await self.body())
+        return await super().json()
+
+
+class ContentNegotiationRoute(TracedRoute):
+    """
+    Traced route that also accepts MessagePack request bodies
+
+    Bodies sent as MessagePack are decoded by MessagePackRequest, or
+    refused with 415 when msgpack isn't installed. Responses are
+    negotiated by the endpoints, see `render` and `encode`.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+
+        async def negotiating_handler(request: Request) -> Response:
+            if is_msgpack(request.headers.get("content-type")):
+                if msgpack is None:
+                    return JSONResponse({"detail": "MessagePack is not supported"}, status_code=415)
+                request = MessagePackRequest(request.scope, request.receive)
+            return await handler(request)
+
+        return negotiating_handler
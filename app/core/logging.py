@@ -1,10 +1,40 @@
+import atexit
 import logging
 import logging.config
+import logging.handlers
+import queue
+import random
 import sys
+import threading
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 import json
-from datetime import datetime
+import time
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop")
+
+
+# Attributes every LogRecord carries; anything else on a record came from `extra`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "color", "taskName"
+}
+
+
+def _dumps(obj: Dict[str, Any]) -> str:
+    """Encode a log entry as JSON, using orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            # orjson.JSONEncodeError, e.g. for integers beyond 64 bits, which json handles
+            pass
+    return json.dumps(obj, default=str)
 
 
 class CustomFormatter(logging.Formatter):
@@ -30,11 +60,30 @@ class CustomFormatter(logging.Formatter):
 
 
 class JSONFormatter(logging.Formatter):
-    """JSON formatter for structured logging"""
+    """
+    JSON formatter for structured logging
+
+    Every attribute passed through `extra` is emitted alongside the standard
+    fields. Timestamps come from the record's creation time; the part down
+    to the second is cached, as consecutive records mostly share it.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (epoch second, formatted prefix), swapped as one tuple so threads never see a torn pair
+        self._second_cache = (None, "")
+    
+    def format_timestamp(self, created: float) -> str:
+        second = int(created)
+        cached_second, prefix = self._second_cache
+        if cached_second != second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second_cache = (second, prefix)
+        return f"{prefix}.{int((created - second) * 1_000_000):06d}"
     
     def format(self, record):
         log_entry = {
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': self.format_timestamp(record.created),
             'level': record.levelname,
             'logger': record.name,
             'message': record.getMessage(),
@@ -44,31 +93,380 @@ class JSONFormatter(logging.Formatter):
         }
         
         # Add extra fields if present
-        if hasattr(record, 'request_id'):
-            log_entry['request_id'] = record.request_id
-        if hasattr(record, 'user_id'):
-            log_entry['user_id'] = record.user_id
-        if hasattr(record, 'endpoint'):
-            log_entry['endpoint'] = record.endpoint
-        if hasattr(record, 'method'):
-            log_entry['method'] = record.method
-        if hasattr(record, 'status_code'):
-            log_entry['status_code'] = record.status_code
-        if hasattr(record, 'duration'):
-            log_entry['duration'] = record.duration
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in log_entry:
+                log_entry[key] = value
             
         # Add exception info if present
         if record.exc_info:
             log_entry['exception'] = self.formatException(record.exc_info)
             
-        return json.dumps(log_entry)
+        return _dumps(log_entry)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler feeding a bounded queue with a configurable overflow policy
+
+    Policies:
+        block: wait for room in the queue (no records are lost)
+        drop_oldest: discard the oldest queued record to make room
+        drop: discard the new record
+    Discarded records are counted in `dropped`.
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow: str = "block"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log queue overflow policy: {overflow}")
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Records never leave the process, so there is no need to format or
+        # pickle them here; only freeze the message so later mutation of the
+        # arguments can't change it.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if self.overflow == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(record)
+            except (queue.Empty, queue.Full):
+                pass
+        self.dropped += 1
+
+
+class BatchingQueueListener:
+    """
+    Background thread draining a log queue into the real handlers
+
+    Whatever has accumulated in the queue is written as one batch per
+    handler: stream and file handlers get a single write and flush per
+    batch instead of one per record.
+    """
+
+    _sentinel = None
+
+    def __init__(self, log_queue: queue.Queue, handlers: List[logging.Handler], batch_size: int = 256):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush every queued record and stop the listener thread"""
+        if self._thread is None:
+            return
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+        for handler in self.handlers:
+            handler.flush()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self._sentinel in batch
+            records = [record for record in batch if record is not self._sentinel]
+            if records:
+                for handler in self.handlers:
+                    emit_batch(handler, records)
+            if stop:
+                return
+
+
+def emit_batch(handler: logging.Handler, records: List[logging.LogRecord]) -> None:
+    """Emit several records through a handler with a single flush"""
+    records = [record for record in records if record.levelno >= handler.level and handler.filter(record)]
+    if not records:
+        return
+    if not isinstance(handler, logging.StreamHandler):
+        for record in records:
+            handler.handle(record)
+        return
+    rotating = isinstance(handler, logging.handlers.BaseRotatingHandler)
+    with handler.lock:
+        try:
+            if handler.stream is None:
+                handler.stream = handler._open()
+            for record in records:
+                msg = handler.format(record)
+                if rotating and handler.shouldRollover(record):
+                    handler.doRollover()
+                    if handler.stream is None:
+                        handler.stream = handler._open()
+                handler.stream.write(msg + handler.terminator)
+            handler.flush()
+        except Exception:
+            handler.handleError(records[-1])
+
+
+# Listener and queue handler of the asynchronous logging pipeline, if enabled,
+# and the handlers of the loggers the queue handler replaced
+_listener: Optional[BatchingQueueListener] = None
+_queue_handler: Optional[BoundedQueueHandler] = None
+_replaced_handlers: Dict[Optional[str], List[logging.Handler]] = {}
+
+
+def shutdown_logging() -> None:
+    """
+    Flush and stop the asynchronous logging pipeline, if it is running
+
+    The loggers get their own handlers back first, so records logged
+    during and after the shutdown are written directly instead of
+    being queued for a listener that is gone.
+    """
+    global _listener, _queue_handler
+    for name, handlers in _replaced_handlers.items():
+        logger = logging.getLogger(name)
+        if _queue_handler in logger.handlers:
+            logger.handlers = handlers
+    _replaced_handlers.clear()
+    if _listener is not None:
+        _listener.stop()
+    _listener = None
+    _queue_handler = None
+
+
+def get_log_queue_stats() -> Dict[str, int]:
+    """Depth, capacity and drop count of the asynchronous log queue"""
+    if _queue_handler is None:
+        return {"depth": 0, "capacity": 0, "dropped": 0}
+    return {
+        "depth": _queue_handler.queue.qsize(),
+        "capacity": _queue_handler.queue.maxsize,
+        "dropped": _queue_handler.dropped,
+    }
+
+
+class LogSampler:
+    """
+    Per-route sampling of request logs
+
+    Each request is sampled on arrival with the rate of the longest path
+    prefix in `rates` (or `default_rate`). Records below WARNING logged
+    while handling an unsampled request are suppressed and counted in
+    `suppressed`; its completion record is still kept when the request
+    failed with a server error or took longer than `slow_request_ms`.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, default_rate: float = 1.0,
+                 slow_request_ms: float = 1000.0):
+        self.suppressed = 0
+        self.configure(rates or {}, default_rate, slow_request_ms)
+
+    def configure(self, rates: Dict[str, float], default_rate: float, slow_request_ms: float) -> None:
+        # Longest prefixes first, so the most specific rule wins
+        self.rates = dict(sorted(rates.items(), key=lambda rule: len(rule[0]), reverse=True))
+        self.default_rate = default_rate
+        self.slow_request_ms = slow_request_ms
+        self._slow_seconds = slow_request_ms / 1000
+
+    def rate_for(self, path: str) -> float:
+        for prefix, rate in self.rates.items():
+            if path.startswith(prefix):
+                return rate
+        return self.default_rate
+
+    def sample(self, path: str) -> bool:
+        """Decide whether the logs of a request to `path` are kept"""
+        rate = self.rate_for(path)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def keep(self, status_code: Optional[int], duration: float) -> bool:
+        """Whether an unsampled request is still worth a completion record"""
+        return status_code is None or status_code >= 500 or duration >= self._slow_seconds
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse a comma-separated list of path-prefix=rate rules (e.g. "/health=0,/api/v1/items=0.1")"""
+    rates = {}
+    for rule in filter(None, (part.strip() for part in spec.split(","))):
+        prefix, _, rate = rule.rpartition("=")
+        if not prefix:
+            raise ValueError(f"Invalid log sampling rule: {rule}")
+        rates[prefix] = float(rate)
+    return rates
+
+
+# Sampler shared by the middleware and every LazyLogger, and whether the
+# request being handled in the current context was sampled
+_sampler = LogSampler()
+request_log_sampled: ContextVar[bool] = ContextVar("request_log_sampled", default=True)
+
+
+def get_log_sampler() -> LogSampler:
+    return _sampler
+
+
+def parse_level(level: str) -> int:
+    """Return the numeric value of a level name, raising ValueError for unknown names"""
+    value = logging.getLevelName(level.upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level: {level}")
+    return value
+
+
+class LogOverrides:
+    """
+    Temporary changes of logger levels, handler levels and sampling
+
+    Every change is reverted to the value it replaced once its TTL expires
+    (or on revert()). Changing the same target again keeps the original
+    value and restarts the TTL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (kind, name) -> (original value, current value, expiry (epoch seconds), revert timer)
+        self._active: Dict[Tuple[str, str], Tuple[Any, Any, float, threading.Timer]] = {}
+
+    def set_logger_level(self, name: str, level: str, ttl: float) -> None:
+        self._apply("logger", name, parse_level(level), ttl)
+
+    def set_handler_level(self, name: str, level: str, ttl: float) -> None:
+        if name not in _handlers_by_name:
+            raise ValueError(f"Unknown log handler: {name}")
+        self._apply("handler", name, parse_level(level), ttl)
+
+    def set_sampling(self, rates: Dict[str, float], default_rate: float, slow_request_ms: float, ttl: float) -> None:
+        self._apply("sampling", "requests", (rates, default_rate, slow_request_ms), ttl)
+
+    def revert(self, key: Optional[Tuple[str, str]] = None) -> None:
+        """Restore one overridden target, or all of them"""
+        with self._lock:
+            keys = list(self._active) if key is None else [key]
+            for key in keys:
+                entry = self._active.pop(key, None)
+                if entry is not None:
+                    entry[3].cancel()
+                    _write_target(*key, entry[0])
+
+    def active(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"kind": kind, "name": name, "original": _describe(kind, original),
+                 "value": _describe(kind, value), "expires_at": expires_at}
+                for (kind, name), (original, value, expires_at, _) in self._active.items()
+            ]
+
+    def _expire(self, key: Tuple[str, str], timer: threading.Timer) -> None:
+        with self._lock:
+            # The target may have been changed again (with a new timer) since this one fired
+            entry = self._active.get(key)
+            if entry is not None and entry[3] is timer:
+                del self._active[key]
+                _write_target(*key, entry[0])
+
+    def _apply(self, kind: str, name: str, value: Any, ttl: float) -> None:
+        key = (kind, name)
+        with self._lock:
+            entry = self._active.get(key)
+            if entry is not None:
+                entry[3].cancel()
+                original = entry[0]
+            else:
+                original = _read_target(kind, name)
+            timer = threading.Timer(ttl, self._expire)
+            timer.args = (key, timer)
+            timer.daemon = True
+            self._active[key] = (original, value, time.time() + ttl, timer)
+            _write_target(kind, name, value)
+            timer.start()
+
+
+def _read_target(kind: str, name: str) -> Any:
+    if kind == "logger":
+        return logging.getLogger(None if name == "root" else name).level
+    if kind == "handler":
+        return _handlers_by_name[name].level
+    return (dict(_sampler.rates), _sampler.default_rate, _sampler.slow_request_ms)
+
+
+def _write_target(kind: str, name: str, value: Any) -> None:
+    if kind == "logger":
+        logging.getLogger(None if name == "root" else name).setLevel(value)
+    elif kind == "handler":
+        _handlers_by_name[name].setLevel(value)
+    else:
+        _sampler.configure(*value)
+
+
+def _describe(kind: str, value: Any) -> Any:
+    if kind == "sampling":
+        rates, default_rate, slow_request_ms = value
+        return {"rates": rates, "default_rate": default_rate, "slow_request_ms": slow_request_ms}
+    return logging.getLevelName(value)
+
+
+# Handlers configured by setup_logging, by name ('console', 'file'), and the
+# runtime overrides applied to them and to loggers
+_handlers_by_name: Dict[str, logging.Handler] = {}
+_overrides = LogOverrides()
+
+
+def get_log_overrides() -> LogOverrides:
+    return _overrides
+
+
+def get_log_handler_names() -> List[str]:
+    return list(_handlers_by_name)
+
+
+def get_logging_state(logger_names: List[str]) -> Dict[str, Any]:
+    """Current levels of the given loggers and of every handler, plus the sampling configuration"""
+    return {
+        "loggers": {
+            name: logging.getLevelName(logging.getLogger(None if name == "root" else name).getEffectiveLevel())
+            for name in logger_names
+        },
+        "handlers": {name: logging.getLevelName(handler.level) for name, handler in _handlers_by_name.items()},
+        "sampling": {
+            **_describe("sampling", _read_target("sampling", "requests")),
+            "suppressed": _sampler.suppressed,
+        },
+        "overrides": _overrides.active(),
+    }
 
 
 def setup_logging(
     log_level: str = "INFO",
     log_format: str = "detailed",
     log_file: str = None,
-    enable_json_logs: bool = False
+    enable_json_logs: bool = False,
+    async_logging: bool = False,
+    queue_size: int = 10000,
+    queue_overflow: str = "block",
+    batch_size: int = 256,
+    rotation: str = "none",
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    rotation_when: str = "midnight",
+    sample_rates: Optional[Dict[str, float]] = None,
+    sample_default_rate: float = 1.0,
+    slow_request_ms: float = 1000.0,
+    access_log: bool = True
 ) -> None:
     """
     Setup logging configuration
@@ -78,8 +476,25 @@ def setup_logging(
         log_format: Format style ('simple', 'detailed', 'json')
         log_file: Path to log file (if None, only console logging)
         enable_json_logs: Whether to enable JSON formatted logs
+        async_logging: Hand records to a bounded queue drained by a background thread
+        queue_size: Capacity of the asynchronous log queue
+        queue_overflow: What to do when the queue is full ('block', 'drop_oldest', 'drop')
+        batch_size: Maximum number of records written per batch
+        rotation: Log file rotation ('none', 'size', 'time')
+        max_bytes: File size that triggers a rollover with size-based rotation
+        backup_count: Number of rotated files to keep
+        rotation_when: Rollover interval with time-based rotation (see TimedRotatingFileHandler)
+        sample_rates: Request log sampling rate per path prefix (see LogSampler)
+        sample_default_rate: Sampling rate of requests matching no prefix
+        slow_request_ms: Requests slower than this are logged even when not sampled
+        access_log: Keep uvicorn's access log, which repeats what the request logs say
     """
     
+    # Stop a previously configured pipeline so its queued records are written,
+    # and drop runtime overrides of the previous configuration
+    shutdown_logging()
+    _overrides.revert()
+    
     # Ensure logs directory exists
     if log_file:
         log_path = Path(log_file)
@@ -119,6 +534,19 @@ def setup_logging(
             'filename': log_file,
             'mode': 'a'
         }
+        if rotation == 'size':
+            handlers['file'].update({
+                'class': 'logging.handlers.RotatingFileHandler',
+                'maxBytes': max_bytes,
+                'backupCount': backup_count
+            })
+        elif rotation == 'time':
+            del handlers['file']['mode']
+            handlers['file'].update({
+                'class': 'logging.handlers.TimedRotatingFileHandler',
+                'when': rotation_when,
+                'backupCount': backup_count
+            })
     
     # Define loggers
     loggers = {
@@ -127,9 +555,10 @@ def setup_logging(
             'handlers': ['console'] + (['file'] if log_file else []),
             'propagate': False
         },
+        # Without handlers uvicorn doesn't format access log records at all
         'uvicorn.access': {
             'level': 'INFO',
-            'handlers': ['console'] + (['file'] if log_file else []),
+            'handlers': (['console'] + (['file'] if log_file else [])) if access_log else [],
             'propagate': False
         },
         'uvicorn.error': {
@@ -161,8 +590,71 @@ def setup_logging(
         for handler in logging.getLogger().handlers:
             if isinstance(handler, logging.StreamHandler):
                 handler.addFilter(lambda record: setattr(record, 'color', True) or True)
+    
+    _sampler.configure(sample_rates or {}, sample_default_rate, slow_request_ms)
+    
+    _handlers_by_name.clear()
+    for name in list(loggers) + [None]:
+        for handler in logging.getLogger(name).handlers:
+            _handlers_by_name[handler.name] = handler
+    
+    if async_logging:
+        _install_queue(list(loggers) + [None], queue_size, queue_overflow, batch_size)
+
+
+def _install_queue(logger_names: List[Optional[str]], queue_size: int, overflow: str, batch_size: int) -> None:
+    """Route the given loggers through a bounded queue drained by a background listener"""
+    global _listener, _queue_handler
+    
+    targets: List[logging.Handler] = []
+    for name in logger_names:
+        for handler in logging.getLogger(name).handlers:
+            if handler not in targets:
+                targets.append(handler)
+    
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = BoundedQueueHandler(log_queue, overflow)
+    for name in logger_names:
+        logger = logging.getLogger(name)
+        if logger.handlers:
+            _replaced_handlers[name] = logger.handlers
+            logger.handlers = [_queue_handler]
+    
+    _listener = BatchingQueueListener(log_queue, targets, batch_size)
+    _listener.start()
+
+
+atexit.register(shutdown_logging)
+
+
+class LazyLogger(logging.LoggerAdapter):
+    """
+    Logger deferring the construction of messages and fields
+
+    The message may be a callable returning it, and `extra` a callable
+    returning the fields; neither is called unless a record is emitted.
+    Records below WARNING are dropped (and counted) while handling a
+    request that wasn't sampled.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        super().__init__(logger, None)
+
+    def log(self, level, msg, *args, extra=None, **kwargs):
+        if not self.logger.isEnabledFor(level):
+            return
+        if level < logging.WARNING and not request_log_sampled.get():
+            _sampler.suppressed += 1
+            return
+        if callable(msg):
+            msg = msg()
+        if callable(extra):
+            extra = extra()
+        # Attribute the record to our caller rather than to this adapter
+        kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
+        self.logger.log(level, msg, *args, extra=extra, **kwargs)
 
 
-def get_logger(name: str = "fastapi_app") -> logging.Logger:
+def get_logger(name: str = "fastapi_app") -> LazyLogger:
     """Get logger instance"""
-    return logging.getLogger(name)
+    return LazyLogger(logging.getLogger(name))
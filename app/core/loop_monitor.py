@@ -0,0 +1,109 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import deque
+from types import FrameType
+from typing import Any, Deque, Dict, Optional
+from .logging import get_logger
+from .metrics import Histogram
+
+logger = get_logger("fastapi_app.loop_monitor")
+
+# Upper bounds (seconds) of the event loop lag histogram buckets
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def describe_stall(frame: Optional[FrameType]) -> Dict[str, Optional[str]]:
+    """Locate what a blocked thread is running: the innermost frame, and the HTTP request it serves"""
+    location = None
+    route = None
+    if frame is not None:
+        code = frame.f_code
+        location = f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+    while frame is not None and route is None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            route = f"{scope.get('method')} {scope.get('path')}"
+        frame = frame.f_back
+    return {"route": route, "location": location}
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop scheduling delay
+
+    A task sleeps for `interval` in a loop and records how much later than
+    that it wakes up in `histogram` (and the last `window` values in
+    `recent`). A watchdog thread notices when the loop stops responding
+    and captures what it is running at that moment, so lags over
+    `slow_threshold` are logged with the route of the request that
+    blocked the loop.
+    """
+
+    def __init__(self, interval: float = 0.1, slow_threshold: float = 0.25, window: int = 10):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.histogram = Histogram(LAG_BUCKETS)
+        self.recent: Deque[float] = deque(maxlen=window)
+        self.last_stall: Optional[Dict[str, Any]] = None
+        self._heartbeat = time.monotonic()
+        self._stall: Optional[Dict[str, Optional[str]]] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def lag(self) -> float:
+        """Highest lag over the recent window, in seconds"""
+        return max(self.recent, default=0.0)
+
+    def start(self) -> None:
+        """Start monitoring the running event loop"""
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.histogram.observe(lag)
+            self.recent.append(lag)
+            stall, self._stall = self._stall, None
+            if lag >= self.slow_threshold:
+                self._report(lag, stall or {"route": None, "location": None})
+
+    def _report(self, lag: float, stall: Dict[str, Optional[str]]) -> None:
+        self.last_stall = {"lag_ms": round(lag * 1000, 1), **stall}
+        route = stall["route"]
+        logger.warning(
+            lambda: f"Event loop blocked for {lag * 1000:.0f} ms" + (f" by {route}" if route else ""),
+            extra=lambda: {"loop_lag_ms": self.last_stall["lag_ms"], "route": route, "location": stall["location"]}
+        )
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self._stall is None and time.monotonic() - self._heartbeat > self.interval + self.slow_threshold:
+                self._stall = describe_stall(sys._current_frames().get(self._loop_thread))
@@ -0,0 +1,115 @@
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+from fastapi import Request
+
+# Upper bounds (seconds) of the request latency histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two increments"""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        # One count per bucket plus the +Inf overflow bucket
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le label, cumulative count) pairs as exposed by Prometheus"""
+        total = 0
+        buckets = []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            buckets.append(("+Inf" if bound == float("inf") else f"{bound:g}", total))
+        return buckets
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """
+    Request metrics rendered in the Prometheus text format
+
+    Recording only touches plain dicts and lists. The application runs its
+    requests on a single event loop thread, so no lock is taken on the hot
+    path. Other values (store size, queue depth, ...) are read from
+    callbacks when the metrics are scraped.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.in_flight = 0
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._callbacks: List[Tuple[str, str, str, Callable[[], float]]] = []
+        self._histograms: List[Tuple[str, str, Histogram]] = []
+
+    def record_request(self, method: str, route: str, status_code: int, duration: float) -> None:
+        key = (method, route, status_code)
+        self._requests[key] = self._requests.get(key, 0) + 1
+        histogram = self._latency.get((method, route))
+        if histogram is None:
+            histogram = self._latency[(method, route)] = Histogram(self.buckets)
+        histogram.observe(duration)
+
+    def register(self, name: str, help_text: str, callback: Callable[[], float], kind: str = "gauge") -> None:
+        """Expose a value read from `callback` at scrape time"""
+        self._callbacks.append((name, help_text, kind, callback))
+
+    def register_histogram(self, name: str, help_text: str, histogram: Histogram) -> None:
+        """Expose a histogram observed outside the request path"""
+        self._histograms.append((name, help_text, histogram))
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_total Total HTTP requests by method, route template and status",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status_code), count in sorted(self._requests.items()):
+            lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status_code)}}} {count}")
+
+        lines += [
+            "# HELP http_request_duration_seconds HTTP request latency by method and route template",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self._latency.items()):
+            labels = _labels(method=method, route=route)
+            for le, count in histogram.cumulative():
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        lines += [
+            "# HELP http_requests_in_flight HTTP requests currently being served",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        for name, help_text, kind, callback in self._callbacks:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {callback():g}"]
+        for name, help_text, histogram in self._histograms:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            lines += [f'{name}_bucket{{le="{le}"}} {count}' for le, count in histogram.cumulative()]
+            lines += [f"{name}_sum {histogram.sum:.6f}", f"{name}_count {histogram.count}"]
+        return "\n".join(lines) + "\n"
+
+
+def get_metrics(request: Request) -> MetricsRegistry:
+    """Dependency returning the application's metrics registry"""
+    return request.app.state.metrics
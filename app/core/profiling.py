@@ -0,0 +1,79 @@
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Optional
+
+PROFILE_MODES = ("cprofile", "sample")
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame: Optional[FrameType]) -> str:
+    """Render a stack root first, as one line of the collapsed-stack format (without the count)"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling one thread's stack from a background thread
+
+    Cheap enough to leave the profiled code at close to full speed; the
+    result is written in the collapsed-stack format read by flamegraph.pl
+    and speedscope.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.001):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def write(self, path: Path) -> None:
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[collapse_stack(frame)] += 1
+
+
+class DeterministicProfiler:
+    """cProfile wrapper with the same start/stop/write interface, writing pstats files"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+
+    def write(self, path: Path) -> None:
+        self.profile.dump_stats(path)
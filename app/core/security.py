@@ -0,0 +1,19 @@
+import secrets
+from fastapi import HTTPException, Request
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def require_admin(request: Request) -> None:
+    """
+    Dependency guarding admin endpoints
+
+    Answers 404 while no admin token is configured (the endpoints are
+    disabled) and 403 unless the request carries the token in X-Admin-Token.
+    """
+    expected = getattr(request.app.state, "admin_token", "")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    supplied = request.headers.get(ADMIN_TOKEN_HEADER, "")
+    if not secrets.compare_digest(supplied.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
@@ -0,0 +1,73 @@
+import os
+from typing import Any, Dict
+from .config import Settings
+
+SERVER_PROFILES = ("default", "production")
+
+# Settings the production profile changes, unless they were set explicitly
+PRODUCTION_PROFILE: Dict[str, Any] = {
+    "workers": 0,  # one per CPU
+    "server_loop": "uvloop",
+    "server_http": "httptools",
+    "server_backlog": 4096,
+    # Longer than the 60 s idle timeout of common load balancers, so that they close idle connections first
+    "server_keepalive_timeout_s": 65,
+    "server_limit_concurrency": 2048,
+    # LoggingMiddleware already logs every request
+    "server_access_log": False,
+    "server_graceful_shutdown_s": 25,
+}
+
+
+def apply_server_profile(settings: Settings) -> Settings:
+    """Return the settings with the server profile's values filled in where they weren't set explicitly"""
+    if settings.server_profile not in SERVER_PROFILES:
+        raise ValueError(f"Unknown server profile: {settings.server_profile} (expected one of {SERVER_PROFILES})")
+    if settings.server_profile == "default":
+        return settings
+    update = {name: value for name, value in PRODUCTION_PROFILE.items() if name not in settings.model_fields_set}
+    return settings.model_copy(update=update)
+
+
+def _installed(module: str) -> bool:
+    # Only needed by run.py, so kept out of the application's imports
+    import importlib.util
+    return importlib.util.find_spec(module) is not None
+
+
+def server_loop(settings: Settings) -> str:
+    """Event loop for uvicorn: uvloop falls back to asyncio when it isn't installed"""
+    if settings.server_loop == "uvloop" and not _installed("uvloop"):
+        return "asyncio"
+    return settings.server_loop
+
+
+def server_http(settings: Settings) -> str:
+    """HTTP parser for uvicorn: httptools falls back to h11 when it isn't installed"""
+    if settings.server_http == "httptools" and not _installed("httptools"):
+        return "h11"
+    return settings.server_http
+
+
+def server_workers(settings: Settings) -> int:
+    """Worker processes asked for; 0 means one per CPU"""
+    return settings.workers if settings.workers > 0 else os.cpu_count() or 1
+
+
+def uvicorn_options(settings: Settings, workers: int) -> Dict[str, Any]:
+    """Keyword arguments for uvicorn.run, other than the application"""
+    return {
+        "host": settings.host,
+        "port": settings.port,
+        "reload": settings.debug,
+        "workers": workers,
+        "loop": server_loop(settings),
+        "http": server_http(settings),
+        "backlog": settings.server_backlog,
+        "timeout_keep_alive": settings.server_keepalive_timeout_s,
+        "limit_concurrency": settings.server_limit_concurrency or None,
+        "limit_max_requests": settings.server_limit_max_requests or None,
+        "access_log": settings.server_access_log,
+        "timeout_graceful_shutdown": settings.server_graceful_shutdown_s or None,
+        "log_config": None,  # Use our custom logging configuration
+    }
@@ -0,0 +1,351 @@
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from .logging import get_logger
+
+logger = get_logger("fastapi_app.tracing")
+
+TRACEPARENT_HEADER = "traceparent"
+
+# version-trace_id-parent_id-flags, see https://www.w3.org/TR/trace-context/
+_TRACEPARENT = re.compile(r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_ERROR = 2
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Return (trace id, parent span id, sampled) from a traceparent header, or None if it is invalid"""
+    if not value:
+        return None
+    match = _TRACEPARENT.fullmatch(value.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags, rest = match.groups()
+    # Later versions may append fields; version 00 may not, and ff is invalid
+    if version == "ff" or (version == "00" and rest):
+        return None
+    if trace_id == _INVALID_TRACE_ID or parent_id == _INVALID_SPAN_ID:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def format_traceparent(trace_id: str, span_id: str, sampled: bool) -> str:
+    return f"00-{trace_id}-{span_id}-{'01' if sampled else '00'}"
+
+
+# Ids only need to be unique, not unpredictable, so they come from random rather than os.urandom
+
+def new_trace_id() -> str:
+    return f"{random.getrandbits(128) or 1:032x}"
+
+
+def new_span_id() -> str:
+    return f"{random.getrandbits(64) or 1:016x}"
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "kind", "attributes", "error")
+
+    def __init__(self, name: str, span_id: str, parent_id: Optional[str], start_ns: int, end_ns: int,
+                 kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None, error: bool = False):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.kind = kind
+        self.attributes = attributes
+        self.error = error
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """
+    Spans recorded for one sampled request
+
+    Times are perf_counter_ns() readings; `epoch_offset_ns` turns them into
+    the Unix times OTLP expects when the trace is exported.
+    """
+
+    __slots__ = ("trace_id", "root_id", "parent_id", "spans", "epoch_offset_ns")
+
+    def __init__(self, trace_id: str, root_id: str, parent_id: Optional[str] = None):
+        self.trace_id = trace_id
+        self.root_id = root_id
+        self.parent_id = parent_id
+        self.spans: List[Span] = []
+        self.epoch_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def add(self, name: str, start_ns: int, end_ns: int, parent_id: Optional[str] = None, **attributes: Any) -> None:
+        """Record a span measured elsewhere, by default as a child of the request span"""
+        self.spans.append(Span(name, new_span_id(), parent_id or self.root_id, start_ns, end_ns,
+                               attributes=attributes or None))
+
+    def server_timing(self, total_ns: int) -> str:
+        """Server-Timing header value: the time spent in each span name, in order of first start, then the total"""
+        durations: Dict[str, float] = {}
+        for span in sorted(self.spans, key=lambda span: span.start_ns):
+            if span.span_id != self.root_id:
+                durations[span.name] = durations.get(span.name, 0.0) + span.duration_ms
+        entries = [f"{name};dur={duration:.3f}" for name, duration in durations.items()]
+        entries.append(f"total;dur={total_ns / 1e6:.3f}")
+        return ", ".join(entries)
+
+
+# Trace of the request being handled, None when it isn't sampled
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+# Span that new spans are children of
+_active_span: ContextVar[Optional[str]] = ContextVar("active_span", default=None)
+
+_NO_SPAN = nullcontext()
+
+
+class _SpanScope:
+    __slots__ = ("trace", "name", "attributes", "span_id", "parent_id", "start_ns", "token")
+
+    def __init__(self, trace: Trace, name: str, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes or None
+
+    def __enter__(self) -> "_SpanScope":
+        self.span_id = new_span_id()
+        self.parent_id = _active_span.get() or self.trace.root_id
+        self.token = _active_span.set(self.span_id)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        end_ns = time.perf_counter_ns()
+        _active_span.reset(self.token)
+        self.trace.spans.append(Span(self.name, self.span_id, self.parent_id, self.start_ns, end_ns,
+                                     attributes=self.attributes, error=exc_type is not None))
+
+
+def span(name: str, **attributes: Any) -> Union[_SpanScope, nullcontext]:
+    """Context manager timing a block as a span of the current trace; does nothing when unsampled"""
+    trace = current_trace.get()
+    if trace is None:
+        return _NO_SPAN
+    return _SpanScope(trace, name, attributes)
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def _otlp_span(trace: Trace, span: Span) -> Dict[str, Any]:
+    encoded = {
+        "traceId": trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_ns + trace.epoch_offset_ns),
+        "endTimeUnixNano": str(span.end_ns + trace.epoch_offset_ns),
+    }
+    if span.parent_id:
+        encoded["parentSpanId"] = span.parent_id
+    if span.attributes:
+        encoded["attributes"] = [_attribute(key, value) for key, value in span.attributes.items()]
+    if span.error:
+        encoded["status"] = {"code": STATUS_CODE_ERROR}
+    return encoded
+
+
+class SpanExporter:
+    """
+    Writes finished traces to a file in the OTLP/JSON format
+
+    Each line is an ExportTraceServiceRequest, as written by the
+    OpenTelemetry Collector's file exporter, holding a batch of traces.
+    Requests only append to a bounded queue; a background thread writes
+    whenever `batch_size` traces are waiting or every `interval` seconds.
+    Traces are dropped, and counted, while the queue is full.
+    """
+
+    def __init__(self, path: str, service_name: str, batch_size: int = 512, interval: float = 1.0,
+                 max_queue: int = 10000):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_queue = max_queue
+        self.exported = 0
+        self.dropped = 0
+        self._resource = {"attributes": [_attribute("service.name", service_name)]}
+        self._queue: Deque[Trace] = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, trace: Trace) -> None:
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.append(trace)
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write out every queued trace"""
+        with self._lock:
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                spans = [_otlp_span(trace, span) for trace in batch for span in trace.spans]
+                line = json.dumps({"resourceSpans": [{
+                    "resource": self._resource,
+                    "scopeSpans": [{"scope": {"name": "fastapi_app"}, "spans": spans}],
+                }]}, separators=(",", ":"))
+                try:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(self.path, "a", encoding="utf-8") as handle:
+                        handle.write(line + "\n")
+                except OSError as e:
+                    self.dropped += len(batch)
+                    logger.error(f"Failed to export {len(batch)} traces: {e}")
+                    continue
+                self.exported += len(batch)
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+class _StageClock:
+    """When the route handler finished parsing the body and entered and left the endpoint"""
+
+    __slots__ = ("parse_end", "call_start", "call_end")
+
+    def __init__(self):
+        self.parse_end: Optional[int] = None
+        self.call_start: Optional[int] = None
+        self.call_end: Optional[int] = None
+
+
+_stage_clock: ContextVar[Optional[_StageClock]] = ContextVar("stage_clock", default=None)
+
+
+class TracedRequest(Request):
+    """Request noting when the body has been read and decoded"""
+
+    async def body(self) -> bytes:
+        body = await super().body()
+        clock = _stage_clock.get()
+        if clock is not None:
+            clock.parse_end = time.perf_counter_ns()
+        return body
+
+    async def json(self) -> Any:
+        decoded = await super().json()
+        clock = _stage_clock.get()
+        if clock is not None:
+            clock.parse_end = time.perf_counter_ns()
+        return decoded
+
+
+def _traced_call(call: Callable) -> Callable:
+    """Wrap an endpoint so that, in sampled requests, its run is recorded as the handler stage"""
+    if asyncio.iscoroutinefunction(call):
+        async def traced(**values: Any) -> Any:
+            clock = _stage_clock.get()
+            if clock is None:
+                return await call(**values)
+            clock.call_start = time.perf_counter_ns()
+            try:
+                with span("handler"):
+                    return await call(**values)
+            finally:
+                clock.call_end = time.perf_counter_ns()
+    else:
+        def traced(**values: Any) -> Any:
+            clock = _stage_clock.get()
+            if clock is None:
+                return call(**values)
+            clock.call_start = time.perf_counter_ns()
+            try:
+                with span("handler"):
+                    return call(**values)
+            finally:
+                clock.call_end = time.perf_counter_ns()
+    return traced
+
+
+class TracedRoute(APIRoute):
+    """
+    Route recording the stages of sampled requests as spans
+
+    FastAPI reads the body, resolves dependencies (validating the body into
+    its model), runs the endpoint and serializes what it returned in one
+    handler. The route notes when each step ends and records them as the
+    parse, validate, handler and serialize spans. Unsampled requests only
+    pay for a context variable lookup.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.dependant.call = _traced_call(self.dependant.call)
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+
+        async def traced_handler(request: Request) -> Response:
+            trace = current_trace.get()
+            if trace is None:
+                return await handler(request)
+            clock = _StageClock()
+            token = _stage_clock.set(clock)
+            start_ns = time.perf_counter_ns()
+            try:
+                if not isinstance(request, TracedRequest):
+                    request = TracedRequest(request.scope, request.receive)
+                return await handler(request)
+            finally:
+                end_ns = time.perf_counter_ns()
+                _stage_clock.reset(token)
+                validate_start = clock.parse_end or start_ns
+                if clock.parse_end is not None:
+                    trace.add("parse", start_ns, clock.parse_end)
+                trace.add("validate", validate_start, clock.call_start or end_ns)
+                if clock.call_end is not None:
+                    trace.add("serialize", clock.call_end, end_ns)
+
+        return traced_handler
@@ -1,58 +1,271 @@
-from fastapi import FastAPI, HTTPException
-from .routers import items
-from .core.config import get_settings
-from .core.logging import setup_logging, get_logger
-from .middleware import LoggingMiddleware
-
-# Get settings
-settings = get_settings()
-
-# Setup logging
-setup_logging(
-    log_level=settings.log_level,
-    log_format=settings.log_format,
-    log_file=settings.log_file if settings.enable_file_logging else None,
-    enable_json_logs=settings.enable_json_logs
+import time
+
+# Reference point of the startup timing report
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from .core.config import Settings, get_settings
+from .core.logging import (
+    get_log_queue_stats,
+    get_log_sampler,
+    get_logger,
+    parse_sample_rates,
+    setup_logging,
+    shutdown_logging,
 )
+from .core.metrics import MetricsRegistry
+from .core.server import apply_server_profile
+from .middleware import LoggingMiddleware, MetricsMiddleware
 
 # Get logger
 logger = get_logger("fastapi_app.main")
 
-# Log application startup
-logger.info(f"Starting {settings.app_name} application")
-logger.info(f"Debug mode: {settings.debug}")
-logger.info(f"Log level: {settings.log_level}")
+_import_ms = round((time.perf_counter() - _import_started) * 1000, 2)
+
+
+def _setup_logging(settings: Settings) -> None:
+    setup_logging(
+        log_level=settings.log_level,
+        log_format=settings.log_format,
+        log_file=settings.log_file if settings.enable_file_logging else None,
+        enable_json_logs=settings.enable_json_logs,
+        async_logging=settings.log_async,
+        queue_size=settings.log_queue_size,
+        queue_overflow=settings.log_queue_overflow,
+        batch_size=settings.log_batch_size,
+        rotation=settings.log_rotation,
+        max_bytes=settings.log_max_bytes,
+        backup_count=settings.log_backup_count,
+        rotation_when=settings.log_rotation_when,
+        sample_rates=parse_sample_rates(settings.log_sample_rates),
+        sample_default_rate=settings.log_sample_default_rate,
+        slow_request_ms=settings.log_slow_request_ms,
+        access_log=settings.server_access_log
+    )
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Build the application for the given settings (by default from the environment),
+    with the server profile applied
+
+    Everything the routes need is attached to `app.state` here, so apps can
+    be served or tested without running their lifespan. Routers and optional
+    subsystems are only imported when the app is built. How long each phase
+    took is kept in `app.state.startup_timings` and logged at startup.
+    """
+    settings = apply_server_profile(settings or get_settings())
+    timings: Dict[str, float] = {"import_ms": _import_ms}
+    started = last = time.perf_counter()
+
+    def lap(phase: str) -> None:
+        nonlocal last
+        now = time.perf_counter()
+        timings[f"{phase}_ms"] = round((now - last) * 1000, 2)
+        last = now
+
+    # Setup logging
+    _setup_logging(settings)
+    lap("logging")
+
+    # Log application startup
+    logger.info(f"Starting {settings.app_name} application")
+    logger.info(f"Debug mode: {settings.debug}")
+    logger.info(f"Log level: {settings.log_level}")
+
+    from .routers import items, metrics
+    from .repositories import PriceIndex, TextIndex, create_item_repository
+    lap("router_import")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        timings["ready_ms"] = round((time.perf_counter() - _import_started) * 1000, 2)
+        logger.info(lambda: f"FastAPI application startup complete in {timings['ready_ms']} ms",
+                    extra=lambda: {"startup_timings": timings})
+        if app.state.loop_monitor is not None:
+            app.state.loop_monitor.start()
+        yield
+        logger.info("FastAPI application shutdown")
+        if app.state.loop_monitor is not None:
+            await app.state.loop_monitor.stop()
+        if app.state.span_exporter is not None:
+            app.state.span_exporter.close()
+        app.state.item_repository.close()
+        shutdown_logging()
+
+    app = FastAPI(
+        title=settings.app_name,
+        description="A simple FastAPI example for GitHub Actions course",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    app.state.settings = settings
+    app.state.startup_timings = timings
+
+    # Item store, resolved by the routers through dependency injection
+    app.state.item_repository = create_item_repository(settings)
+
+    # Columnar price/availability index used for filtering and statistics
+    app.state.price_index = PriceIndex(seq_of=app.state.item_repository.seq_of)
+    app.state.item_repository.subscribe(app.state.price_index.apply)
+
+    # Inverted index for text search over item names and descriptions
+    app.state.text_index = TextIndex()
+    app.state.item_repository.subscribe(app.state.text_index.apply)
+    lap("store")
+
+    # Cache of encoded item responses, invalidated by repository changes
+    app.state.response_cache = None
+    if settings.response_cache_enabled:
+        from .core.cache import ResponseCache
+        app.state.response_cache = ResponseCache(settings.response_cache_max_bytes)
+        app.state.item_repository.subscribe(items.invalidate_cached_items(app.state.response_cache))
+
+    # Content-negotiated compression of list and item responses
+    app.state.compressor = None
+    if settings.compression_enabled:
+        from .core.compression import ResponseCompressor
+        app.state.compressor = ResponseCompressor(
+            settings.compression_min_bytes, settings.compression_offload_bytes, settings.compression_gzip_level
+        )
+
+    # Token guarding the admin endpoints
+    app.state.admin_token = settings.admin_token
+
+    # Request metrics, plus gauges read when /metrics is scraped
+    registry = app.state.metrics = MetricsRegistry()
+    registry.register("items_store_size", "Items in the store", lambda: len(app.state.item_repository))
+    registry.register("log_queue_depth", "Records waiting in the async log queue",
+                      lambda: get_log_queue_stats()["depth"])
+    registry.register("log_queue_dropped_total", "Log records dropped by the async log queue",
+                      lambda: get_log_queue_stats()["dropped"], kind="counter")
+    registry.register("log_records_suppressed_total", "Log records suppressed by request sampling",
+                      lambda: get_log_sampler().suppressed, kind="counter")
+    if app.state.response_cache is not None:
+        cache = app.state.response_cache
+        registry.register("response_cache_hits_total", "Response cache hits", lambda: cache.hits, kind="counter")
+        registry.register("response_cache_misses_total", "Response cache misses", lambda: cache.misses, kind="counter")
+        registry.register("response_cache_bytes", "Bytes held by the response cache", lambda: cache.size)
+
+    # Load shedding, counted in the metrics
+    app.state.admission = None
+    if settings.admission_max_concurrency > 0 or settings.rate_limit_per_second > 0:
+        from .core.admission import AdmissionController
+        admission = app.state.admission = AdmissionController(
+            max_concurrency=settings.admission_max_concurrency,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout_ms / 1000,
+            rate=settings.rate_limit_per_second,
+            burst=settings.rate_limit_burst,
+            exempt_paths=filter(None, (path.strip() for path in settings.admission_exempt_paths.split(","))),
+        )
+        registry.register("http_requests_shed_overloaded_total", "Requests shed with 503 by the concurrency limit",
+                          lambda: admission.shed_overloaded, kind="counter")
+        registry.register("http_requests_shed_rate_limited_total", "Requests shed with 429 by the per-client rate limit",
+                          lambda: admission.shed_rate_limited, kind="counter")
+        registry.register("admission_queue_depth", "Requests waiting for a concurrency slot", lambda: admission.queued)
+
+    # Event loop lag sampler, started with the lifespan and read by /ready
+    app.state.loop_monitor = None
+    if settings.loop_monitor_enabled:
+        from .core.loop_monitor import LoopLagMonitor
+        monitor = app.state.loop_monitor = LoopLagMonitor(
+            interval=settings.loop_monitor_interval_ms / 1000,
+            slow_threshold=settings.loop_slow_callback_ms / 1000,
+        )
+        registry.register_histogram("event_loop_lag_seconds", "Delay of event loop callbacks past their scheduled time",
+                                    monitor.histogram)
+
+    # Exporter of sampled request traces
+    app.state.span_exporter = None
+    if settings.tracing_enabled:
+        from .core.tracing import SpanExporter
+        exporter = app.state.span_exporter = SpanExporter(
+            settings.trace_file,
+            service_name=settings.app_name,
+            batch_size=settings.trace_export_batch_size,
+            interval=settings.trace_export_interval_ms / 1000,
+            max_queue=settings.trace_export_max_queue,
+        )
+        registry.register("traces_exported_total", "Sampled request traces written to the trace file",
+                          lambda: exporter.exported, kind="counter")
+        registry.register("traces_dropped_total", "Sampled request traces dropped by the exporter",
+                          lambda: exporter.dropped, kind="counter")
+    lap("state")
+
+    # Middleware added later runs outside: shed requests still get a request id and a log line
+    if app.state.admission is not None:
+        from .middleware.admission import AdmissionControlMiddleware
+        app.add_middleware(AdmissionControlMiddleware, controller=app.state.admission)
+    app.add_middleware(LoggingMiddleware)
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    if app.state.span_exporter is not None:
+        from .middleware.tracing import TracingMiddleware
+        app.add_middleware(
+            TracingMiddleware,
+            exporter=app.state.span_exporter,
+            sample_rate=settings.trace_sample_rate,
+            server_timing=settings.trace_server_timing,
+        )
+    if settings.profiling_enabled:
+        from .middleware.profiling import ProfilingMiddleware
+        app.add_middleware(
+            ProfilingMiddleware,
+            directory=settings.profile_dir,
+            max_concurrent=settings.profile_max_concurrent,
+            sample_interval=settings.profile_sample_interval_ms / 1000,
+        )
+
+    # Include routers
+    app.include_router(items.router, prefix="/api/v1", tags=["items"])
+    logger.info("Registered items router at /api/v1")
+    app.include_router(metrics.router, tags=["metrics"])
+    if settings.admin_token:
+        from .routers import admin
+        app.include_router(admin.router, tags=["admin"])
+
+    @app.get("/")
+    async def root():
+        """Root endpoint that returns a welcome message"""
+        logger.info("Root endpoint accessed")
+        return {"message": f"Welcome to {settings.app_name}!", "version": "1.0.0"}
+
+    @app.get("/health")
+    async def health_check():
+        """Health check endpoint"""
+        logger.debug("Health check endpoint accessed")
+        return {"status": "healthy", "message": "API is running"}
+
+    @app.get("/ready")
+    async def readiness_check():
+        """Readiness check endpoint; 503 while the event loop lags or too many requests are in flight"""
+        monitor = app.state.loop_monitor
+        lag_ms = round(monitor.lag * 1000, 1) if monitor is not None else None
+        # Not counting this request
+        in_flight = registry.in_flight - 1
+        reasons = []
+        if lag_ms is not None and settings.ready_max_loop_lag_ms > 0 and lag_ms > settings.ready_max_loop_lag_ms:
+            reasons.append(f"event loop lag {lag_ms} ms over {settings.ready_max_loop_lag_ms:g} ms")
+        if settings.ready_max_in_flight > 0 and in_flight > settings.ready_max_in_flight:
+            reasons.append(f"{in_flight} requests in flight over {settings.ready_max_in_flight}")
+        if reasons:
+            logger.warning(lambda: f"Not ready: {'; '.join(reasons)}")
+        body = {"status": "unready" if reasons else "ready", "loop_lag_ms": lag_ms, "in_flight": in_flight,
+                "reasons": reasons}
+        return JSONResponse(body, status_code=503 if reasons else 200)
+    lap("routers")
+
+    timings["create_app_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return app
 
-app = FastAPI(
-    title=settings.app_name,
-    description="A simple FastAPI example for GitHub Actions course",
-    version="1.0.0"
-)
 
-# Add logging middleware
-app.add_middleware(LoggingMiddleware)
-
-# Include routers
-app.include_router(items.router, prefix="/api/v1", tags=["items"])
-logger.info("Registered items router at /api/v1")
-
-@app.get("/")
-async def root():
-    """Root endpoint that returns a welcome message"""
-    logger.info("Root endpoint accessed")
-    return {"message": f"Welcome to {settings.app_name}!", "version": "1.0.0"}
-
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    logger.debug("Health check endpoint accessed")
-    return {"status": "healthy", "message": "API is running"}
-
-# Application lifecycle events
-@app.on_event("startup")
-async def startup_event():
-    logger.info("FastAPI application startup complete")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("FastAPI application shutdown")
\ No newline at end of file
+def __getattr__(name: str):
+    # `from app.main import app` and the "app.main:app" import string build
+    # the default application on first use rather than at import
+    if name == "app":
+        application = globals()["app"] = create_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
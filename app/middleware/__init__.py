@@ -1,79 +1,100 @@
+import logging
 import time
 import uuid
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.core.logging import get_logger
+from typing import Any, Callable, Dict, Optional
+from starlette.datastructures import URL
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.logging import get_log_sampler, get_logger, request_log_sampled
+from app.core.metrics import MetricsRegistry
 
 logger = get_logger("fastapi_app.middleware")
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware to log HTTP requests and responses"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Generate unique request ID
-        request_id = str(uuid.uuid4())
-        
+def get_header(scope: Scope, name: bytes) -> Optional[str]:
+    """Return the first value of a (lower-case) request header, if present"""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def get_client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _request_fields(scope: Scope, request_id: str) -> Dict[str, Any]:
+    """Build the extra fields of the incoming request log record"""
+    path = scope["path"]
+    query_string = scope.get("query_string", b"")
+    return {
+        "request_id": request_id,
+        "method": scope["method"],
+        "path": path,
+        "url": str(URL(scope=scope)),
+        "query_params": query_string.decode("latin-1") if query_string else None,
+        "client_ip": get_client_ip(scope),
+        "user_agent": get_header(scope, b"user-agent") or "unknown",
+        "endpoint": path,
+    }
+
+
+class LoggingMiddleware:
+    """
+    Middleware to log HTTP requests and responses
+
+    Implemented as a plain ASGI middleware rather than on top of
+    BaseHTTPMiddleware, so it adds no extra task per request and doesn't
+    buffer streaming responses. Log fields are only built when the
+    corresponding level is enabled, and only for sampled requests (see
+    LogSampler); server errors and slow requests are always logged.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Generate unique request ID, unless TracingMiddleware provided the trace id
+        request_id = scope.get("state", {}).get("trace_id") or str(uuid.uuid4())
+
         # Start timing
-        start_time = time.time()
-        
-        # Extract request info
-        method = request.method
-        url = str(request.url)
-        path = request.url.path
-        query_params = str(request.query_params) if request.query_params else None
-        client_ip = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("user-agent", "unknown")
-        
+        start_time = time.perf_counter_ns()
+
+        method = scope["method"]
+        path = scope["path"]
+
+        # Decide up front whether this request's logs are kept
+        sampler = get_log_sampler()
+        sampled = sampler.sample(path)
+        sampled_token = request_log_sampled.set(sampled)
+
         # Log incoming request
-        logger.info(
-            f"Incoming {method} request to {path}",
-            extra={
-                "request_id": request_id,
-                "method": method,
-                "path": path,
-                "url": url,
-                "query_params": query_params,
-                "client_ip": client_ip,
-                "user_agent": user_agent,
-                "endpoint": path
-            }
-        )
-        
+        logger.info(lambda: f"Incoming {method} request to {path}", extra=lambda: _request_fields(scope, request_id))
+
         # Add request ID to request state for use in other parts of the app
-        request.state.request_id = request_id
-        
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        status_code = None
+        request_id_header = (b"x-request-id", request_id.encode("latin-1"))
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Add request ID to response headers for tracing
+                message["headers"] = [*message.get("headers", ()), request_id_header]
+            await send(message)
+
         try:
             # Process request
-            response = await call_next(request)
-            
-            # Calculate duration
-            duration = time.time() - start_time
-            
-            # Log successful response
-            logger.info(
-                f"Request completed: {method} {path} - {response.status_code}",
-                extra={
-                    "request_id": request_id,
-                    "method": method,
-                    "path": path,
-                    "status_code": response.status_code,
-                    "duration": round(duration, 4),
-                    "endpoint": path
-                }
-            )
-            
-            # Add request ID to response headers for tracing
-            response.headers["X-Request-ID"] = request_id
-            
-            return response
-            
+            await self.app(scope, receive, send_with_request_id)
         except Exception as e:
-            # Calculate duration for failed requests
-            duration = time.time() - start_time
-            
             # Log error
+            duration = (time.perf_counter_ns() - start_time) / 1e9
             logger.error(
                 f"Request failed: {method} {path} - {str(e)}",
                 extra={
@@ -86,6 +107,93 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                 },
                 exc_info=True
             )
-            
+
             # Re-raise the exception
             raise
+        finally:
+            request_log_sampled.reset(sampled_token)
+
+        # Log completed response
+        if logger.isEnabledFor(logging.INFO):
+            duration = (time.perf_counter_ns() - start_time) / 1e9
+            if not sampled and not sampler.keep(status_code, duration):
+                sampler.suppressed += 1
+                return
+            logger.info(
+                f"Request completed: {method} {path} - {status_code}",
+                extra={
+                    "request_id": request_id,
+                    "method": method,
+                    "path": path,
+                    "status_code": status_code,
+                    "duration": round(duration, 4),
+                    "endpoint": path
+                }
+            )
+
+
+# Route label for requests that matched no route, so unknown paths can't explode cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def get_route_template(scope: Scope) -> str:
+    """Return the path template of the route that handled a request (e.g. /api/v1/items/{item_id})"""
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return UNMATCHED_ROUTE
+    templates = getattr(app.state, "route_templates", None)
+    if templates is None:
+        templates = {}
+        for route in app.routes:
+            templates.setdefault(getattr(route, "endpoint", None), route.path)
+        app.state.route_templates = templates
+    return templates.get(endpoint, UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    """Middleware recording per-route request counts, latency histograms and in-flight requests"""
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        status_code = 500
+        start_time = time.perf_counter_ns()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.in_flight -= 1
+            registry.record_request(
+                scope["method"], get_route_template(scope), status_code,
+                (time.perf_counter_ns() - start_time) / 1e9,
+            )
+
+
+def __getattr__(name: str):
+    # The optional middleware is imported on first use, so that apps not
+    # enabling it don't import tracing, admission control or the profilers
+    if name == "AdmissionControlMiddleware":
+        from .admission import AdmissionControlMiddleware
+        return AdmissionControlMiddleware
+    if name == "ProfilingMiddleware":
+        from .profiling import ProfilingMiddleware
+        return ProfilingMiddleware
+    if name == "TracingMiddleware":
+        from .tracing import TracingMiddleware
+        return TracingMiddleware
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
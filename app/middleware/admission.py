@@ -0,0 +1,57 @@
+import json
+import math
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.admission import AdmissionController
+from . import get_client_ip
+
+
+async def _reject(send: Send, status_code: int, detail: str, retry_after: float) -> None:
+    """Answer a shed request without running the application"""
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionControlMiddleware:
+    """
+    Middleware shedding load before it reaches the application
+
+    Requests over a client's rate limit get 429 and requests that find no
+    concurrency slot within the queue timeout get 503, both with
+    Retry-After. Exempt paths (such as /health) are always let through.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        controller = self.controller
+        if scope["type"] != "http" or scope["path"] in controller.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if controller.rate > 0:
+            retry_after = controller.check_rate(get_client_ip(scope))
+            if retry_after is not None:
+                await _reject(send, 429, "Too many requests", retry_after)
+                return
+
+        if controller.max_concurrency <= 0:
+            await self.app(scope, receive, send)
+            return
+        if not await controller.acquire():
+            await _reject(send, 503, "Server overloaded", controller.queue_timeout)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
@@ -0,0 +1,95 @@
+import secrets
+import time
+import uuid
+from pathlib import Path
+from typing import Union
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.profiling import PROFILE_MODES, DeterministicProfiler, SamplingProfiler
+
+Profiler = Union[DeterministicProfiler, SamplingProfiler]
+from . import get_header, logger
+
+
+class ProfilingMiddleware:
+    """
+    Middleware running single requests under a profiler on demand
+
+    A request carrying `X-Profile: cprofile|sample` and the admin token in
+    `X-Admin-Token` is profiled with cProfile (pstats output) or a sampling
+    profiler (collapsed stacks). The file is named after the request id, and
+    its name is returned in the X-Profile header. At most `max_concurrent`
+    requests are profiled at once (one for cProfile), and the others run
+    normally. Add it last so it wraps the other middleware.
+
+    Profiles cover the event loop thread while the request is in flight, so
+    work done for concurrent requests shows up too. Files are written from
+    the thread pool, keeping the disk off the event loop.
+    """
+
+    def __init__(self, app: ASGIApp, directory: str, max_concurrent: int = 1, sample_interval: float = 0.001):
+        self.app = app
+        self.directory = Path(directory)
+        self.max_concurrent = max_concurrent
+        self.sample_interval = sample_interval
+        self.active = 0
+        self._cprofile_active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = get_header(scope, b"x-profile")
+        if mode is None or not self._authorized(scope, mode):
+            await self.app(scope, receive, send)
+            return
+        if self.active >= self.max_concurrent or (mode == "cprofile" and self._cprofile_active):
+            logger.warning(f"Profiling skipped, {self.active} requests already profiled",
+                           extra={"path": scope["path"], "profile_mode": mode})
+            await self.app(scope, receive, send)
+            return
+
+        path = None
+
+        async def send_with_profile(message: Message) -> None:
+            nonlocal path
+            if message["type"] == "http.response.start":
+                # The request id is assigned by LoggingMiddleware further in
+                request_id = scope.get("state", {}).get("request_id") or str(uuid.uuid4())
+                path = self.directory / f"{request_id}.{'prof' if mode == 'cprofile' else 'collapsed'}"
+                message["headers"] = [*message.get("headers", ()), (b"x-profile", path.name.encode("latin-1"))]
+            await send(message)
+
+        profiler = DeterministicProfiler() if mode == "cprofile" else SamplingProfiler(interval=self.sample_interval)
+        self.active += 1
+        self._cprofile_active = self._cprofile_active or mode == "cprofile"
+        start_time = time.perf_counter_ns()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profiler.stop()
+            self.active -= 1
+            if mode == "cprofile":
+                self._cprofile_active = False
+            if path is not None:
+                await run_in_threadpool(self._write, profiler, path)
+                logger.info(
+                    f"Profile written: {path}",
+                    extra={
+                        "request_id": path.stem,
+                        "path": scope["path"],
+                        "profile_mode": mode,
+                        "profile_file": str(path),
+                        "duration": round((time.perf_counter_ns() - start_time) / 1e9, 4),
+                    }
+                )
+
+    def _write(self, profiler: Profiler, path: Path) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.write(path)
+
+    def _authorized(self, scope: Scope, mode: str) -> bool:
+        expected = getattr(scope["app"].state, "admin_token", "") if "app" in scope else ""
+        supplied = get_header(scope, b"x-admin-token") or ""
+        return bool(expected) and mode in PROFILE_MODES and secrets.compare_digest(supplied.encode(), expected.encode())
@@ -0,0 +1,92 @@
+import random
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.tracing import (
+    SPAN_KIND_SERVER,
+    Span,
+    SpanExporter,
+    Trace,
+    current_trace,
+    format_traceparent,
+    new_span_id,
+    new_trace_id,
+    parse_traceparent,
+)
+from . import get_header, get_route_template
+
+
+class TracingMiddleware:
+    """
+    Middleware propagating W3C trace context and recording sampled requests
+
+    The trace id comes from an incoming `traceparent` header, or is
+    generated, and becomes the request id; every response carries a
+    `traceparent` naming this request's span. Requests are sampled when
+    their parent was, otherwise with probability `sample_rate`. Spans of
+    sampled requests (see TracedRoute and `span`) are handed to the
+    exporter, and with `server_timing` summed up in a Server-Timing header.
+    """
+
+    def __init__(self, app: ASGIApp, exporter: SpanExporter, sample_rate: float = 0.0, server_timing: bool = False):
+        self.app = app
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = parse_traceparent(get_header(scope, b"traceparent"))
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = new_trace_id(), None
+            sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        span_id = new_span_id()
+        scope.setdefault("state", {})["trace_id"] = trace_id
+        traceparent_header = (b"traceparent", format_traceparent(trace_id, span_id, sampled).encode("latin-1"))
+
+        if not sampled:
+            async def send_with_traceparent(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    message["headers"] = [*message.get("headers", ()), traceparent_header]
+                await send(message)
+
+            await self.app(scope, receive, send_with_traceparent)
+            return
+
+        trace = Trace(trace_id, span_id, parent_id)
+        status_code = 500
+        start_ns = time.perf_counter_ns()
+
+        async def send_with_trace(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = [*message.get("headers", ()), traceparent_header]
+                if self.server_timing:
+                    timing = trace.server_timing(time.perf_counter_ns() - start_ns)
+                    headers.append((b"server-timing", timing.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            current_trace.reset(token)
+            route = get_route_template(scope)
+            trace.spans.append(Span(
+                f"{scope['method']} {route}", span_id, parent_id, start_ns, time.perf_counter_ns(),
+                kind=SPAN_KIND_SERVER,
+                attributes={
+                    "http.request.method": scope["method"],
+                    "http.route": route,
+                    "url.path": scope["path"],
+                    "http.response.status_code": status_code,
+                },
+                error=status_code >= 500,
+            ))
+            self.exporter.export(trace)
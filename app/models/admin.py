@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, Optional
+from ..core.logging import parse_level
+
+# Longest a runtime logging change may stay in effect
+MAX_OVERRIDE_TTL = 24 * 60 * 60
+
+
+class SamplingChange(BaseModel):
+    rates: Dict[str, float] = {}
+    default_rate: float = Field(1.0, ge=0, le=1)
+    slow_request_ms: float = Field(1000.0, ge=0)
+
+    @field_validator("rates")
+    @classmethod
+    def check_rates(cls, rates: Dict[str, float]) -> Dict[str, float]:
+        for prefix, rate in rates.items():
+            if not 0 <= rate <= 1:
+                raise ValueError(f"sampling rate of {prefix} must be between 0 and 1")
+        return rates
+
+
+class LoggingChange(BaseModel):
+    loggers: Dict[str, str] = {}
+    handlers: Dict[str, str] = {}
+    sampling: Optional[SamplingChange] = None
+    ttl_seconds: float = Field(300, gt=0, le=MAX_OVERRIDE_TTL)
+
+    @field_validator("loggers", "handlers")
+    @classmethod
+    def check_levels(cls, levels: Dict[str, str]) -> Dict[str, str]:
+        for level in levels.values():
+            parse_level(level)
+        return {name: level.upper() for name, level in levels.items()}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, List, Optional
 
 
 class ItemBase(BaseModel):
@@ -22,3 +22,38 @@ class ItemResponse(ItemBase):
 
     class Config:
         from_attributes = True
+
+
+class ItemBulkUpdate(ItemUpdate):
+    id: int
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    status_code: int
+    id: Optional[int] = None
+    error: Optional[Any] = None
+
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+class ItemImport(ItemCreate):
+    # Kept only when importing with keep_ids, otherwise a new id is assigned
+    id: Optional[int] = None
+
+
+class ImportLineError(BaseModel):
+    line: int
+    error: Any
+
+
+class ImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportLineError]
+    # True when more lines failed than are listed in errors
+    errors_truncated: bool = False
@@ -0,0 +1,30 @@
+# This file makes the repositories directory a Python package
+from .item import ChangeListener, IdAllocator, ItemRepository, get_item_repository
+from .backends import create_item_repository
+from .columns import PriceIndex, get_price_index
+from .search import TextIndex, get_text_index
+
+__all__ = [
+    "ChangeListener",
+    "DurableItemRepository",
+    "IdAllocator",
+    "ItemRepository",
+    "PriceIndex",
+    "SQLiteItemRepository",
+    "TextIndex",
+    "create_item_repository",
+    "get_item_repository",
+    "get_price_index",
+    "get_text_index",
+]
+
+
+def __getattr__(name: str):
+    # The persistent backends are imported on first use, as most processes only need one of them
+    if name == "DurableItemRepository":
+        from .durable import DurableItemRepository
+        return DurableItemRepository
+    if name == "SQLiteItemRepository":
+        from .sqlite import SQLiteItemRepository
+        return SQLiteItemRepository
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,30 @@
+from pathlib import Path
+from .item import ItemRepository
+
+STORE_BACKENDS = ("memory", "durable", "sqlite")
+# Backends whose state can be shared by several worker processes
+SHARED_BACKENDS = ("sqlite",)
+
+
+def create_item_repository(settings) -> ItemRepository:
+    """Build the item repository selected by `Settings.store_backend`"""
+    if settings.store_backend == "memory":
+        return ItemRepository()
+    # Persistent backends are only imported when selected
+    if settings.store_backend == "durable":
+        from .durable import DurableItemRepository
+        return DurableItemRepository(
+            settings.store_path,
+            fsync=settings.store_fsync,
+            fsync_batch=settings.store_fsync_batch,
+            fsync_interval=settings.store_fsync_interval_ms / 1000,
+            snapshot_every=settings.store_snapshot_every,
+        )
+    if settings.store_backend == "sqlite":
+        from .sqlite import SQLiteItemRepository
+        return SQLiteItemRepository(
+            Path(settings.store_path) / "items.db",
+            pool_size=settings.store_pool_size,
+            poll_interval=settings.store_poll_interval_ms / 1000,
+        )
+    raise ValueError(f"Unknown store backend: {settings.store_backend} (expected one of {STORE_BACKENDS})")
@@ -0,0 +1,180 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from fastapi import Request
+
+# Compact once at least this many rows are dead and they outnumber live rows
+COMPACT_MIN_DEAD_ROWS = 1024
+# Rows masked by the first step of a limited page scan; later steps double it
+PAGE_SCAN_MIN_ROWS = 1024
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+
+class PriceIndex:
+    """
+    Columnar side index of item prices and availability
+
+    Keeps one row per item in parallel NumPy arrays (id, insertion sequence,
+    price, availability and a liveness mask) so range filters and
+    aggregations run as vectorized operations instead of Python loops over
+    item dicts. Rows stay in insertion order; deletes only clear the
+    liveness bit and the arrays are compacted once enough rows are dead.
+
+    Register `apply` as a repository change listener to keep it up to date.
+    Pass the repository's `seq_of` to number rows with the repository's own
+    insertion sequence, so cursors agree with every copy of the index.
+    """
+
+    def __init__(self, capacity: int = 1024, seq_of: Optional[Callable[[int], Optional[int]]] = None):
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._seqs = np.zeros(capacity, dtype=np.int64)
+        self._prices = np.zeros(capacity, dtype=np.float64)
+        self._available = np.zeros(capacity, dtype=bool)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+        self._dead = 0
+        self._next_seq = 1
+        self._seq_of = seq_of
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def apply(self, op: str, item: Optional[Dict[str, Any]]) -> None:
+        """Repository change listener"""
+        if op == "create" or op == "update":
+            self.upsert(item["id"], item["price"], item["is_available"])
+        elif op == "delete":
+            self.remove(item["id"])
+        elif op == "clear":
+            self.clear()
+
+    def upsert(self, item_id: int, price: float, is_available: bool) -> None:
+        row = self._rows.get(item_id)
+        if row is None:
+            if self._size == len(self._ids):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._rows[item_id] = row
+            self._ids[row] = item_id
+            seq = self._seq_of(item_id) if self._seq_of is not None else None
+            self._seqs[row] = self._next_seq if seq is None else seq
+            self._next_seq = int(self._seqs[row]) + 1
+            self._alive[row] = True
+        self._prices[row] = price
+        self._available[row] = is_available
+
+    def remove(self, item_id: int) -> None:
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return
+        self._alive[row] = False
+        self._dead += 1
+        if self._dead >= COMPACT_MIN_DEAD_ROWS and self._dead * 2 > self._size:
+            self.compact()
+
+    def clear(self) -> None:
+        self._rows.clear()
+        self._alive[:] = False
+        self._size = 0
+        self._dead = 0
+
+    def compact(self) -> None:
+        """Drop dead rows, keeping the live ones in insertion order"""
+        live = np.flatnonzero(self._alive[:self._size])
+        count = len(live)
+        for column in (self._ids, self._seqs, self._prices, self._available):
+            column[:count] = column[live]
+        self._alive[:count] = True
+        self._alive[count:] = False
+        self._size = count
+        self._dead = 0
+        self._rows = dict(zip(self._ids[:count].tolist(), range(count)))
+
+    def _grow(self) -> None:
+        capacity = max(1024, len(self._ids) * 2)
+        for name in ("_ids", "_seqs", "_prices", "_available", "_alive"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _mask(self, start: int, stop: int, min_price: Optional[float], max_price: Optional[float],
+              is_available: Optional[bool]) -> np.ndarray:
+        mask = self._alive[start:stop].copy()
+        prices = self._prices[start:stop]
+        if min_price is not None:
+            mask &= prices >= min_price
+        if max_price is not None:
+            mask &= prices <= max_price
+        if is_available is not None:
+            mask &= self._available[start:stop] == is_available
+        return mask
+
+    def page(
+        self,
+        after: Optional[int] = None,
+        limit: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        is_available: Optional[bool] = None,
+    ) -> Tuple[List[int], Optional[int]]:
+        """
+        Return ids of matching items in insertion order
+
+        `after` and the returned resume point are row sequence numbers; the
+        second value is None when there are no further matches. With a
+        limit, only the rows up to the match after the last one returned are
+        masked, in windows that double in size, so paging through the whole
+        index costs about as much as one unlimited page.
+        """
+        size = self._size
+        start = 0 if after is None else int(np.searchsorted(self._seqs[:size], after, side="right"))
+        wanted = None if limit is None else limit + 1
+        window = max(wanted or 0, PAGE_SCAN_MIN_ROWS)
+        found: List[np.ndarray] = []
+        count = 0
+        while start < size and (wanted is None or count < wanted):
+            stop = size if wanted is None else min(size, start + window)
+            rows = np.flatnonzero(self._mask(start, stop, min_price, max_price, is_available)) + start
+            found.append(rows)
+            count += len(rows)
+            start = stop
+            window *= 2
+        rows = np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+        next_seq = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_seq = int(self._seqs[rows[-1]])
+        return self._ids[rows].tolist(), next_seq
+
+    def stats(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Dict[str, Any]]:
+        """Count, min, max, mean and percentiles of prices, overall and split by availability"""
+        alive = self._alive[:self._size]
+        available = self._available[:self._size]
+        prices = self._prices[:self._size]
+        groups = {
+            "all": alive,
+            "available": alive & available,
+            "unavailable": alive & ~available,
+        }
+        return {name: _summarize(prices[mask], percentiles) for name, mask in groups.items()}
+
+
+def _summarize(values: np.ndarray, percentiles: Sequence[float]) -> Dict[str, Any]:
+    if not values.size:
+        return {"count": 0, "min": None, "max": None, "mean": None,
+                "percentiles": {f"p{p:g}": None for p in percentiles}}
+    quantiles = np.percentile(values, percentiles)
+    return {
+        "count": int(values.size),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": float(values.mean()),
+        "percentiles": {f"p{p:g}": float(q) for p, q in zip(percentiles, quantiles)},
+    }
+
+
+def get_price_index(request: Request) -> PriceIndex:
+    """Dependency returning the price index attached to the application"""
+    return request.app.state.price_index
@@ -0,0 +1,347 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .item import ItemRepository
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+OP_CREATE = 1
+OP_UPDATE = 2
+OP_DELETE = 3
+OP_CLEAR = 4
+_OPS = {"create": OP_CREATE, "update": OP_UPDATE, "delete": OP_DELETE, "clear": OP_CLEAR}
+
+FSYNC_MODES = ("always", "batch", "never")
+
+# Log record: crc32 of everything after it, op, item id, payload length; then the payload
+RECORD_HEADER = struct.Struct("<IBQI")
+# Snapshot: magic, item count, next id; then per item: id, payload length, payload
+SNAPSHOT_MAGIC = b"ITEMSNP1"
+SNAPSHOT_HEADER = struct.Struct("<8sQQ")
+SNAPSHOT_RECORD = struct.Struct("<QI")
+
+
+def _encode(item: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(item)
+    return json.dumps(item, separators=(",", ":")).encode()
+
+
+def _decode(payload: Union[bytes, memoryview]) -> Dict[str, Any]:
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(bytes(payload))
+
+
+class ChangeLog:
+    """
+    Append-only binary log of item changes
+
+    Each record is written straight to the OS, so it survives a process
+    crash. How often it is forced to disk is set by `fsync`:
+        always: fsync after every record
+        batch: group commit - a background thread fsyncs once `fsync_batch`
+            records are pending, and at least every `fsync_interval` seconds;
+            writers never wait for the disk
+        never: leave it to the OS
+    """
+
+    def __init__(self, path: Path, fsync: str = "batch", fsync_batch: int = 64, fsync_interval: float = 0.05):
+        if fsync not in FSYNC_MODES:
+            raise ValueError(f"Unknown fsync mode: {fsync}")
+        self.path = path
+        self.fsync = fsync
+        self.fsync_batch = fsync_batch
+        self.records = 0
+        self.syncs = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "ab", buffering=0)
+        self._closed = threading.Event()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if fsync == "batch":
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, args=(fsync_interval,), name="change-log-fsync", daemon=True
+            )
+            self._flusher.start()
+
+    def append(self, op: int, item_id: int, payload: bytes = b"") -> None:
+        body = struct.pack("<BQI", op, item_id, len(payload))
+        crc = zlib.crc32(payload, zlib.crc32(body))
+        record = struct.pack("<I", crc) + body + payload
+        with self._lock:
+            self._file.write(record)
+            self.records += 1
+            if self.fsync == "always":
+                self._sync_locked()
+            elif self.fsync == "batch":
+                self._pending += 1
+                if self._pending >= self.fsync_batch:
+                    self._wake.set()
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self.syncs += 1
+
+    def _flush_periodically(self, interval: float) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            with self._lock:
+                pending, self._pending = self._pending, 0
+            # Outside the lock, so appends carry on while the disk catches up
+            if pending:
+                os.fsync(self._file.fileno())
+                self.syncs += 1
+
+    def close(self) -> None:
+        self._closed.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            if not self._file.closed:
+                self._sync_locked()
+                self._file.close()
+
+    @staticmethod
+    def read(path: Path, apply: Callable[[int, int, memoryview], None]) -> int:
+        """
+        Replay a log file, calling apply(op, item_id, payload) for each record
+
+        Stops at the first truncated or corrupt record (a torn write from a
+        crash) and returns the length of the valid prefix.
+        """
+        if not path.exists() or path.stat().st_size == 0:
+            return 0
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                size = len(mm)
+                offset = 0
+                while offset + RECORD_HEADER.size <= size:
+                    crc, op, item_id, length = RECORD_HEADER.unpack_from(mm, offset)
+                    start = offset + RECORD_HEADER.size
+                    end = start + length
+                    if end > size or zlib.crc32(view[start:end], zlib.crc32(view[offset + 4:start])) != crc:
+                        break
+                    apply(op, item_id, view[start:end])
+                    offset = end
+                return offset
+            finally:
+                view.release()
+
+
+def write_snapshot(path: Path, items: Iterable[Dict[str, Any]], count: int, next_id: int) -> None:
+    """Atomically write a compacted snapshot of the store"""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, count, next_id))
+        pack = SNAPSHOT_RECORD.pack
+        for item in items:
+            payload = _encode(item)
+            f.write(pack(item["id"], len(payload)))
+            f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(path.parent)
+
+
+def load_snapshot(path: Path, apply: Callable[[int, Dict[str, Any]], None]) -> int:
+    """Memory-map a snapshot, calling apply(item_id, item) for each item; returns the next free id"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, count, next_id = SNAPSHOT_HEADER.unpack_from(mm, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not an item snapshot")
+        view = memoryview(mm)
+        try:
+            unpack = SNAPSHOT_RECORD.unpack_from
+            offset = SNAPSHOT_HEADER.size
+            for _ in range(count):
+                item_id, length = unpack(mm, offset)
+                offset += SNAPSHOT_RECORD.size
+                apply(item_id, _decode(view[offset:offset + length]))
+                offset += length
+        finally:
+            view.release()
+    return next_id
+
+
+def _fsync_directory(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # pragma: no cover - e.g. Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class DurableItemRepository(ItemRepository):
+    """
+    ItemRepository persisted to disk
+
+    Every change is appended to a ChangeLog before listeners are notified.
+    Every `snapshot_every` log records the items are captured and the log
+    is rotated to a numbered segment (items.log.<n>); a background thread
+    then writes them to a compacted snapshot and deletes the segments it
+    covers, so writers don't wait for it. On startup the snapshot is
+    memory-mapped and loaded, then the remaining segments and the log are
+    replayed on top of it in order. Replay is idempotent, so a crash while
+    a snapshot is written or before its segments are deleted is harmless.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        fsync: str = "batch",
+        fsync_batch: int = 64,
+        fsync_interval: float = 0.05,
+        snapshot_every: int = 100000,
+    ):
+        super().__init__()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.directory / "items.snapshot"
+        self.log_path = self.directory / "items.log"
+        self.snapshot_every = snapshot_every
+        self.snapshot_error: Optional[BaseException] = None
+        self._log_options = (fsync, fsync_batch, fsync_interval)
+        self._snapshot_thread: Optional[threading.Thread] = None
+        # No log while recovering, so replayed changes aren't logged again
+        self._log: Optional[ChangeLog] = None
+        self.recovery_stats = self._recover()
+        self._log = ChangeLog(self.log_path, *self._log_options)
+
+    def _segments(self) -> List[Tuple[int, Path]]:
+        """Rotated log segments not yet covered by a snapshot, oldest first"""
+        segments = []
+        for path in self.directory.glob(f"{self.log_path.name}.*"):
+            suffix = path.suffix[1:]
+            if suffix.isdigit():
+                segments.append((int(suffix), path))
+        return sorted(segments)
+
+    def _recover(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        snapshot_items = 0
+        if self.snapshot_path.exists():
+            next_id = load_snapshot(self.snapshot_path, self._restore)
+            self._ids.observe(next_id - 1)
+            snapshot_items = len(self)
+
+        log_records = 0
+
+        def replay(op: int, item_id: int, payload: memoryview) -> None:
+            nonlocal log_records
+            log_records += 1
+            if op == OP_CREATE or op == OP_UPDATE:
+                self._restore(item_id, _decode(payload))
+            elif op == OP_DELETE:
+                self.delete(item_id)
+            elif op == OP_CLEAR:
+                self.clear()
+
+        for _, segment in self._segments():
+            ChangeLog.read(segment, replay)
+        valid_length = ChangeLog.read(self.log_path, replay)
+        if self.log_path.exists() and self.log_path.stat().st_size > valid_length:
+            # Drop a torn record left by a crash so new records follow valid ones
+            os.truncate(self.log_path, valid_length)
+
+        return {
+            "snapshot_items": snapshot_items,
+            "log_records": log_records,
+            "items": len(self),
+            "seconds": round(time.perf_counter() - start, 4),
+        }
+
+    def _restore(self, item_id: int, item: Dict[str, Any]) -> None:
+        if item_id in self:
+            self.update(item_id, item)
+        else:
+            self.add(item, item_id)
+
+    def _notify(self, op: str, item: Optional[Dict[str, Any]]) -> None:
+        if self._log is not None:
+            if op == "clear":
+                self._log.append(OP_CLEAR, 0)
+            elif op == "delete":
+                self._log.append(OP_DELETE, item["id"])
+            else:
+                self._log.append(_OPS[op], item["id"], _encode(item))
+        super()._notify(op, item)
+        if self._log is not None and self._log.records >= self.snapshot_every and not self.snapshotting:
+            self.snapshot(wait=False)
+
+    @property
+    def snapshotting(self) -> bool:
+        return self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+
+    def snapshot(self, wait: bool = True) -> None:
+        """
+        Snapshot the store and drop the log records the snapshot covers
+
+        Only capturing the items and rotating the log happen in the caller;
+        the snapshot is written in a background thread, which `wait` waits
+        for (re-raising its error, if any).
+        """
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        # Copies: updates change the stored dicts in place while the thread encodes them
+        items = [dict(item) for item in self]
+        next_id = self._ids.peek
+        segments = self._segments()
+        sequence = segments[-1][0] + 1 if segments else 1
+        # The open log keeps writing to the renamed file until it is closed
+        segment = self.log_path.with_name(f"{self.log_path.name}.{sequence}")
+        os.replace(self.log_path, segment)
+        previous_log, self._log = self._log, ChangeLog(self.log_path, *self._log_options)
+        self._snapshot_thread = threading.Thread(
+            target=self._write_snapshot, args=(previous_log, items, next_id, sequence),
+            name="item-snapshot", daemon=True,
+        )
+        self._snapshot_thread.start()
+        if wait:
+            self._snapshot_thread.join()
+            if self.snapshot_error is not None:
+                raise self.snapshot_error
+
+    def _write_snapshot(self, previous_log: ChangeLog, items: List[Dict[str, Any]], next_id: int,
+                        sequence: int) -> None:
+        try:
+            previous_log.close()
+            write_snapshot(self.snapshot_path, items, len(items), next_id)
+            # Segments up to this one are covered now, including any left by a failed snapshot
+            for number, segment in self._segments():
+                if number <= sequence:
+                    segment.unlink()
+            _fsync_directory(self.directory)
+            self.snapshot_error = None
+        except Exception as e:
+            # The segments stay and are replayed on recovery, or covered by the next snapshot
+            self.snapshot_error = e
+
+    def close(self) -> None:
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        if self._log is not None:
+            self._log.close()
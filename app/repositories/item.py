@@ -0,0 +1,241 @@
+import os
+import time
+from bisect import bisect_right
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from fastapi import Request
+
+# Compact the insertion log once it holds at least this many tombstones
+# and they make up more than half of it
+COMPACT_MIN_TOMBSTONES = 1024
+
+# Called with the operation ("create", "update", "delete" or "clear") and the
+# affected item (None for "clear") after every change to the repository
+ChangeListener = Callable[[str, Optional[Dict[str, Any]]], None]
+
+
+class IdAllocator:
+    """Monotonic id allocator for items"""
+
+    def __init__(self, start: int = 1):
+        self._next = start
+
+    def allocate(self) -> int:
+        item_id = self._next
+        self._next += 1
+        return item_id
+
+    def observe(self, item_id: int) -> None:
+        """Make sure ids handed out later never collide with an existing id"""
+        if item_id >= self._next:
+            self._next = item_id + 1
+
+    @property
+    def peek(self) -> int:
+        return self._next
+
+
+class ItemRepository:
+    """
+    In-memory item store with O(1) lookup and delete by id.
+
+    Items are kept in a dict keyed by id; dicts preserve insertion order,
+    so listing returns items in the order they were created.
+
+    Alongside the dict an insertion log of (sequence number, id) pairs
+    supports cursor pagination: sequence numbers only grow, so a cursor can
+    be resumed with a binary search even after deletes and compaction.
+
+    Every change bumps a store-wide generation counter and the version of
+    the affected item, which lets callers build cheap validators (ETags)
+    without looking at item contents. `epoch` is random per store instance
+    so validators from before a restart never match.
+    """
+
+    def __init__(self, id_allocator: Optional[IdAllocator] = None):
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._ids = id_allocator or IdAllocator()
+        self._log_seqs: List[int] = []
+        self._log_ids: List[Optional[int]] = []
+        self._log_pos: Dict[int, int] = {}
+        self._tombstones = 0
+        self._next_seq = 1
+        self._listeners: List[ChangeListener] = []
+        # id -> (version, modification time)
+        self._versions: Dict[int, Tuple[int, float]] = {}
+        self.epoch = os.urandom(4).hex()
+        self.generation = 0
+        self.last_modified = time.time()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._items
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._items.values())
+
+    def subscribe(self, listener: ChangeListener) -> None:
+        """
+        Register a callback invoked after every change
+
+        Items already in the store are replayed to the listener as "create"
+        events, so indexes subscribed after a store was loaded start in sync.
+        """
+        self._listeners.append(listener)
+        for item in self._items.values():
+            listener("create", item)
+
+    def seq_of(self, item_id: int) -> Optional[int]:
+        """Return the insertion sequence number of an item, or None if it does not exist"""
+        position = self._log_pos.get(item_id)
+        return None if position is None else self._log_seqs[position]
+
+    def version(self, item_id: int) -> Optional[Tuple[int, float]]:
+        """Return the (version, modification time) of an item, or None if it does not exist"""
+        return self._versions.get(item_id)
+
+    def refresh(self) -> None:
+        """Bring the store up to date with changes made elsewhere (no-op for in-memory stores)"""
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Call `func(*args)`, which writes to this store, from a request handler
+
+        Called inline here; stores whose writes wait on I/O run it in the
+        thread pool instead.
+        """
+        return func(*args)
+
+    def _record_change(self, op: str, item: Optional[Dict[str, Any]]) -> None:
+        """Bump the generation counter and the version of the changed item"""
+        self.generation += 1
+        self.last_modified = now = time.time()
+        if op == "delete":
+            self._versions.pop(item["id"], None)
+        elif op == "clear":
+            self._versions.clear()
+        else:
+            version = self._versions.get(item["id"], (0, now))[0]
+            self._versions[item["id"]] = (version + 1, now)
+
+    def _notify(self, op: str, item: Optional[Dict[str, Any]]) -> None:
+        self._record_change(op, item)
+        for listener in self._listeners:
+            listener(op, item)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Return all items in insertion order"""
+        return list(self._items.values())
+
+    def get(self, item_id: int) -> Optional[Dict[str, Any]]:
+        return self._items.get(item_id)
+
+    def add(self, data: Dict[str, Any], item_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Store a new item
+
+        The item gets the next free id unless `item_id` is given, in which
+        case that id must not be in use (ValueError otherwise).
+        """
+        if item_id is None:
+            item_id = self._ids.allocate()
+        elif item_id in self._items:
+            raise ValueError(f"Item {item_id} already exists")
+        else:
+            self._ids.observe(item_id)
+        item = {"id": item_id, **data}
+        self._insert(item)
+        return item
+
+    def _insert(self, item: Dict[str, Any], seq: Optional[int] = None) -> None:
+        self._items[item["id"]] = item
+        self._append_log(item["id"], seq)
+        self._notify("create", item)
+
+    def add_many(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Store several new items in one step"""
+        return [self.add(data) for data in items]
+
+    def update(self, item_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update an item in place, returning None if it does not exist"""
+        item = self._items.get(item_id)
+        if item is None:
+            return None
+        item.update(data)
+        self._notify("update", item)
+        return item
+
+    def update_many(self, updates: List[Tuple[int, Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+        """Apply several updates in one step; missing items yield None"""
+        return [self.update(item_id, data) for item_id, data in updates]
+
+    def delete(self, item_id: int) -> Optional[Dict[str, Any]]:
+        """Remove an item, returning it or None if it does not exist"""
+        item = self._items.pop(item_id, None)
+        if item is not None:
+            self._log_ids[self._log_pos.pop(item_id)] = None
+            self._tombstones += 1
+            if self._tombstones >= COMPACT_MIN_TOMBSTONES and self._tombstones * 2 > len(self._log_ids):
+                self._compact_log()
+            self._notify("delete", item)
+        return item
+
+    def delete_many(self, item_ids: List[int]) -> List[Optional[Dict[str, Any]]]:
+        """Remove several items in one step; missing items yield None"""
+        return [self.delete(item_id) for item_id in item_ids]
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._log_seqs.clear()
+        self._log_ids.clear()
+        self._log_pos.clear()
+        self._tombstones = 0
+        self._notify("clear", None)
+
+    def close(self) -> None:
+        """Release any resources held by the store"""
+
+    def page(self, after: Optional[int] = None, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Return up to `limit` items inserted after sequence number `after`.
+
+        Returns the items and the sequence number to resume from, or None
+        when there are no further items.
+        """
+        index = 0 if after is None else bisect_right(self._log_seqs, after)
+        log_ids = self._log_ids
+        end = len(log_ids)
+        page: List[Dict[str, Any]] = []
+        last_seq = None
+        while index < end:
+            item_id = log_ids[index]
+            if item_id is not None:
+                if limit is not None and len(page) >= limit:
+                    return page, last_seq
+                page.append(self._items[item_id])
+                last_seq = self._log_seqs[index]
+            index += 1
+        return page, None
+
+    def _append_log(self, item_id: int, seq: Optional[int] = None) -> None:
+        if seq is None:
+            seq = self._next_seq
+        self._log_pos[item_id] = len(self._log_ids)
+        self._log_seqs.append(seq)
+        self._log_ids.append(item_id)
+        self._next_seq = max(self._next_seq, seq + 1)
+
+    def _compact_log(self) -> None:
+        live = [(seq, item_id) for seq, item_id in zip(self._log_seqs, self._log_ids) if item_id is not None]
+        self._log_seqs = [seq for seq, _ in live]
+        self._log_ids = [item_id for _, item_id in live]
+        self._log_pos = {item_id: index for index, item_id in enumerate(self._log_ids)}
+        self._tombstones = 0
+
+
+def get_item_repository(request: Request) -> ItemRepository:
+    """Dependency returning the item repository attached to the application, brought up to date"""
+    repository = request.app.state.item_repository
+    repository.refresh()
+    return repository
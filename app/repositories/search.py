@@ -0,0 +1,186 @@
+import heapq
+import re
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from fastapi import Request
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Matches on the name count for more than matches in the description
+FIELD_WEIGHTS = {"name": 2.0, "description": 1.0}
+# A query term also matches longer tokens it is a prefix of, at a discount
+PREFIX_WEIGHT = 0.5
+MIN_PREFIX_LENGTH = 2
+# Tokens per chunk of the sorted vocabulary; chunks split at twice this size
+VOCABULARY_CHUNK_SIZE = 512
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class SortedTokens:
+    """
+    Sorted set of tokens kept as a list of sorted chunks
+
+    Adding or removing a token is a binary search over the chunks' last
+    tokens plus an insert or delete within one chunk, so its cost doesn't
+    grow with the vocabulary the way inserting into a single list does.
+    """
+
+    def __init__(self):
+        self._chunks: List[List[str]] = []
+        # Last token of each chunk
+        self._maxes: List[str] = []
+
+    def __len__(self) -> int:
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def __contains__(self, token: str) -> bool:
+        i = bisect_left(self._maxes, token)
+        if i == len(self._chunks):
+            return False
+        chunk = self._chunks[i]
+        j = bisect_left(chunk, token)
+        return j < len(chunk) and chunk[j] == token
+
+    def add(self, token: str) -> None:
+        """Add a token that isn't in the set yet"""
+        if not self._chunks:
+            self._chunks.append([token])
+            self._maxes.append(token)
+            return
+        i = min(bisect_left(self._maxes, token), len(self._chunks) - 1)
+        chunk = self._chunks[i]
+        insort(chunk, token)
+        self._maxes[i] = chunk[-1]
+        if len(chunk) > 2 * VOCABULARY_CHUNK_SIZE:
+            half = chunk[VOCABULARY_CHUNK_SIZE:]
+            del chunk[VOCABULARY_CHUNK_SIZE:]
+            self._chunks.insert(i + 1, half)
+            self._maxes[i] = chunk[-1]
+            self._maxes.insert(i + 1, half[-1])
+
+    def discard(self, token: str) -> None:
+        i = bisect_left(self._maxes, token)
+        if i == len(self._chunks):
+            return
+        chunk = self._chunks[i]
+        j = bisect_left(chunk, token)
+        if j == len(chunk) or chunk[j] != token:
+            return
+        del chunk[j]
+        if chunk:
+            self._maxes[i] = chunk[-1]
+        else:
+            del self._chunks[i]
+            del self._maxes[i]
+
+    def clear(self) -> None:
+        self._chunks.clear()
+        self._maxes.clear()
+
+    def iter_from(self, token: str) -> Iterator[str]:
+        """Yield the tokens from `token` onwards, in order"""
+        i = bisect_left(self._maxes, token)
+        if i == len(self._chunks):
+            return
+        chunk = self._chunks[i]
+        yield from chunk[bisect_left(chunk, token):]
+        for i in range(i + 1, len(self._chunks)):
+            yield from self._chunks[i]
+
+
+class TextIndex:
+    """
+    Inverted index over item names and descriptions
+
+    Maps each token to the items containing it with a per-item weight, and
+    keeps the vocabulary sorted (see SortedTokens) so prefix matches are a
+    binary search. Queries only touch the postings of their terms, and
+    writes only the tokens of their item, so neither gets slower as the
+    catalog grows.
+
+    Register `apply` as a repository change listener to keep it up to date.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._vocabulary = SortedTokens()
+        self._item_tokens: Dict[int, Dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._item_tokens)
+
+    def apply(self, op: str, item: Optional[Dict[str, Any]]) -> None:
+        """Repository change listener"""
+        if op == "create" or op == "update":
+            self.index(item["id"], item["name"], item.get("description"))
+        elif op == "delete":
+            self.remove(item["id"])
+        elif op == "clear":
+            self.clear()
+
+    def index(self, item_id: int, name: str, description: Optional[str] = None) -> None:
+        """Index (or re-index) an item"""
+        self.remove(item_id)
+        weights: Dict[str, float] = {}
+        for field, text in (("name", name), ("description", description)):
+            for token in tokenize(text):
+                weights[token] = weights.get(token, 0.0) + FIELD_WEIGHTS[field]
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._vocabulary.add(token)
+            postings[item_id] = weight
+        self._item_tokens[item_id] = weights
+
+    def remove(self, item_id: int) -> None:
+        for token in self._item_tokens.pop(item_id, ()):
+            postings = self._postings[token]
+            del postings[item_id]
+            if not postings:
+                del self._postings[token]
+                self._vocabulary.discard(token)
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._vocabulary.clear()
+        self._item_tokens.clear()
+
+    def _term_scores(self, term: str) -> Dict[int, float]:
+        """Scores of the items matching a single query term, exactly or by prefix"""
+        scores = dict(self._postings.get(term, {}))
+        if len(term) < MIN_PREFIX_LENGTH:
+            return scores
+        for token in self._vocabulary.iter_from(term):
+            if not token.startswith(term):
+                break
+            if token == term:
+                continue
+            for item_id, weight in self._postings[token].items():
+                scores[item_id] = scores.get(item_id, 0.0) + weight * PREFIX_WEIGHT
+        return scores
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, float]]:
+        """
+        Return up to `limit` (item id, score) pairs matching every query term
+
+        Higher scores rank first; ties go to the older item.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        per_term = sorted((self._term_scores(term) for term in terms), key=len)
+        totals = per_term[0]
+        for scores in per_term[1:]:
+            totals = {item_id: total + scores[item_id] for item_id, total in totals.items() if item_id in scores}
+            if not totals:
+                return []
+        return heapq.nlargest(limit, totals.items(), key=lambda match: (match[1], -match[0]))
+
+
+def get_text_index(request: Request) -> TextIndex:
+    """Dependency returning the text index attached to the application"""
+    return request.app.state.text_index
@@ -0,0 +1,400 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from anyio import from_thread
+from starlette.concurrency import run_in_threadpool
+
+from .item import ItemRepository
+
+# Changes kept in the change feed; a worker further behind reloads everything
+CHANGE_RETENTION = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    price REAL NOT NULL,
+    is_available INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    modified REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_seq ON items (seq);
+CREATE TABLE IF NOT EXISTS changes (
+    generation INTEGER PRIMARY KEY,
+    op TEXT NOT NULL,
+    item_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+_COLUMNS = "id, seq, name, description, price, is_available, version, modified"
+
+# Changes read from the feed but not yet applied to the mirror: either
+# (generation, [(generation, op, item_id, row or None), ...]) or a full
+# reload, (generation, None, rows)
+Fetched = Tuple[int, Optional[List[Tuple[int, str, Optional[int], Optional[Tuple]]]], Optional[List[Tuple]]]
+
+
+def connect(path: Path, busy_timeout_ms: int = 5000) -> sqlite3.Connection:
+    """Open a connection in WAL mode, usable from any thread"""
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout = {busy_timeout_ms}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+class ConnectionPool:
+    """
+    Small pool of SQLite connections in WAL mode
+
+    Shared by the thread pool threads running writes, which also read the
+    change feed after each write, so several requests can use the database
+    at once; writers then queue on SQLite's own lock, not on the pool.
+    """
+
+    def __init__(self, path: Path, size: int = 4, busy_timeout_ms: int = 5000):
+        self._connections: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        for _ in range(size):
+            self._connections.put(connect(path, busy_timeout_ms))
+        self.size = size
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """A write transaction; BEGIN IMMEDIATE serializes writers across processes"""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        for _ in range(self.size):
+            self._connections.get().close()
+
+
+class SQLiteItemRepository(ItemRepository):
+    """
+    ItemRepository shared by every worker process on a host through SQLite
+
+    The database (in WAL mode, so readers never block the writer) is the
+    source of truth. Each process keeps the in-memory store of the base
+    class as a mirror, so reads stay dict lookups, and follows a change feed
+    table: every write commits the row change, a feed entry and the new
+    store generation in one transaction. Feed entries the process hasn't
+    seen yet are read by the writing thread after each of its writes, and
+    by a follower thread every `poll_interval` seconds once
+    `PRAGMA data_version` shows that another process committed; both only
+    queue them. The mirror, and with it every listener (indexes, response
+    cache), is only changed by `refresh`, which applies the queued changes
+    in generation order without touching the database. Generations, item
+    versions and the epoch come from the database, so ETags and cursors are
+    the same whichever worker serves a request.
+
+    Writes wait for the database lock, so request handlers call them
+    through `run`, which runs them in the thread pool; their own changes
+    are applied back on the event loop before they return. Called directly,
+    writes and `poll` apply the changes in the calling thread.
+    """
+
+    def __init__(self, path: Union[str, Path], pool_size: int = 4, poll_interval: float = 0.005):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = ConnectionPool(self.path, pool_size)
+        with self._pool.transaction() as conn:
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (os.urandom(4).hex(),))
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)")
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('next_seq', 1)")
+        with self._pool.connection() as conn:
+            self.epoch = conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+        # (generation, version, modified) of the change being applied to the mirror
+        self._applying: Optional[Tuple[int, int, float]] = None
+        # Changes read from the feed, and the generation read up to
+        self._fetched: List[Fetched] = []
+        self._fetched_generation = 0
+        self._fetch_lock = threading.Lock()
+        # Set in the thread pool threads running `run`, whose changes are applied on the event loop
+        self._off_loop = threading.local()
+        with self._pool.connection() as conn:
+            self._queue(self._read_feed(conn, 0))
+        self._apply_fetched()
+
+        self._closed = threading.Event()
+        self._follower: Optional[threading.Thread] = None
+        if poll_interval > 0:
+            self._follower = threading.Thread(
+                target=self._follow, args=(connect(self.path), poll_interval), name="sqlite-change-feed", daemon=True
+            )
+            self._follower.start()
+
+    # Mirror maintenance
+
+    def _record_change(self, op: str, item: Optional[Dict[str, Any]]) -> None:
+        generation, version, modified = self._applying
+        self.generation = generation
+        self.last_modified = modified
+        if op == "delete":
+            self._versions.pop(item["id"], None)
+        elif op == "clear":
+            self._versions.clear()
+        else:
+            self._versions[item["id"]] = (version, modified)
+
+    @staticmethod
+    def _row_to_item(row: Tuple) -> Dict[str, Any]:
+        item_id, _, name, description, price, is_available, _, _ = row
+        return {"id": item_id, "name": name, "description": description,
+                "price": price, "is_available": bool(is_available)}
+
+    def _created(self, item_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        # A change applied along with this one may already have deleted the item again
+        item = self._items.get(item_id)
+        if item is None:
+            item = {"id": item_id, "name": data["name"], "description": data.get("description"),
+                    "price": data["price"], "is_available": bool(data.get("is_available", True))}
+        return item
+
+    def _apply_row(self, generation: int, row: Tuple) -> None:
+        item_id, seq, version, modified = row[0], row[1], row[6], row[7]
+        self._applying = (generation, version, modified)
+        data = self._row_to_item(row)
+        if item_id in self._items:
+            ItemRepository.update(self, item_id, data)
+        else:
+            self._insert(data, seq)
+
+    @staticmethod
+    def _read_feed(conn: sqlite3.Connection, after: int) -> Optional[Fetched]:
+        """Read the changes committed after generation `after`, or every item when they are no longer in the feed"""
+        conn.execute("BEGIN")
+        try:
+            generation = int(conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0])
+            if generation == after:
+                return None
+            changes = conn.execute(
+                "SELECT generation, op, item_id FROM changes WHERE generation > ? ORDER BY generation", (after,)
+            ).fetchall()
+            if not after or not changes or changes[0][0] != after + 1:
+                # A new mirror, or one that fell behind the retained feed
+                return generation, None, conn.execute(f"SELECT {_COLUMNS} FROM items ORDER BY seq").fetchall()
+            ids = list({item_id for _, op, item_id in changes if op != "delete"})
+            rows = {}
+            for chunk_start in range(0, len(ids), 500):
+                chunk = ids[chunk_start:chunk_start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in conn.execute(f"SELECT {_COLUMNS} FROM items WHERE id IN ({placeholders})", chunk):
+                    rows[row[0]] = row
+        finally:
+            conn.execute("COMMIT")
+        return generation, [(g, op, item_id, rows.get(item_id)) for g, op, item_id in changes], None
+
+    def _queue(self, fetched: Optional[Fetched]) -> None:
+        # Several threads may read the same changes; only the first to queue them keeps them
+        if fetched is None:
+            return
+        generation, changes, rows = fetched
+        with self._fetch_lock:
+            if generation <= self._fetched_generation:
+                return
+            if changes is not None:
+                changes = [change for change in changes if change[0] > self._fetched_generation]
+            self._fetched.append((generation, changes, rows))
+            self._fetched_generation = generation
+
+    def _fetch(self) -> None:
+        with self._pool.connection() as conn:
+            self._queue(self._read_feed(conn, self._fetched_generation))
+
+    def _follow(self, conn: sqlite3.Connection, interval: float) -> None:
+        """Queue the changes other processes commit, polling PRAGMA data_version"""
+        data_version = None
+        try:
+            while not self._closed.wait(interval):
+                current = conn.execute("PRAGMA data_version").fetchone()[0]
+                if current != data_version:
+                    data_version = current
+                    self._queue(self._read_feed(conn, self._fetched_generation))
+        finally:
+            conn.close()
+
+    def _apply_fetched(self) -> None:
+        with self._fetch_lock:
+            fetched, self._fetched = self._fetched, []
+        for generation, changes, rows in fetched:
+            if generation <= self.generation:
+                continue
+            if changes is None:
+                self._reload(generation, rows)
+                continue
+            for change_generation, op, item_id, row in changes:
+                if change_generation <= self.generation:
+                    continue
+                if op == "delete":
+                    if item_id in self._items:
+                        self._applying = (change_generation, 0, time.time())
+                        ItemRepository.delete(self, item_id)
+                elif op == "clear":
+                    self._applying = (change_generation, 0, time.time())
+                    ItemRepository.clear(self)
+                elif row is not None:
+                    self._apply_row(change_generation, row)
+            self.generation = generation
+
+    def _reload(self, generation: int, rows: List[Tuple]) -> None:
+        """Rebuild the mirror from the items table"""
+        if self._items:
+            self._applying = (generation, 0, time.time())
+            ItemRepository.clear(self)
+        for row in rows:
+            self._apply_row(generation, row)
+        self.generation = generation
+
+    def refresh(self) -> None:
+        """Apply the changes queued by the follower and by writes; doesn't touch the database"""
+        if self._fetched:
+            self._apply_fetched()
+
+    def poll(self) -> None:
+        """Read the change feed now and apply what other processes committed"""
+        self._fetch()
+        self._apply_fetched()
+
+    def _catch_up(self, result: Callable[[], Any] = lambda: None) -> Any:
+        """Queue the changes of a write just committed, then apply them and call `result` where the mirror is changed"""
+        self._fetch()
+        if getattr(self._off_loop, "active", False):
+            return from_thread.run_sync(self._apply_then, result)
+        return self._apply_then(result)
+
+    def _apply_then(self, result: Callable[[], Any]) -> Any:
+        self._apply_fetched()
+        return result()
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Call `func(*args)` in the thread pool, so waiting for the database doesn't block the event loop"""
+        return await run_in_threadpool(self._run_off_loop, func, args)
+
+    def _run_off_loop(self, func: Callable[..., Any], args: Tuple) -> Any:
+        self._off_loop.active = True
+        try:
+            return func(*args)
+        finally:
+            self._off_loop.active = False
+
+    # Writes: commit to the database, then catch the mirror up
+
+    def _next_generation(self, conn: sqlite3.Connection, op: str, item_id: Optional[int]) -> int:
+        generation = int(conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]) + 1
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'generation'", (generation,))
+        conn.execute("INSERT INTO changes (generation, op, item_id) VALUES (?, ?, ?)", (generation, op, item_id))
+        if generation % 1000 == 0:
+            conn.execute("DELETE FROM changes WHERE generation <= ?", (generation - CHANGE_RETENTION,))
+        return generation
+
+    def _insert_row(self, conn: sqlite3.Connection, data: Dict[str, Any], item_id: Optional[int]) -> int:
+        seq = int(conn.execute("SELECT value FROM meta WHERE key = 'next_seq'").fetchone()[0])
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'next_seq'", (seq + 1,))
+        if item_id is not None and conn.execute("SELECT 1 FROM items WHERE id = ?", (item_id,)).fetchone():
+            raise ValueError(f"Item {item_id} already exists")
+        cursor = conn.execute(
+            "INSERT INTO items (id, seq, name, description, price, is_available, version, modified) "
+            "VALUES (?, ?, ?, ?, ?, ?, 1, ?)",
+            (item_id, seq, data["name"], data.get("description"), data["price"],
+             int(data.get("is_available", True)), time.time()),
+        )
+        item_id = cursor.lastrowid if item_id is None else item_id
+        self._next_generation(conn, "create", item_id)
+        return item_id
+
+    def _update_row(self, conn: sqlite3.Connection, item_id: int, data: Dict[str, Any]) -> bool:
+        assignments = [(column, data[column]) for column in ("name", "description", "price", "is_available") if column in data]
+        if "is_available" in data:
+            assignments = [(column, int(value) if column == "is_available" else value) for column, value in assignments]
+        sets = "".join(f"{column} = ?, " for column, _ in assignments)
+        cursor = conn.execute(
+            f"UPDATE items SET {sets}version = version + 1, modified = ? WHERE id = ?",
+            [value for _, value in assignments] + [time.time(), item_id],
+        )
+        if not cursor.rowcount:
+            return False
+        self._next_generation(conn, "update", item_id)
+        return True
+
+    def _delete_row(self, conn: sqlite3.Connection, item_id: int) -> Optional[Dict[str, Any]]:
+        row = conn.execute(f"SELECT {_COLUMNS} FROM items WHERE id = ?", (item_id,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("DELETE FROM items WHERE id = ?", (item_id,))
+        self._next_generation(conn, "delete", item_id)
+        return self._row_to_item(row)
+
+    def add(self, data: Dict[str, Any], item_id: Optional[int] = None) -> Dict[str, Any]:
+        with self._pool.transaction() as conn:
+            item_id = self._insert_row(conn, data, item_id)
+        return self._catch_up(lambda: self._created(item_id, data))
+
+    def add_many(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._pool.transaction() as conn:
+            item_ids = [self._insert_row(conn, data, None) for data in items]
+        return self._catch_up(lambda: [self._created(item_id, data) for item_id, data in zip(item_ids, items)])
+
+    def update(self, item_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._pool.transaction() as conn:
+            updated = self._update_row(conn, item_id, data)
+        return self._catch_up(lambda: self._items.get(item_id) if updated else None)
+
+    def update_many(self, updates: List[Tuple[int, Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+        with self._pool.transaction() as conn:
+            updated = [self._update_row(conn, item_id, data) for item_id, data in updates]
+        return self._catch_up(lambda: [self._items.get(item_id) if ok else None
+                                       for (item_id, _), ok in zip(updates, updated)])
+
+    def delete(self, item_id: int) -> Optional[Dict[str, Any]]:
+        with self._pool.transaction() as conn:
+            item = self._delete_row(conn, item_id)
+        self._catch_up()
+        return item
+
+    def delete_many(self, item_ids: List[int]) -> List[Optional[Dict[str, Any]]]:
+        with self._pool.transaction() as conn:
+            items = [self._delete_row(conn, item_id) for item_id in item_ids]
+        self._catch_up()
+        return items
+
+    def clear(self) -> None:
+        with self._pool.transaction() as conn:
+            conn.execute("DELETE FROM items")
+            self._next_generation(conn, "clear", None)
+        self._catch_up()
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._follower is not None:
+            self._follower.join()
+        self._pool.close()
@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from ..core.logging import get_log_handler_names, get_log_overrides, get_logger, get_logging_state
+from ..core.security import require_admin
+from ..models.admin import LoggingChange
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+logger = get_logger("fastapi_app.routers.admin")
+
+# Loggers always listed by GET /admin/logging, besides the overridden ones
+KNOWN_LOGGERS = [
+    "root",
+    "fastapi_app",
+    "fastapi_app.main",
+    "fastapi_app.middleware",
+    "fastapi_app.routers.items",
+    "uvicorn.access",
+    "uvicorn.error",
+]
+
+
+def _state() -> dict:
+    overrides = get_log_overrides().active()
+    names = KNOWN_LOGGERS + [o["name"] for o in overrides if o["kind"] == "logger" and o["name"] not in KNOWN_LOGGERS]
+    return get_logging_state(names)
+
+
+@router.get("/admin/startup")
+async def get_startup_timings(request: Request):
+    """Duration of each application startup phase, in milliseconds"""
+    return request.app.state.startup_timings
+
+
+@router.get("/admin/logging")
+async def get_logging():
+    """Current logger and handler levels, sampling configuration and active overrides"""
+    return _state()
+
+
+@router.put("/admin/logging")
+async def change_logging(change: LoggingChange, request: Request):
+    """
+    Change logger levels, handler levels and sampling for `ttl_seconds`
+
+    Everything reverts automatically when the TTL expires. Changes only
+    apply to the worker process handling the request.
+    """
+    request_id = getattr(request.state, 'request_id', 'unknown')
+    overrides = get_log_overrides()
+    unknown = set(change.handlers) - set(get_log_handler_names())
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown log handlers: {sorted(unknown)}")
+
+    for name, level in change.loggers.items():
+        overrides.set_logger_level(name, level, change.ttl_seconds)
+    for name, level in change.handlers.items():
+        overrides.set_handler_level(name, level, change.ttl_seconds)
+    if change.sampling is not None:
+        sampling = change.sampling
+        overrides.set_sampling(sampling.rates, sampling.default_rate, sampling.slow_request_ms, change.ttl_seconds)
+
+    logger.warning(lambda: f"Logging changed for {change.ttl_seconds}s",
+                   extra=lambda: {"request_id": request_id, "changes": change.model_dump(exclude_none=True)})
+    return _state()
+
+
+@router.delete("/admin/logging")
+async def revert_logging(request: Request):
+    """Revert every runtime logging change now"""
+    request_id = getattr(request.state, 'request_id', 'unknown')
+    get_log_overrides().revert()
+    logger.warning("Logging changes reverted", extra={"request_id": request_id})
+    return _state()
@@ -1,94 +1,715 @@
-from fastapi import APIRouter, HTTPException, Request
-from typing import List
-from ..models.item import ItemCreate, ItemUpdate, ItemResponse
+import base64
+import json
+import sys
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Literal, Optional, Tuple
+from ..models.item import (
+    BulkItemResult,
+    BulkResponse,
+    ImportLineError,
+    ImportResponse,
+    ItemBulkUpdate,
+    ItemCreate,
+    ItemImport,
+    ItemResponse,
+    ItemUpdate,
+)
+from ..repositories import (
+    ChangeListener,
+    ItemRepository,
+    PriceIndex,
+    TextIndex,
+    get_item_repository,
+    get_price_index,
+    get_text_index,
+)
+from ..core.content import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    ContentNegotiationRoute,
+    encode,
+    msgpack_available,
+    render,
+    response_media_type,
+)
+from ..core.conditional import etag_matches, http_date, representation_etag
 from ..core.logging import get_logger
+from ..core.tracing import span
 
-router = APIRouter()
+if TYPE_CHECKING:
+    # Only built, and imported, by create_app when enabled
+    from ..core.cache import CacheEntry, ResponseCache
+    from ..core.compression import ResponseCompressor
+
+router = APIRouter(route_class=ContentNegotiationRoute)
 logger = get_logger("fastapi_app.routers.items")
 
-# In-memory storage (for demo purposes)
-items_db = []
-next_id = 1
+# Number of items encoded per chunk when streaming the item list
+STREAM_CHUNK_SIZE = 500
+MAX_PAGE_SIZE = 1000
+MAX_BULK_SIZE = 10000
+DEFAULT_SEARCH_LIMIT = 20
+
+# NDJSON import: lines validated and stored per chunk, longest accepted line,
+# and most line errors listed in the response
+IMPORT_CHUNK_SIZE = 1000
+MAX_IMPORT_LINE_BYTES = 1024 * 1024
+MAX_IMPORT_ERRORS = 1000
+
+# Cache tag shared by every list response; each item response is tagged item:<id>
+LIST_TAG = "items:list"
+
+# ETag suffixes of the MessagePack and compressed representations
+ETAG_SUFFIXES = frozenset({"msgpack", "zstd", "br", "gzip"})
+
+_item_list_adapter = TypeAdapter(List[ItemResponse])
+_item_response_adapter = TypeAdapter(ItemResponse)
+_item_create_adapter = TypeAdapter(ItemCreate)
+_item_bulk_update_adapter = TypeAdapter(ItemBulkUpdate)
+_item_import_adapter = TypeAdapter(ItemImport)
+_item_import_list_adapter = TypeAdapter(List[ItemImport])
+
+
+# Cursor kinds: positions in the repository's insertion log, or in the price
+# index for filtered listings
+CURSOR_REPOSITORY = "v1"
+CURSOR_PRICE_INDEX = "f1"
+
+# page(after, limit) -> (items, resume point or None)
+PageFunc = Callable[[Optional[int], Optional[int]], Tuple[List[Dict[str, Any]], Optional[int]]]
+
+
+def encode_cursor(seq: int, kind: str = CURSOR_REPOSITORY) -> str:
+    """Encode a sequence number as an opaque cursor"""
+    return base64.urlsafe_b64encode(f"{kind}:{seq}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: str = CURSOR_REPOSITORY) -> int:
+    """Decode a cursor produced by encode_cursor, raising 400 if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        version, seq = raw.split(":", 1)
+        if version != kind:
+            raise ValueError(version)
+        return int(seq)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def filtered_page(repository: ItemRepository, index: PriceIndex, **filters: Any) -> PageFunc:
+    """Build a page function listing the items matching price/availability filters"""
+    def page(after: Optional[int], limit: Optional[int]) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        item_ids, next_seq = index.page(after, limit, **filters)
+        return [repository.get(item_id) for item_id in item_ids], next_seq
+    return page
+
+
+def get_response_cache(request: Request) -> Optional["ResponseCache"]:
+    """Dependency returning the application's response cache, or None when caching is disabled"""
+    return request.app.state.response_cache
+
+
+def get_compressor(request: Request) -> Optional["ResponseCompressor"]:
+    """Dependency returning the application's response compressor, or None when compression is disabled"""
+    return request.app.state.compressor
+
+
+def item_tag(item_id: int) -> str:
+    return f"item:{item_id}"
+
+
+def invalidate_cached_items(cache: "ResponseCache") -> ChangeListener:
+    """Build a repository listener dropping the cached responses a change affects"""
+    def listener(op: str, item: Optional[Dict[str, Any]]) -> None:
+        if op == "clear":
+            cache.clear()
+            return
+        cache.invalidate(LIST_TAG)
+        if op != "create":
+            cache.invalidate(item_tag(item["id"]))
+    return listener
+
+
+def item_validators(repository: ItemRepository, item_id: int) -> Dict[str, str]:
+    """ETag and Last-Modified headers of an item, or an empty dict if it does not exist"""
+    version = repository.version(item_id)
+    if version is None:
+        return {}
+    return {"ETag": f'"{repository.epoch}-{item_id}-{version[0]}"', "Last-Modified": http_date(version[1])}
+
+
+def list_validators(repository: ItemRepository) -> Dict[str, str]:
+    """ETag and Last-Modified headers of list responses, derived from the store generation"""
+    return {"ETag": f'"{repository.epoch}-g{repository.generation}"', "Last-Modified": http_date(repository.last_modified)}
+
+
+def _for_media_type(validators: Dict[str, str], media_type: str) -> Dict[str, str]:
+    """Validators of the representation in `media_type`: MessagePack gets its own ETag"""
+    if not validators or media_type != MSGPACK_MEDIA_TYPE:
+        return validators
+    return {**validators, "ETag": representation_etag(validators["ETag"], "msgpack")}
+
+
+def _not_modified(request: Request, validators: Dict[str, str],
+                  compressor: Optional["ResponseCompressor"] = None) -> Optional[Response]:
+    """
+    Return a 304 response if the request's If-None-Match matches the representation it would get
+
+    Whether that is compressed depends on the body's size, which isn't known
+    yet; the tags of the compressed and the uncompressed body both match,
+    as for the same ETag they hold the same content.
+    """
+    if not validators:
+        return None
+    if_none_match = request.headers.get("if-none-match")
+    etags = [validators["ETag"]]
+    if compressor is not None:
+        encoding = compressor.negotiate(request.headers.get("accept-encoding"), sys.maxsize)
+        if encoding is not None:
+            etags.insert(0, representation_etag(validators["ETag"], encoding))
+    for etag in etags:
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={**validators, "ETag": etag})
+    return None
+
+
+def _check_if_match(request: Request, validators: Dict[str, str]) -> None:
+    """Raise 412 if the request carries an If-Match header that doesn't match the current ETag of any representation"""
+    if_match = request.headers.get("if-match")
+    if if_match is not None and not etag_matches(if_match, validators.get("ETag"), weak=False,
+                                                 ignore_suffixes=ETAG_SUFFIXES):
+        raise HTTPException(status_code=412, detail="Precondition failed")
+
+
+def _body_response(body: bytes, headers: Dict[str, str], cache_status: Optional[str] = None) -> Response:
+    """Response for an encoded body, JSON unless the headers give another Content-Type"""
+    if cache_status is not None:
+        headers = {**headers, "X-Cache": cache_status}
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def _with_content_type(headers: Dict[str, str], media_type: str) -> Dict[str, str]:
+    if media_type == JSON_MEDIA_TYPE:
+        return headers
+    return {**headers, "Content-Type": media_type}
+
+
+def _with_vary(validators: Dict[str, str], compressor: Optional["ResponseCompressor"]) -> Dict[str, str]:
+    """Add Vary to the headers of responses that may be sent as MessagePack (Accept) or compressed (Accept-Encoding)"""
+    vary = []
+    if msgpack_available():
+        vary.append("Accept")
+    if compressor is not None:
+        vary.append("Accept-Encoding")
+    if validators and vary:
+        return {**validators, "Vary": ", ".join(vary)}
+    return validators
+
+
+async def _encoded_response(
+    request: Request,
+    compressor: Optional["ResponseCompressor"],
+    body: bytes,
+    headers: Dict[str, str],
+    cache_status: Optional[str] = None,
+    cache: Optional["ResponseCache"] = None,
+    key: Any = None,
+    entry: Optional["CacheEntry"] = None,
+) -> Response:
+    """Response compressed as the client accepts, reusing and keeping compressed variants of cache entries"""
+    encoding = None
+    if compressor is not None:
+        encoding = compressor.negotiate(request.headers.get("accept-encoding"), len(body))
+    if encoding is None:
+        return _body_response(body, headers, cache_status)
+    headers = {**headers, "Content-Encoding": encoding}
+    if "ETag" in headers:
+        headers["ETag"] = representation_etag(headers["ETag"], encoding)
+    encoded = entry.variants.get(encoding) if entry is not None else None
+    if encoded is None:
+        with span("compress", encoding=encoding):
+            encoded = await compressor.compress(body, encoding)
+        if entry is not None:
+            cache.add_variant(key, entry, encoding, encoded)
+    return _body_response(encoded, headers, cache_status)
+
+
+async def _cached_response(
+    request: Request,
+    compressor: Optional["ResponseCompressor"],
+    cache: "ResponseCache",
+    key: Any,
+    entry: "CacheEntry",
+    cache_status: str,
+) -> Response:
+    return await _encoded_response(request, compressor, entry.body, entry.headers, cache_status, cache, key, entry)
+
+
+async def _stream_items(page_items: PageFunc, after: Optional[int], fmt: str) -> AsyncIterator[bytes]:
+    """Encode the items past `after` chunk by chunk so memory use doesn't grow with the store"""
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+    first = True
+    if fmt == "json":
+        yield b"["
+    while True:
+        page, after = page_items(after, STREAM_CHUNK_SIZE)
+        if page:
+            if fmt == "ndjson":
+                yield "".join(dumps(item) + "\n" for item in page).encode()
+            else:
+                body = ",".join(dumps(item) for item in page)
+                yield (body if first else "," + body).encode()
+                first = False
+        if after is None:
+            break
+    if fmt == "json":
+        yield b"]"
 
 
 @router.get("/items", response_model=List[ItemResponse])
-async def get_items(request: Request):
-    """Get all items"""
+async def get_items(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[Literal["json", "ndjson"]] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    is_available: Optional[bool] = None,
+    repository: ItemRepository = Depends(get_item_repository),
+    index: PriceIndex = Depends(get_price_index),
+    cache: Optional["ResponseCache"] = Depends(get_response_cache),
+    compressor: Optional["ResponseCompressor"] = Depends(get_compressor),
+):
+    """
+    Get items in insertion order
+
+    Without `limit` every item is returned. With `limit`, the response holds
+    at most that many items and an `X-Next-Cursor` header to pass back as
+    `cursor` for the next page. `min_price`, `max_price` and `is_available`
+    filter the list (cursors are only valid with the filters they were
+    issued for). `stream=json|ndjson` streams every remaining item (from
+    `cursor`, if given) in chunks instead of building the result in memory;
+    it can't be combined with `limit`, as a streamed response has no
+    `X-Next-Cursor` to continue from.
+    """
     request_id = getattr(request.state, 'request_id', 'unknown')
-    logger.info(f"Fetching all items - found {len(items_db)} items", 
-                extra={"request_id": request_id, "items_count": len(items_db)})
-    return items_db
+    if stream and limit is not None:
+        raise HTTPException(status_code=400, detail="stream can't be combined with limit; page with limit and cursor instead")
+    filters = {"min_price": min_price, "max_price": max_price, "is_available": is_available}
+    if any(value is not None for value in filters.values()):
+        cursor_kind = CURSOR_PRICE_INDEX
+        page_items = filtered_page(repository, index, **filters)
+    else:
+        cursor_kind = CURSOR_REPOSITORY
+        page_items = repository.page
+    after = decode_cursor(cursor, cursor_kind) if cursor else None
+    logger.info(lambda: f"Fetching all items - found {len(repository)} items", 
+                extra=lambda: {"request_id": request_id, "items_count": len(repository), "limit": limit,
+                       "stream": stream, **filters})
+
+    if stream:
+        media_type = "application/x-ndjson" if stream == "ndjson" else "application/json"
+        return StreamingResponse(_stream_items(page_items, after, stream), media_type=media_type)
+
+    media_type = response_media_type(request)
+    validators = _for_media_type(_with_vary(list_validators(repository), compressor), media_type)
+    not_modified = _not_modified(request, validators, compressor)
+    if not_modified is not None:
+        return not_modified
+
+    key = ("items", media_type, after, limit, min_price, max_price, is_available)
+    if cache is not None:
+        entry = cache.get(key)
+        if entry is not None:
+            return await _cached_response(request, compressor, cache, key, entry, "HIT")
+
+    with span("store.scan"):
+        if limit is None and after is None and cursor_kind == CURSOR_REPOSITORY:
+            items, next_seq = repository.list(), None
+        else:
+            items, next_seq = page_items(after, limit)
+    headers = dict(_with_content_type(validators, media_type))
+    if next_seq is not None:
+        headers["X-Next-Cursor"] = encode_cursor(next_seq, cursor_kind)
+    with span("serialize", items=len(items)):
+        body = encode(media_type, items, _item_list_adapter)
+
+    if cache is None:
+        return await _encoded_response(request, compressor, body, headers)
+    entry = cache.put(key, body, headers, tags=(LIST_TAG,))
+    return await _cached_response(request, compressor, cache, key, entry, "MISS")
+
+
+@router.get("/items/stats")
+async def get_item_stats(
+    request: Request,
+    repository: ItemRepository = Depends(get_item_repository),
+    index: PriceIndex = Depends(get_price_index),
+):
+    """Count, min, max, mean and percentiles of item prices, overall and by availability"""
+    media_type = response_media_type(request)
+    validators = _for_media_type(_with_vary(list_validators(repository), None), media_type)
+    not_modified = _not_modified(request, validators)
+    if not_modified is not None:
+        return not_modified
+    return _body_response(encode(media_type, index.stats()), _with_content_type(validators, media_type))
+
+
+@router.get("/items/search", response_model=List[ItemResponse])
+async def search_items(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_PAGE_SIZE),
+    repository: ItemRepository = Depends(get_item_repository),
+    index: TextIndex = Depends(get_text_index),
+):
+    """Search item names and descriptions, best matches first"""
+    request_id = getattr(request.state, 'request_id', 'unknown')
+    matches = index.search(q, limit)
+    logger.info(lambda: f"Searching items for '{q}' - {len(matches)} matches",
+                extra=lambda: {"request_id": request_id, "query": q, "matches": len(matches), "limit": limit})
+    items = [repository.get(item_id) for item_id, _ in matches]
+    media_type = response_media_type(request)
+    return _body_response(encode(media_type, items, _item_list_adapter), _with_content_type({}, media_type))
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(request: Request, cache: Optional["ResponseCache"] = Depends(get_response_cache)):
+    """Hit/miss counters and size of the response cache"""
+    if cache is None:
+        return render(request, {"enabled": False})
+    return render(request, {"enabled": True, **cache.stats()})
+
+def _check_bulk_size(batch: List[Any]) -> None:
+    if len(batch) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=413, detail=f"Bulk requests are limited to {MAX_BULK_SIZE} items")
+
+
+def _validate_batch(batch: List[Any], adapter: TypeAdapter) -> Tuple[List[Tuple[int, Any]], List[BulkItemResult]]:
+    """Validate every entry of a batch, splitting it into valid models and per-item errors"""
+    valid = []
+    errors = []
+    for index, raw in enumerate(batch):
+        try:
+            valid.append((index, adapter.validate_python(raw)))
+        except ValidationError as e:
+            errors.append(BulkItemResult(index=index, status_code=422, error=e.errors(include_url=False)))
+    return valid, errors
+
+
+def _bulk_response(results: List[BulkItemResult]) -> BulkResponse:
+    results.sort(key=lambda result: result.index)
+    failed = sum(1 for result in results if result.status_code >= 400)
+    return BulkResponse(succeeded=len(results) - failed, failed=failed, results=results)
+
+
+@router.post("/items/bulk", response_model=BulkResponse)
+async def create_items_bulk(
+    request: Request,
+    batch: List[Any] = Body(...),
+    repository: ItemRepository = Depends(get_item_repository),
+):
+    """Create many items at once, reporting a result per item"""
+    request_id = getattr(request.state, 'request_id', 'unknown')
+    _check_bulk_size(batch)
+
+    valid, results = _validate_batch(batch, _item_create_adapter)
+    created = await repository.run(repository.add_many, [item.model_dump() for _, item in valid])
+    results.extend(
+        BulkItemResult(index=index, status_code=201, id=item["id"])
+        for (index, _), item in zip(valid, created)
+    )
+
+    response = _bulk_response(results)
+    logger.info(lambda: f"Bulk create: {response.succeeded} created, {response.failed} failed",
+                extra=lambda: {"request_id": request_id, "batch_size": len(batch),
+                       "succeeded": response.succeeded, "failed": response.failed})
+    return render(request, response)
+
+
+@router.put("/items/bulk", response_model=BulkResponse)
+async def update_items_bulk(
+    request: Request,
+    batch: List[Any] = Body(...),
+    repository: ItemRepository = Depends(get_item_repository),
+):
+    """Update many items at once; each entry carries the id of the item to update"""
+    request_id = getattr(request.state, 'request_id', 'unknown')
+    _check_bulk_size(batch)
+
+    valid, results = _validate_batch(batch, _item_bulk_update_adapter)
+    updates = [(item.id, item.model_dump(exclude={"id"})) for _, item in valid]
+    updated = await repository.run(repository.update_many, updates)
+    for (index, item), stored in zip(valid, updated):
+        if stored is None:
+            results.append(BulkItemResult(index=index, status_code=404, id=item.id, error="Item not found"))
+        else:
+            results.append(BulkItemResult(index=index, status_code=200, id=item.id))
+
+    response = _bulk_response(results)
+    logger.info(lambda: f"Bulk update: {response.succeeded} updated, {response.failed} failed",
+                extra=lambda: {"request_id": request_id, "batch_size": len(batch),
+                       "succeeded": response.succeeded, "failed": response.failed})
+    return render(request, response)
+
+
+@router.delete("/items/bulk", response_model=BulkResponse)
+async def delete_items_bulk(
+    request: Request,
+    item_ids: List[int] = Body(...),
+    repository: ItemRepository = Depends(get_item_repository),
+):
+    """Delete many items at once by id"""
+    request_id = getattr(request.state, 'request_id', 'unknown')
+    _check_bulk_size(item_ids)
+
+    deleted = await repository.run(repository.delete_many, item_ids)
+    results = [
+        BulkItemResult(index=index, status_code=200, id=item_id) if item is not None
+        else BulkItemResult(index=index, status_code=404, id=item_id, error="Item not found")
+        for index, (item_id, item) in enumerate(zip(item_ids, deleted))
+    ]
+
+    response = _bulk_response(results)
+    logger.info(lambda: f"Bulk delete: {response.succeeded} deleted, {response.failed} failed",
+                extra=lambda: {"request_id": request_id, "batch_size": len(item_ids),
+                       "succeeded": response.succeeded, "failed": response.failed})
+    return render(request, response)
+
+
+@router.get("/items/export")
+async def export_items(request: Request, repository: ItemRepository = Depends(get_item_repository)):
+    """Stream every item as NDJSON, in insertion order, in constant memory"""
+    request_id = getattr(request.state, 'request_id', 'unknown')
+    logger.info(lambda: f"Exporting {len(repository)} items",
+                extra=lambda: {"request_id": request_id, "items_count": len(repository)})
+    return StreamingResponse(
+        _stream_items(repository.page, None, "ndjson"),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="items.ndjson"'},
+    )
+
+
+async def _read_ndjson(request: Request) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Yield (line number, line) for every non-blank line of an NDJSON request body
+
+    Only the current partial line is buffered; lines longer than
+    MAX_IMPORT_LINE_BYTES are discarded and yielded as None.
+    """
+    pending = b""
+    line_no = 0
+    oversized = False
+    async for chunk in request.stream():
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            line_no += 1
+            if oversized:
+                oversized = False
+                yield line_no, None
+            elif line.strip():
+                yield line_no, line
+        if len(pending) > MAX_IMPORT_LINE_BYTES:
+            oversized = True
+            pending = b""
+    if oversized:
+        yield line_no + 1, None
+    elif pending.strip():
+        yield line_no + 1, pending
+
+
+def _validate_import_chunk(lines: List[Tuple[int, bytes]]) -> Tuple[List[Tuple[int, ItemImport]], List[ImportLineError]]:
+    """
+    Validate a chunk of NDJSON lines
+
+    The chunk is parsed as one JSON array in a single call; only when that
+    fails are the lines validated one by one to find the bad ones.
+    """
+    try:
+        items = _item_import_list_adapter.validate_json(b"[" + b",".join(line for _, line in lines) + b"]")
+        # A line holding several comma-separated values would shift the rest
+        if len(items) == len(lines):
+            return [(line_no, item) for (line_no, _), item in zip(lines, items)], []
+    except ValidationError:
+        pass
+    valid, errors = [], []
+    for line_no, line in lines:
+        try:
+            valid.append((line_no, _item_import_adapter.validate_json(line)))
+        except ValidationError as e:
+            errors.append(ImportLineError(line=line_no, error=e.errors(include_url=False)))
+    return valid, errors
+
+
+def _store_import_chunk(
+    repository: ItemRepository, valid: List[Tuple[int, ItemImport]], keep_ids: bool
+) -> Tuple[int, List[ImportLineError]]:
+    """Store validated items, returning how many were stored and the lines that couldn't be"""
+    rows = _item_import_list_adapter.dump_python([item for _, item in valid])
+    if not keep_ids:
+        for row in rows:
+            del row["id"]
+        return len(repository.add_many(rows)), []
+    stored = 0
+    errors = []
+    for (line_no, _), row in zip(valid, rows):
+        item_id = row.pop("id")
+        if item_id is None:
+            errors.append(ImportLineError(line=line_no, error="id is required with keep_ids"))
+            continue
+        try:
+            repository.add(row, item_id=item_id)
+            stored += 1
+        except ValueError as e:
+            errors.append(ImportLineError(line=line_no, error=str(e)))
+    return stored, errors
+
+
+@router.post("/items/import", response_model=ImportResponse)
+async def import_items(
+    request: Request,
+    keep_ids: bool = False,
+    repository: ItemRepository = Depends(get_item_repository),
+):
+    """
+    Import items from an NDJSON request body
+
+    The body is read as a stream and stored in chunks of IMPORT_CHUNK_SIZE
+    lines, so memory use doesn't depend on its size. Items get new ids
+    unless `keep_ids` is set, in which case each line must carry an unused
+    `id`. Lines that fail are reported by line number and don't stop the import.
+    """
+    request_id = getattr(request.state, 'request_id', 'unknown')
+    imported = 0
+    failed = 0
+    errors: List[ImportLineError] = []
+
+    def record(line_errors: List[ImportLineError]) -> None:
+        nonlocal failed
+        failed += len(line_errors)
+        errors.extend(line_errors[:MAX_IMPORT_ERRORS - len(errors)])
+
+    async def flush(chunk: List[Tuple[int, bytes]]) -> None:
+        nonlocal imported
+        valid, line_errors = _validate_import_chunk(chunk)
+        record(line_errors)
+        if valid:
+            stored, line_errors = await repository.run(_store_import_chunk, repository, valid, keep_ids)
+            imported += stored
+            record(line_errors)
+
+    chunk: List[Tuple[int, bytes]] = []
+    async for line_no, line in _read_ndjson(request):
+        if line is None:
+            record([ImportLineError(line=line_no, error=f"Line exceeds {MAX_IMPORT_LINE_BYTES} bytes")])
+            continue
+        chunk.append((line_no, line))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            await flush(chunk)
+            chunk = []
+    if chunk:
+        await flush(chunk)
+
+    errors.sort(key=lambda error: error.line)
+    logger.info(lambda: f"Import: {imported} imported, {failed} failed",
+                extra=lambda: {"request_id": request_id, "imported": imported, "failed": failed,
+                       "keep_ids": keep_ids})
+    return render(request, ImportResponse(imported=imported, failed=failed, errors=errors,
+                                          errors_truncated=failed > len(errors)))
 
 
 @router.get("/items/{item_id}", response_model=ItemResponse)
-async def get_item(item_id: int, request: Request):
+async def get_item(
+    item_id: int,
+    request: Request,
+    repository: ItemRepository = Depends(get_item_repository),
+    cache: Optional["ResponseCache"] = Depends(get_response_cache),
+    compressor: Optional["ResponseCompressor"] = Depends(get_compressor),
+):
     """Get a specific item by ID"""
     request_id = getattr(request.state, 'request_id', 'unknown')
-    logger.info(f"Fetching item with ID: {item_id}", 
-                extra={"request_id": request_id, "item_id": item_id})
+    logger.info(lambda: f"Fetching item with ID: {item_id}", 
+                extra=lambda: {"request_id": request_id, "item_id": item_id})
     
-    item = next((item for item in items_db if item["id"] == item_id), None)
+    media_type = response_media_type(request)
+    validators = _for_media_type(_with_vary(item_validators(repository, item_id), compressor), media_type)
+    not_modified = _not_modified(request, validators, compressor)
+    if not_modified is not None:
+        return not_modified
+    
+    key = ("item", media_type, item_id)
+    if cache is not None:
+        entry = cache.get(key)
+        if entry is not None:
+            return await _cached_response(request, compressor, cache, key, entry, "HIT")
+    
+    item = repository.get(item_id)
     if not item:
-        logger.warning(f"Item not found: {item_id}", 
-                      extra={"request_id": request_id, "item_id": item_id})
+        logger.warning(lambda: f"Item not found: {item_id}", 
+                      extra=lambda: {"request_id": request_id, "item_id": item_id})
         raise HTTPException(status_code=404, detail="Item not found")
     
-    logger.debug(f"Item found: {item['name']}", 
-                extra={"request_id": request_id, "item_id": item_id, "item_name": item['name']})
-    return item
+    logger.debug(lambda: f"Item found: {item['name']}", 
+                extra=lambda: {"request_id": request_id, "item_id": item_id, "item_name": item['name']})
+    
+    headers = _with_content_type(validators, media_type)
+    with span("serialize"):
+        body = encode(media_type, item, _item_response_adapter)
+    if cache is None:
+        return await _encoded_response(request, compressor, body, headers)
+    entry = cache.put(key, body, headers, tags=(item_tag(item_id),))
+    return await _cached_response(request, compressor, cache, key, entry, "MISS")
 
 
 @router.post("/items", response_model=ItemResponse)
-async def create_item(item: ItemCreate, request: Request):
+async def create_item(item: ItemCreate, request: Request, repository: ItemRepository = Depends(get_item_repository)):
     """Create a new item"""
     request_id = getattr(request.state, 'request_id', 'unknown')
-    global next_id
     
-    logger.info(f"Creating new item: {item.name}", 
-                extra={"request_id": request_id, "item_name": item.name, "item_price": item.price})
+    logger.info(lambda: f"Creating new item: {item.name}", 
+                extra=lambda: {"request_id": request_id, "item_name": item.name, "item_price": item.price})
     
-    new_item = {
-        "id": next_id,
-        "name": item.name,
-        "description": item.description,
-        "price": item.price,
-        "is_available": item.is_available
-    }
-    items_db.append(new_item)
+    with span("store.write"):
+        new_item = await repository.run(repository.add, item.model_dump())
+    validators = item_validators(repository, new_item["id"])
     
-    logger.info(f"Item created successfully with ID: {next_id}", 
-                extra={"request_id": request_id, "item_id": next_id, "item_name": item.name})
+    logger.info(lambda: f"Item created successfully with ID: {new_item['id']}", 
+                extra=lambda: {"request_id": request_id, "item_id": new_item['id'], "item_name": item.name})
     
-    next_id += 1
-    return new_item
+    return render(request, new_item, _item_response_adapter, _for_media_type(validators, response_media_type(request)))
 
 
 @router.put("/items/{item_id}", response_model=ItemResponse)
-async def update_item(item_id: int, item: ItemUpdate, request: Request):
-    """Update an existing item"""
+async def update_item(item_id: int, item: ItemUpdate, request: Request, repository: ItemRepository = Depends(get_item_repository)):
+    """
+    Update an existing item
+
+    Honours `If-Match`, answering 412 if the item changed since the client read it.
+    """
     request_id = getattr(request.state, 'request_id', 'unknown')
-    logger.info(f"Updating item with ID: {item_id}", 
-                extra={"request_id": request_id, "item_id": item_id})
+    logger.info(lambda: f"Updating item with ID: {item_id}", 
+                extra=lambda: {"request_id": request_id, "item_id": item_id})
     
-    existing_item = next((item for item in items_db if item["id"] == item_id), None)
+    existing_item = repository.get(item_id)
     if not existing_item:
-        logger.warning(f"Cannot update - item not found: {item_id}", 
-                      extra={"request_id": request_id, "item_id": item_id})
+        logger.warning(lambda: f"Cannot update - item not found: {item_id}", 
+                      extra=lambda: {"request_id": request_id, "item_id": item_id})
         raise HTTPException(status_code=404, detail="Item not found")
+    _check_if_match(request, item_validators(repository, item_id))
     
     # Log changes
     old_name = existing_item.get("name")
     old_price = existing_item.get("price")
     
-    existing_item.update({
-        "name": item.name,
-        "description": item.description,
-        "price": item.price,
-        "is_available": item.is_available
-    })
+    with span("store.write"):
+        existing_item = await repository.run(repository.update, item_id, item.model_dump())
+    validators = item_validators(repository, item_id)
     
-    logger.info(f"Item updated successfully: {item_id}", 
-                extra={
+    logger.info(lambda: f"Item updated successfully: {item_id}", 
+                extra=lambda: {
                     "request_id": request_id, 
                     "item_id": item_id, 
                     "old_name": old_name,
@@ -97,32 +718,36 @@ async def update_item(item_id: int, item: ItemUpdate, request: Request):
                     "new_price": item.price
                 })
     
-    return existing_item
+    return render(request, existing_item, _item_response_adapter,
+                  _for_media_type(validators, response_media_type(request)))
 
 
 @router.delete("/items/{item_id}")
-async def delete_item(item_id: int, request: Request):
-    """Delete an item"""
+async def delete_item(item_id: int, request: Request, repository: ItemRepository = Depends(get_item_repository)):
+    """
+    Delete an item
+
+    Honours `If-Match`, answering 412 if the item changed since the client read it.
+    """
     request_id = getattr(request.state, 'request_id', 'unknown')
-    logger.info(f"Deleting item with ID: {item_id}", 
-                extra={"request_id": request_id, "item_id": item_id})
+    logger.info(lambda: f"Deleting item with ID: {item_id}", 
+                extra=lambda: {"request_id": request_id, "item_id": item_id})
     
-    global items_db
-    original_length = len(items_db)
-    item_to_delete = next((item for item in items_db if item["id"] == item_id), None)
+    validators = item_validators(repository, item_id)
+    if validators:
+        _check_if_match(request, validators)
+    item_to_delete = await repository.run(repository.delete, item_id)
     
     if not item_to_delete:
-        logger.warning(f"Cannot delete - item not found: {item_id}", 
-                      extra={"request_id": request_id, "item_id": item_id})
+        logger.warning(lambda: f"Cannot delete - item not found: {item_id}", 
+                      extra=lambda: {"request_id": request_id, "item_id": item_id})
         raise HTTPException(status_code=404, detail="Item not found")
     
-    items_db = [item for item in items_db if item["id"] != item_id]
-    
-    logger.info(f"Item deleted successfully: {item_id} - '{item_to_delete['name']}'", 
-                extra={
+    logger.info(lambda: f"Item deleted successfully: {item_id} - '{item_to_delete['name']}'", 
+                extra=lambda: {
                     "request_id": request_id, 
                     "item_id": item_id, 
                     "deleted_item_name": item_to_delete['name']
                 })
     
-    return {"message": f"Item {item_id} deleted successfully"}
+    return render(request, {"message": f"Item {item_id} deleted successfully"})
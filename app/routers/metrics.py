@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from ..core.metrics import MetricsRegistry, get_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(registry: MetricsRegistry = Depends(get_metrics)):
+    """Prometheus metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
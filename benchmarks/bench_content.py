@@ -0,0 +1,93 @@
+"""
+Compare JSON and MessagePack for item payloads: size, and encode/decode cost.
+
+Bodies are encoded the way the items endpoints do it (validated against
+ItemResponse, then dumped) and decoded the way FastAPI handles request
+bodies (decoded, then validated into ItemCreate). Client-side encode and
+decode use json and msgpack directly.
+
+Usage:
+    python -m benchmarks.bench_content --items 1000
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from typing import Callable, List
+
+import msgpack
+from pydantic import TypeAdapter
+
+from app.core.content import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, encode
+from app.models.item import ItemCreate, ItemResponse
+
+FORMATS = (("JSON", JSON_MEDIA_TYPE, json.loads, json.dumps),
+           ("MessagePack", MSGPACK_MEDIA_TYPE, msgpack.unpackb, msgpack.packb))
+
+
+def make_items(count: int) -> List[dict]:
+    rng = random.Random(42)
+    return [
+        {"id": i, "name": f"Item {i}", "description": f"Description of item {i}" if i % 3 else None,
+         "price": round(rng.uniform(1, 1000), 2) + rng.random() / 1000, "is_available": rng.random() < 0.8}
+        for i in range(1, count + 1)
+    ]
+
+
+def per_call_us(functions: List[Callable[[], object]], rounds: int = 5, min_time: float = 0.05) -> List[float]:
+    """Best time per call of each function, run in turn for `rounds` rounds of at least `min_time` seconds"""
+    best = [float("inf")] * len(functions)
+    for _ in range(rounds):
+        for index, function in enumerate(functions):
+            calls = 0
+            start = time.perf_counter()
+            while True:
+                function()
+                calls += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= min_time:
+                    break
+            best[index] = min(best[index], elapsed / calls)
+    return [seconds * 1e6 for seconds in best]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1000, help="items in the list payload")
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    list_adapter = TypeAdapter(List[ItemResponse])
+    item_adapter = TypeAdapter(ItemResponse)
+    create_adapter = TypeAdapter(ItemCreate)
+    new_item = {key: value for key, value in items[0].items() if key != "id"}
+
+    print(f"{'':<34}{'JSON':>14}{'MessagePack':>14}{'ratio':>8}")
+
+    def row(label: str, json_value: float, msgpack_value: float, unit: str) -> None:
+        print(f"{label:<34}{json_value:>11.1f} {unit:<2}{msgpack_value:>11.1f} {unit:<2}{msgpack_value / json_value:>8.2f}")
+
+    for payload, value, adapter in ((f"list of {args.items}", items, list_adapter), ("single item", items[0], item_adapter)):
+        bodies = {name: encode(media_type, value, adapter) for name, media_type, _, _ in FORMATS}
+        row(f"{payload}: size", len(bodies["JSON"]), len(bodies["MessagePack"]), "B")
+        row(f"{payload}: size gzipped", len(gzip.compress(bodies["JSON"])),
+            len(gzip.compress(bodies["MessagePack"])), "B")
+        server_encode = per_call_us([lambda media_type=media_type: encode(media_type, value, adapter)
+                                     for _, media_type, _, _ in FORMATS])
+        row(f"{payload}: server encode", *server_encode, "us")
+        client_decode = per_call_us([lambda loads=loads, body=bodies[name]: loads(body)
+                                     for name, _, loads, _ in FORMATS])
+        row(f"{payload}: client decode", *client_decode, "us")
+
+    request_bodies = {name: dumps(new_item) for name, _, _, dumps in FORMATS}
+    request_bodies["JSON"] = request_bodies["JSON"].encode()
+    client_encode = per_call_us([lambda dumps=dumps: dumps(new_item) for _, _, _, dumps in FORMATS])
+    row("create body: client encode", *client_encode, "us")
+    server_decode = per_call_us([lambda loads=loads, body=request_bodies[name]: create_adapter.validate_python(loads(body))
+                                 for name, _, loads, _ in FORMATS])
+    row("create body: decode + validate", *server_decode, "us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure JSONFormatter throughput in records/sec against the previous
+hasattr-chain implementation.
+
+Usage:
+    python -m benchmarks.bench_json_formatter --records 200000
+"""
+import argparse
+import json
+import logging
+import time
+from datetime import datetime
+
+from app.core.logging import JSONFormatter, orjson
+
+
+class LegacyJSONFormatter(logging.Formatter):
+    """The previous JSONFormatter, kept as a baseline"""
+
+    def format(self, record):
+        log_entry = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+        }
+        if hasattr(record, 'request_id'):
+            log_entry['request_id'] = record.request_id
+        if hasattr(record, 'user_id'):
+            log_entry['user_id'] = record.user_id
+        if hasattr(record, 'endpoint'):
+            log_entry['endpoint'] = record.endpoint
+        if hasattr(record, 'method'):
+            log_entry['method'] = record.method
+        if hasattr(record, 'status_code'):
+            log_entry['status_code'] = record.status_code
+        if hasattr(record, 'duration'):
+            log_entry['duration'] = record.duration
+        if record.exc_info:
+            log_entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(log_entry)
+
+
+def make_records(count: int):
+    """Records shaped like the middleware's request-completed log line"""
+    logger = logging.getLogger("fastapi_app.middleware")
+    records = []
+    for i in range(count):
+        records.append(logger.makeRecord(
+            logger.name, logging.INFO, __file__, 1, "Request completed: GET /api/v1/items/%d - 200", (i,),
+            None, extra={"request_id": f"req-{i}", "method": "GET", "path": f"/api/v1/items/{i}",
+                         "status_code": 200, "duration": 0.0012, "endpoint": f"/api/v1/items/{i}"},
+        ))
+    return records
+
+
+def measure(formatter: logging.Formatter, records) -> float:
+    start = time.perf_counter()
+    for record in records:
+        formatter.format(record)
+    return len(records) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=200000)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    print(f"encoder: {'orjson' if orjson is not None else 'json (stdlib)'}")
+    legacy = measure(LegacyJSONFormatter(), records)
+    current = measure(JSONFormatter(), records)
+    print(f"{'legacy JSONFormatter':<24} {legacy:>12.0f} records/s")
+    print(f"{'JSONFormatter':<24} {current:>12.0f} records/s")
+    print(f"{'speedup':<24} {current / legacy:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
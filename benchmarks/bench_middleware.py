@@ -0,0 +1,127 @@
+"""
+Compare request throughput of LoggingMiddleware against the previous
+BaseHTTPMiddleware implementation.
+
+Requests are driven in-process straight through the ASGI interface, so the
+numbers reflect middleware overhead rather than network or server cost.
+
+Usage:
+    python -m benchmarks.bench_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from typing import Callable
+
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.logging import get_logger
+from app.middleware import LoggingMiddleware
+
+logger = get_logger("fastapi_app.middleware")
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware based implementation, kept as a baseline"""
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        request_id = str(uuid.uuid4())
+        start_time = time.time()
+        method = request.method
+        url = str(request.url)
+        path = request.url.path
+        query_params = str(request.query_params) if request.query_params else None
+        client_ip = request.client.host if request.client else "unknown"
+        user_agent = request.headers.get("user-agent", "unknown")
+        logger.info(
+            f"Incoming {method} request to {path}",
+            extra={"request_id": request_id, "method": method, "path": path, "url": url,
+                   "query_params": query_params, "client_ip": client_ip,
+                   "user_agent": user_agent, "endpoint": path},
+        )
+        request.state.request_id = request_id
+        response = await call_next(request)
+        duration = time.time() - start_time
+        logger.info(
+            f"Request completed: {method} {path} - {response.status_code}",
+            extra={"request_id": request_id, "method": method, "path": path,
+                   "status_code": response.status_code, "duration": round(duration, 4),
+                   "endpoint": path},
+        )
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+def build_app(middleware_class) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware_class)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id, "name": "Widget", "price": 9.99, "is_available": True}
+
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    """Send `requests` GET requests through the ASGI app and return requests/sec"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/items/1", "raw_path": b"/items/1",
+        "query_string": b"q=1", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+
+    async def one_request():
+        request_sent = False
+        response_complete = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await response_complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete.set()
+
+        await app(dict(scope), receive, send)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await one_request()
+    return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--log-level", default="INFO", help="level of the middleware logger")
+    args = parser.parse_args()
+
+    # Keep records flowing through the logging machinery without writing them anywhere
+    logger.handlers = [logging.NullHandler()]
+    logger.propagate = False
+    logger.setLevel(args.log_level)
+
+    results = {}
+    for name, middleware_class in (("BaseHTTPMiddleware (legacy)", LegacyLoggingMiddleware),
+                                   ("pure ASGI", LoggingMiddleware)):
+        app = build_app(middleware_class)
+        asyncio.run(drive(app, min(1000, args.requests)))  # warm up
+        results[name] = asyncio.run(drive(app, args.requests))
+        print(f"{name:<28} {results[name]:>10.0f} req/s")
+
+    legacy, current = results.values()
+    print(f"{'speedup':<28} {current / legacy:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
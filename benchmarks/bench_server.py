@@ -0,0 +1,63 @@
+"""
+Compare the production server profile with uvicorn's default configuration.
+
+Launches run.py with SERVER_PROFILE=default and SERVER_PROFILE=production in
+turn and drives each with the load test's request mix over real sockets.
+Profiles are interleaved over several rounds and the best round of each is
+reported, so that noise on the machine affects both alike. Requests are
+logged at INFO (to /dev/null) as they would be in production, which is
+where the default profile's duplicate access log shows up.
+
+Usage:
+    python -m benchmarks.bench_server --rounds 3 --duration 10
+    python -m benchmarks.bench_server --server-env STORE_BACKEND=sqlite --server-env WORKERS=0
+"""
+import argparse
+import asyncio
+import os
+
+from benchmarks.loadtest import DEFAULT_MIX, parse_mix, print_report, run_uvicorn
+
+PROFILES = ("default", "production")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per profile and round")
+    parser.add_argument("--catalog-size", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--log-level", default="INFO", help="server log level during the run")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for both profiles (repeatable)")
+    args = parser.parse_args()
+
+    os.environ["LOG_LEVEL"] = args.log_level
+    os.environ.setdefault("ENABLE_FILE_LOGGING", "false")
+
+    best = {}
+    for round_number in range(1, args.rounds + 1):
+        for profile in PROFILES:
+            run_args = argparse.Namespace(
+                catalog_size=args.catalog_size, concurrency=args.concurrency, duration=args.duration,
+                requests=None, mix=args.mix, list_limit=100, seed=round_number,
+                server_env=args.server_env + [f"SERVER_PROFILE={profile}"],
+            )
+            results = asyncio.run(run_uvicorn(run_args))
+            overall = results["overall"]
+            print(f"round {round_number} {profile:<10} {overall['throughput_rps']:>9.1f} req/s "
+                  f"p50 {overall['p50_ms']:.3f} ms p99 {overall['p99_ms']:.3f} ms")
+            if profile not in best or overall["throughput_rps"] > best[profile]["overall"]["throughput_rps"]:
+                best[profile] = results
+
+    for profile in PROFILES:
+        print(f"\n{profile} profile (best of {args.rounds})")
+        print_report(best[profile])
+    default, production = best["default"]["overall"], best["production"]["overall"]
+    print(f"\nproduction vs default: throughput {production['throughput_rps'] / default['throughput_rps']:.2f}x, "
+          f"p99 {production['p99_ms'] / default['p99_ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measure write throughput and recovery time of the durable item store.
+
+Writes `--items` items under each fsync mode, then times recovery from a
+snapshot alone and from a snapshot plus a change log.
+
+Usage:
+    python -m benchmarks.bench_store --items 200000
+"""
+import argparse
+import tempfile
+import time
+
+from app.repositories import DurableItemRepository
+from app.repositories.durable import FSYNC_MODES
+
+
+def _item(i: int):
+    return {"name": f"Item {i}", "description": f"Benchmark item number {i}", "price": i * 0.01, "is_available": i % 3 != 0}
+
+
+def measure_writes(directory: str, items: int, fsync: str) -> float:
+    """Create `items` items and return writes/sec"""
+    repository = DurableItemRepository(directory, fsync=fsync, snapshot_every=items * 10)
+    start = time.perf_counter()
+    for i in range(items):
+        repository.add(_item(i))
+    repository.close()
+    return items / (time.perf_counter() - start)
+
+
+def measure_recovery(directory: str) -> dict:
+    start = time.perf_counter()
+    repository = DurableItemRepository(directory)
+    elapsed = time.perf_counter() - start
+    stats = dict(repository.recovery_stats, seconds=round(elapsed, 3))
+    repository.close()
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=200000)
+    parser.add_argument("--fsync-items", type=int, default=2000,
+                        help="items written with fsync=always (each write waits for the disk)")
+    args = parser.parse_args()
+
+    print("write throughput")
+    for fsync in FSYNC_MODES:
+        count = args.fsync_items if fsync == "always" else args.items
+        with tempfile.TemporaryDirectory() as directory:
+            print(f"  fsync={fsync:<8} {measure_writes(directory, count, fsync):>12.0f} writes/s ({count} items)")
+
+    print("recovery")
+    with tempfile.TemporaryDirectory() as directory:
+        measure_writes(directory, args.items, "never")
+        print(f"  log only           {measure_recovery(directory)}")
+        repository = DurableItemRepository(directory)
+        repository.snapshot()
+        repository.close()
+        print(f"  snapshot only      {measure_recovery(directory)}")
+        repository = DurableItemRepository(directory)
+        for i in range(args.items // 10):
+            repository.update(i + 1, _item(-i))
+        repository.close()
+        print(f"  snapshot + log     {measure_recovery(directory)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Measure the overhead of request tracing per request.
+
+Requests are driven in-process through the ASGI interface against a bare app
+serving item routes through TracedRoute, without TracingMiddleware, with it
+and sampling off, and with every request sampled. Logging, metrics and the
+store are left out so that the difference is the cost of propagation, span
+recording and export.
+
+Usage:
+    python -m benchmarks.bench_tracing --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import APIRouter, FastAPI
+
+from app.core.tracing import SpanExporter, TracedRoute, span
+from app.middleware import TracingMiddleware
+from app.models.item import ItemCreate, ItemResponse
+
+CONFIGURATIONS = (
+    ("tracing disabled", None),
+    ("sampling off", {"sample_rate": 0.0}),
+    ("all sampled", {"sample_rate": 1.0}),
+    ("all sampled + Server-Timing", {"sample_rate": 1.0, "server_timing": True}),
+)
+
+
+def build_app(tracing, trace_file: str):
+    app = FastAPI()
+    router = APIRouter(route_class=TracedRoute)
+    items = {1: {"id": 1, "name": "Widget", "description": None, "price": 9.99, "is_available": True}}
+
+    @router.get("/items/{item_id}", response_model=ItemResponse)
+    async def get_item(item_id: int):
+        with span("store.get"):
+            return items[item_id]
+
+    @router.post("/items", response_model=ItemResponse)
+    async def create_item(item: ItemCreate):
+        with span("store.write"):
+            new_item = items[len(items) + 1] = {"id": len(items) + 1, **item.model_dump()}
+        return new_item
+
+    app.include_router(router, prefix="/api/v1")
+    exporter = None
+    if tracing is not None:
+        exporter = SpanExporter(trace_file, service_name="bench")
+        app.add_middleware(TracingMiddleware, exporter=exporter, **tracing)
+    return app, exporter
+
+
+async def drive(app, method: str, path: str, body: bytes, requests: int) -> float:
+    """Send `requests` requests through the ASGI app and return requests/sec"""
+    headers = [(b"host", b"bench"), (b"user-agent", b"bench")]
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+
+    async def one_request():
+        request_sent = False
+        response_complete = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await response_complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete.set()
+
+        await app(dict(scope), receive, send)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await one_request()
+    return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3, help="configurations are run in turn this many times, keeping the best")
+    args = parser.parse_args()
+
+    workloads = (
+        ("GET /api/v1/items/1", "GET", "/api/v1/items/1", b""),
+        ("POST /api/v1/items", "POST", "/api/v1/items",
+         json.dumps({"name": "Widget", "description": "Bench item", "price": 9.99}).encode()),
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for label, method, path, body in workloads:
+            best = {name: 0.0 for name, _ in CONFIGURATIONS}
+            for _ in range(args.rounds):
+                for name, tracing in CONFIGURATIONS:
+                    app, exporter = build_app(tracing, str(Path(directory) / "spans.jsonl"))
+                    asyncio.run(drive(app, method, path, body, min(500, args.requests)))  # warm up
+                    best[name] = max(best[name], asyncio.run(drive(app, method, path, body, args.requests)))
+                    if exporter is not None:
+                        exporter.close()
+
+            print(label)
+            baseline = best[CONFIGURATIONS[0][0]]
+            for name, rate in best.items():
+                overhead_us = (1 / rate - 1 / baseline) * 1e6
+                print(f"  {name:<30} {rate:>8.0f} req/s  {overhead_us:>+7.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Mixed read/write load test for the items API.
+
+Drives app.main:app either in-process over ASGI (no network, measures the
+application itself) or against a locally launched uvicorn server (run.py).
+Seeds a catalog, runs a weighted mix of list/get/create/update/delete
+requests from concurrent clients, reports throughput and p50/p95/p99
+latency, saves the results as JSON and optionally compares them with a
+baseline, exiting non-zero on a regression so it can gate a release.
+
+Baselines depend on the machine, so none is committed: record one with
+`--output` on the machine that runs the comparison, then pass that file as
+`--baseline` to later runs with the same options.
+
+Usage:
+    python -m benchmarks.loadtest --target asgi --catalog-size 10000 --concurrency 16 --duration 10
+    python -m benchmarks.loadtest --target uvicorn --output baseline.json
+    python -m benchmarks.loadtest --target uvicorn --output results.json --baseline baseline.json
+    python -m benchmarks.loadtest --target uvicorn --server-env WORKERS=4 --server-env STORE_BACKEND=sqlite
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+DEFAULT_MIX = "list=10,get=60,create=10,update=15,delete=5"
+OPERATIONS = ("list", "get", "create", "update", "delete")
+SEED_CHUNK = 5000
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation '{name}' (expected one of {OPERATIONS})")
+        weights[name] = int(weight)
+    return weights
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def _item(rng: random.Random, i: int) -> dict:
+    return {
+        "name": f"Load item {i}",
+        "description": f"Generated item {i} for load testing",
+        "price": round(rng.uniform(1, 500), 2),
+        "is_available": rng.random() < 0.8,
+    }
+
+
+async def seed(client: httpx.AsyncClient, size: int, rng: random.Random) -> List[int]:
+    ids = []
+    for start in range(0, size, SEED_CHUNK):
+        batch = [_item(rng, i) for i in range(start, min(size, start + SEED_CHUNK))]
+        response = await client.post("/api/v1/items/bulk", json=batch)
+        response.raise_for_status()
+        ids.extend(result["id"] for result in response.json()["results"] if result["status_code"] < 400)
+    return ids
+
+
+async def run_workload(client: httpx.AsyncClient, args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    ids = await seed(client, args.catalog_size, rng)
+    operations = list(args.mix)
+    weights = [args.mix[name] for name in operations]
+    latencies: Dict[str, List[float]] = {name: [] for name in operations}
+    errors: Dict[str, int] = {name: 0 for name in operations}
+    deadline = time.perf_counter() + args.duration
+    remaining = [args.requests]
+    counter = [args.catalog_size]
+
+    async def one(op: str, worker_rng: random.Random) -> httpx.Response:
+        if op == "list":
+            return await client.get("/api/v1/items", params={"limit": args.list_limit})
+        if op == "create":
+            counter[0] += 1
+            response = await client.post("/api/v1/items", json=_item(worker_rng, counter[0]))
+            if response.status_code == 200:
+                ids.append(response.json()["id"])
+            return response
+        if not ids:
+            return await client.get("/api/v1/items/0")
+        item_id = ids[worker_rng.randrange(len(ids))]
+        if op == "get":
+            return await client.get(f"/api/v1/items/{item_id}")
+        if op == "update":
+            return await client.put(f"/api/v1/items/{item_id}", json=_item(worker_rng, item_id))
+        ids.remove(item_id)
+        return await client.delete(f"/api/v1/items/{item_id}")
+
+    async def worker(worker_id: int) -> None:
+        worker_rng = random.Random(args.seed * 1000 + worker_id)
+        while time.perf_counter() < deadline and (args.requests is None or remaining[0] > 0):
+            if args.requests is not None:
+                remaining[0] -= 1
+            op = worker_rng.choices(operations, weights)[0]
+            start = time.perf_counter()
+            response = await one(op, worker_rng)
+            latencies[op].append(time.perf_counter() - start)
+            # A concurrent delete can make a get/update miss; that's expected, not an error
+            if response.status_code >= 400 and response.status_code != 404:
+                errors[op] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "overall": summarize(all_latencies, sum(errors.values()), elapsed),
+        "operations": {name: summarize(latencies[name], errors[name], elapsed) for name in operations},
+        "elapsed_seconds": round(elapsed, 3),
+    }
+
+
+async def run_asgi(args: argparse.Namespace) -> dict:
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        return await run_workload(client, args)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(args: argparse.Namespace) -> dict:
+    port = _free_port()
+    env = dict(os.environ, HOST="127.0.0.1", PORT=str(port), DEBUG="false")
+    env.update(dict(pair.split("=", 1) for pair in args.server_env))
+    root = Path(__file__).resolve().parent.parent
+    server = subprocess.Popen([sys.executable, "run.py"], cwd=root, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            for _ in range(100):
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError(f"server exited with status {server.returncode}")
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("server did not become healthy")
+            return await run_workload(client, args)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Return the regressions of `results` against `baseline`, as human-readable lines"""
+    regressions = []
+    sections = [("overall", results["overall"], baseline.get("overall", {}))]
+    sections += [(name, stats, baseline.get("operations", {}).get(name, {}))
+                 for name, stats in results["operations"].items()]
+    for name, current, previous in sections:
+        if not previous or not previous.get("requests"):
+            continue
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {current['throughput_rps']} < baseline {previous['throughput_rps']}")
+        for key in ("p95_ms", "p99_ms"):
+            if current[key] > previous[key] * (1 + max_regression):
+                regressions.append(f"{name}: {key} {current[key]} > baseline {previous[key]}")
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    print(f"{'operation':<10} {'requests':>9} {'errors':>7} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = [("overall", results["overall"])] + list(results["operations"].items())
+    for name, stats in rows:
+        print(f"{name:<10} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>10.1f} "
+              f"{stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--catalog-size", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run the mix for")
+    parser.add_argument("--requests", type=int, default=None, help="stop after this many requests instead")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--list-limit", type=int, default=100, help="page size of list requests")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--log-level", default="WARNING", help="application log level during the run")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the uvicorn server (repeatable)")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare with results saved by an earlier run")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="allowed throughput drop / latency increase as a fraction (default 0.10)")
+    args = parser.parse_args(argv)
+    if args.requests is not None:
+        args.duration = float("inf")
+
+    # Applies to the in-process app and is inherited by the uvicorn server
+    os.environ.setdefault("LOG_LEVEL", args.log_level)
+    os.environ.setdefault("ENABLE_FILE_LOGGING", "false")
+
+    runner = run_asgi if args.target == "asgi" else run_uvicorn
+    results = asyncio.run(runner(args))
+    results["config"] = {
+        "target": args.target, "catalog_size": args.catalog_size, "concurrency": args.concurrency,
+        "mix": args.mix, "list_limit": args.list_limit, "seed": args.seed, "server_env": args.server_env,
+        "python": platform.python_version(), "platform": platform.platform(),
+    }
+    print_report(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.max_regression)
+        if regressions:
+            print("REGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"no regressions against {args.baseline} (threshold {args.max_regression:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
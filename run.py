@@ -1,20 +1,30 @@
 import uvicorn
-from app.main import app
 from app.core.config import get_settings
 from app.core.logging import get_logger
+from app.core.server import apply_server_profile, server_workers, uvicorn_options
+from app.repositories.backends import SHARED_BACKENDS
 
 if __name__ == "__main__":
-    settings = get_settings()
+    settings = apply_server_profile(get_settings())
     logger = get_logger("fastapi_app.startup")
-    
+
+    workers = server_workers(settings)
+    if workers > 1 and settings.store_backend not in SHARED_BACKENDS:
+        # Only worth a warning when more workers were asked for, not picked by the profile
+        if "workers" in settings.model_fields_set:
+            logger.warning(
+                f"store backend '{settings.store_backend}' can't be shared between worker processes; "
+                f"running a single worker (use STORE_BACKEND=sqlite for {workers} workers)"
+            )
+        workers = 1
+    if workers > 1 and settings.debug:
+        logger.warning("Reload is enabled in debug mode; running a single worker")
+        workers = 1
+
+    options = uvicorn_options(settings, workers)
     logger.info(f"Starting {settings.app_name} server")
-    logger.info(f"Server will run on {settings.host}:{settings.port}")
+    logger.info(f"Server will run on {settings.host}:{settings.port} with {workers} worker(s)")
+    logger.info(f"Server profile: {settings.server_profile} (loop {options['loop']}, http {options['http']})")
     logger.info(f"Debug mode: {settings.debug}")
-    
-    uvicorn.run(
-        "app.main:app",
-        host=settings.host,
-        port=settings.port,
-        reload=settings.debug,
-        log_config=None  # Use our custom logging configuration
-    )
+
+    uvicorn.run("app.main:create_app", factory=True, **options)
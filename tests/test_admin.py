@@ -0,0 +1,75 @@
+import logging
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import Settings
+from app.main import create_app
+
+app = create_app(Settings(admin_token="secret"))
+client = TestClient(app)
+HEADERS = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture(autouse=True)
+def admin_token():
+    yield
+    app.state.admin_token = "secret"
+    client.delete("/admin/logging", headers=HEADERS)
+
+
+def test_admin_requires_token():
+    """Test that admin endpoints reject missing tokens and are hidden when disabled"""
+    assert client.get("/admin/logging").status_code == 403
+    assert client.get("/admin/logging", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    app.state.admin_token = ""
+    assert client.get("/admin/logging", headers=HEADERS).status_code == 404
+    disabled = TestClient(create_app(Settings(admin_token="")))
+    assert disabled.get("/admin/logging", headers=HEADERS).status_code == 404
+
+
+def test_change_and_revert_logger_level():
+    """Test that a level change applies immediately and is undone by DELETE"""
+    items_logger = logging.getLogger("fastapi_app.routers.items")
+    original = items_logger.level
+    response = client.put("/admin/logging", headers=HEADERS,
+                          json={"loggers": {"fastapi_app.routers.items": "debug"}, "ttl_seconds": 60})
+    assert response.status_code == 200
+    assert response.json()["loggers"]["fastapi_app.routers.items"] == "DEBUG"
+    assert items_logger.level == logging.DEBUG
+    [override] = response.json()["overrides"]
+    assert (override["kind"], override["value"]) == ("logger", "DEBUG")
+
+    client.delete("/admin/logging", headers=HEADERS)
+    assert items_logger.level == original
+
+
+def test_changes_expire_after_ttl():
+    """Test that logger levels and sampling revert by themselves"""
+    middleware_logger = logging.getLogger("fastapi_app.middleware")
+    original = middleware_logger.level
+    response = client.put("/admin/logging", headers=HEADERS, json={
+        "loggers": {"fastapi_app.middleware": "ERROR"},
+        "sampling": {"rates": {"/health": 0}},
+        "ttl_seconds": 0.1,
+    })
+    assert response.json()["sampling"]["rates"] == {"/health": 0}
+    time.sleep(0.3)
+    state = client.get("/admin/logging", headers=HEADERS).json()
+    assert middleware_logger.level == original
+    assert state["sampling"]["rates"] == {} and state["overrides"] == []
+
+
+def test_invalid_changes_are_rejected():
+    """Test that unknown levels, handlers and rates are rejected without applying anything"""
+    for change in ({"loggers": {"fastapi_app": "LOUD"}},
+                   {"loggers": {"fastapi_app": "DEBUG"}, "handlers": {"nope": "DEBUG"}},
+                   {"sampling": {"rates": {"/": 2}}}):
+        assert client.put("/admin/logging", headers=HEADERS, json=change).status_code == 422
+    assert client.get("/admin/logging", headers=HEADERS).json()["overrides"] == []
+
+
+def test_startup_timings():
+    """Test that the startup report is exposed to admins"""
+    timings = client.get("/admin/startup", headers=HEADERS).json()
+    assert timings["create_app_ms"] >= timings["store_ms"]
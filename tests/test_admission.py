@@ -0,0 +1,40 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from app.core.admission import AdmissionController
+from app.core.config import Settings
+from app.main import create_app
+
+
+def test_rate_limit_returns_429_and_exempts_health():
+    """Test the per-client token bucket through the application"""
+    app = create_app(Settings(rate_limit_per_second=0.5, rate_limit_burst=2))
+    client = TestClient(app)
+    statuses = [client.get("/api/v1/items").status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    response = client.get("/api/v1/items")
+    assert response.headers["Retry-After"] == "2"
+    # Shed requests pass through LoggingMiddleware too
+    assert response.headers["X-Request-ID"]
+    assert client.get("/health").status_code == 200
+    assert app.state.admission.shed_rate_limited == 2
+    assert "http_requests_shed_rate_limited_total 2" in client.get("/metrics").text
+
+
+def test_concurrency_limit_queues_then_sheds():
+    """Test slot hand-over to queued requests, queue bound and queue timeout"""
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        assert await controller.acquire()
+        queued = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+        assert not await controller.acquire()  # queue full
+        controller.release()
+        assert await queued and controller.active == 1
+        assert not await controller.acquire()  # times out waiting
+        controller.release()
+        assert controller.active == 0 and controller.queued == 0
+        return controller.shed_overloaded
+
+    assert asyncio.run(scenario()) == 2
@@ -0,0 +1,36 @@
+from app.core.cache import ResponseCache
+
+
+def test_lru_eviction_respects_byte_budget():
+    """Test that the least recently used entries are evicted first"""
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") is not None
+    cache.put("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get("a").body == b"aaaa"
+    assert cache.size == 8
+    assert cache.evictions == 1
+
+
+def test_invalidate_by_tag():
+    """Test that invalidating a tag drops only the entries carrying it"""
+    cache = ResponseCache()
+    cache.put("list", b"[]", tags=("items:list",))
+    cache.put("item:1", b"{}", tags=("item:1",))
+    cache.invalidate("items:list")
+    assert cache.get("list") is None
+    assert cache.get("item:1") is not None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_variants_count_towards_size():
+    """Test that compressed variants are accounted for and dropped with their entry"""
+    cache = ResponseCache(max_bytes=100)
+    entry = cache.put("a", b"a" * 40, tags=("t",))
+    cache.add_variant("a", entry, "gzip", b"z" * 10)
+    assert (entry.size, cache.size) == (50, 50)
+    cache.invalidate("t")
+    cache.add_variant("a", entry, "br", b"b" * 10)
+    assert cache.size == 0 and "br" not in entry.variants
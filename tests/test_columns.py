@@ -0,0 +1,65 @@
+import pytest
+from app.repositories import ItemRepository, PriceIndex
+
+
+@pytest.fixture
+def repository():
+    repository = ItemRepository()
+    index = PriceIndex(capacity=2)
+    repository.subscribe(index.apply)
+    repository.index = index
+    for i, price in enumerate([5.0, 15.0, 25.0, 35.0]):
+        repository.add({"name": f"item {i}", "description": None, "price": price, "is_available": i % 2 == 0})
+    return repository
+
+
+def test_filters_follow_updates_and_deletes(repository):
+    """Test that filters reflect every change made through the repository"""
+    index = repository.index
+    assert index.page(min_price=10, max_price=30)[0] == [2, 3]
+    assert index.page(is_available=True)[0] == [1, 3]
+    repository.update(1, {"price": 20.0})
+    repository.delete(3)
+    assert index.page(min_price=10, max_price=30)[0] == [1, 2]
+
+
+def test_page_with_cursor(repository):
+    """Test resuming a filtered listing from a returned sequence number"""
+    index = repository.index
+    ids, next_seq = index.page(limit=2, min_price=0)
+    assert ids == [1, 2]
+    assert index.page(after=next_seq, limit=2, min_price=0) == ([3, 4], None)
+
+
+def test_paging_scans_in_windows(monkeypatch):
+    """Test that paging through sparse matches window by window returns every match once"""
+    monkeypatch.setattr("app.repositories.columns.PAGE_SCAN_MIN_ROWS", 2)
+    index = PriceIndex(capacity=2)
+    for item_id in range(1, 101):
+        index.upsert(item_id, float(item_id), item_id % 7 == 0)
+    pages, after = [], None
+    while True:
+        ids, after = index.page(after, 3, is_available=True, max_price=90)
+        pages.append(ids)
+        if after is None:
+            break
+    assert sum(pages, []) == index.page(is_available=True, max_price=90)[0] == list(range(7, 91, 7))
+    assert all(len(ids) == 3 for ids in pages[:-1])
+
+
+def test_compaction_keeps_order(repository, monkeypatch):
+    """Test that compaction drops dead rows without reordering live ones"""
+    monkeypatch.setattr("app.repositories.columns.COMPACT_MIN_DEAD_ROWS", 1)
+    repository.delete(1)
+    repository.delete(2)
+    assert len(repository.index) == 2
+    assert repository.index.page()[0] == [3, 4]
+
+
+def test_stats(repository):
+    """Test aggregate price statistics split by availability"""
+    stats = repository.index.stats()
+    assert stats["all"]["count"] == 4
+    assert stats["all"]["mean"] == 20.0
+    assert (stats["available"]["min"], stats["available"]["max"]) == (5.0, 25.0)
+    assert stats["unavailable"]["percentiles"]["p50"] == 25.0
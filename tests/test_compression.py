@@ -0,0 +1,22 @@
+import asyncio
+import gzip
+
+from app.core.compression import ResponseCompressor
+
+
+def test_negotiation_honours_q_values_and_min_size():
+    """Test encoding choice from Accept-Encoding"""
+    compressor = ResponseCompressor(min_size=10)
+    assert compressor.negotiate("gzip, deflate", 100) == "gzip"
+    assert compressor.negotiate("gzip", 5) is None
+    assert compressor.negotiate("gzip;q=0", 100) is None
+    assert compressor.negotiate("identity", 100) is None
+    assert compressor.negotiate("*", 100) == next(iter(compressor.encoders))
+    assert compressor.negotiate(None, 100) is None
+
+
+def test_compress_round_trip_in_and_off_loop():
+    """Test that small and offloaded bodies both decompress to the original"""
+    compressor = ResponseCompressor(min_size=1, offload_size=1000)
+    for body in (b"x" * 100, b"y" * 5000):
+        assert gzip.decompress(asyncio.run(compressor.compress(body, "gzip"))) == body
@@ -0,0 +1,89 @@
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import Settings
+from app.core.content import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, negotiate_media_type
+from app.main import create_app
+
+MSGPACK = {"Accept": MSGPACK_MEDIA_TYPE}
+
+
+def _client():
+    return TestClient(create_app(Settings()))
+
+
+def _post_msgpack(client, path, value, method="POST"):
+    return client.request(method, path, content=msgpack.packb(value),
+                          headers={"Content-Type": MSGPACK_MEDIA_TYPE, **MSGPACK})
+
+
+@pytest.mark.parametrize("accept,expected", [
+    (None, JSON_MEDIA_TYPE),
+    ("*/*", JSON_MEDIA_TYPE),
+    ("application/msgpack", MSGPACK_MEDIA_TYPE),
+    ("application/x-msgpack, */*;q=0.1", MSGPACK_MEDIA_TYPE),
+    ("application/json, application/msgpack", MSGPACK_MEDIA_TYPE),
+    ("application/json, application/msgpack;q=0.5", JSON_MEDIA_TYPE),
+    ("application/msgpack;q=0", JSON_MEDIA_TYPE),
+])
+def test_negotiate_media_type(accept, expected):
+    """Test that MessagePack is chosen only when preferred at least as much as JSON"""
+    assert negotiate_media_type(accept) == expected
+
+
+def test_items_round_trip_as_msgpack():
+    """Test that MessagePack bodies are validated and every response can be MessagePack"""
+    client = _client()
+    response = _post_msgpack(client, "/api/v1/items", {"name": "Packed", "price": 1.25})
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == MSGPACK_MEDIA_TYPE
+    created = msgpack.unpackb(response.content)
+    assert created == {"id": created["id"], "name": "Packed", "description": None, "price": 1.25, "is_available": True}
+    assert "ETag" in response.headers
+
+    response = _post_msgpack(client, f"/api/v1/items/{created['id']}", {"name": "Repacked", "price": 2.5}, "PUT")
+    assert msgpack.unpackb(response.content)["name"] == "Repacked"
+
+    response = client.get(f"/api/v1/items/{created['id']}", headers=MSGPACK)
+    assert msgpack.unpackb(response.content)["price"] == 2.5
+    assert response.headers["Vary"].startswith("Accept")
+    listed = client.get("/api/v1/items", headers=MSGPACK)
+    assert [item["name"] for item in msgpack.unpackb(listed.content)] == ["Repacked"]
+    assert msgpack.unpackb(client.get("/api/v1/items/stats", headers=MSGPACK).content)["all"]["count"] == 1
+
+    response = _post_msgpack(client, "/api/v1/items/bulk", [{"name": "Bulk", "price": 3.0}, {"name": "Bad"}])
+    assert msgpack.unpackb(response.content)["failed"] == 1
+
+
+def test_cached_representations_are_kept_apart():
+    """Test that JSON and MessagePack responses are cached separately"""
+    client = _client()
+    item_id = client.post("/api/v1/items", json={"name": "Twice", "price": 4.0}).json()["id"]
+    for _ in range(2):
+        assert client.get(f"/api/v1/items/{item_id}").json()["name"] == "Twice"
+        assert msgpack.unpackb(client.get(f"/api/v1/items/{item_id}", headers=MSGPACK).content)["name"] == "Twice"
+    assert client.get(f"/api/v1/items/{item_id}", headers=MSGPACK).headers["X-Cache"] == "HIT"
+
+
+def test_representations_have_their_own_etags():
+    """Test that a MessagePack ETag doesn't revalidate JSON, but is accepted by If-Match"""
+    client = _client()
+    url = f"/api/v1/items/{client.post('/api/v1/items', json={'name': 'Tagged', 'price': 1.0}).json()['id']}"
+    json_etag = client.get(url).headers["ETag"]
+    msgpack_etag = client.get(url, headers=MSGPACK).headers["ETag"]
+    assert msgpack_etag == json_etag[:-1] + '-msgpack"'
+    assert client.get(url, headers={"If-None-Match": msgpack_etag}).status_code == 200
+    assert client.get(url, headers={"If-None-Match": msgpack_etag, **MSGPACK}).status_code == 304
+    updated = client.put(url, json={"name": "Retagged", "price": 2.0}, headers={"If-Match": msgpack_etag})
+    assert updated.status_code == 200
+    assert client.delete(url, headers={"If-Match": msgpack_etag}).status_code == 412
+
+
+def test_invalid_msgpack_bodies_are_rejected():
+    """Test that undecodable bodies get 400 and invalid items 422"""
+    client = _client()
+    response = client.post("/api/v1/items", content=b"\xc1", headers={"Content-Type": MSGPACK_MEDIA_TYPE})
+    assert response.status_code == 400
+    response = _post_msgpack(client, "/api/v1/items", {"name": "No price"})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "price"]
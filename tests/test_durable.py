@@ -0,0 +1,113 @@
+import threading
+from app.repositories import DurableItemRepository, PriceIndex, durable
+
+
+def _item(name, price=1.0):
+    return {"name": name, "description": None, "price": price, "is_available": True}
+
+
+def test_changes_survive_reopen(tmp_path):
+    """Test that creates, updates and deletes are recovered from the log"""
+    repository = DurableItemRepository(tmp_path, fsync="always")
+    for name in "abc":
+        repository.add(_item(name))
+    repository.update(1, {"price": 9.5})
+    repository.delete(2)
+    repository.close()
+
+    reopened = DurableItemRepository(tmp_path)
+    assert reopened.list() == [
+        {"id": 1, "name": "a", "description": None, "price": 9.5, "is_available": True},
+        {"id": 3, "name": "c", "description": None, "price": 1.0, "is_available": True},
+    ]
+    assert reopened.recovery_stats["log_records"] == 5
+    assert reopened.add(_item("d"))["id"] == 4
+    reopened.close()
+
+
+def test_snapshot_then_log_replay(tmp_path):
+    """Test recovery from a snapshot plus the records logged after it"""
+    repository = DurableItemRepository(tmp_path, snapshot_every=3)
+    for name in "abcd":
+        repository.add(_item(name))
+    repository.delete(1)
+    repository.close()
+    assert (tmp_path / "items.snapshot").exists()
+
+    reopened = DurableItemRepository(tmp_path)
+    assert reopened.recovery_stats["snapshot_items"] == 3
+    assert [item["name"] for item in reopened.list()] == ["b", "c", "d"]
+    index = PriceIndex()
+    reopened.subscribe(index.apply)
+    assert len(index) == 3
+    reopened.close()
+
+
+def test_torn_tail_is_discarded(tmp_path):
+    """Test that a partially written record at the end of the log is ignored"""
+    repository = DurableItemRepository(tmp_path)
+    repository.add(_item("a"))
+    repository.add(_item("b"))
+    repository.close()
+    log_path = tmp_path / "items.log"
+    log_path.write_bytes(log_path.read_bytes()[:-5])
+
+    reopened = DurableItemRepository(tmp_path)
+    assert [item["name"] for item in reopened.list()] == ["a"]
+    reopened.add(_item("c"))
+    reopened.close()
+    recovered = DurableItemRepository(tmp_path)
+    assert [item["name"] for item in recovered.list()] == ["a", "c"]
+    recovered.close()
+
+
+def test_background_snapshot_and_leftover_segments(tmp_path):
+    """Test that snapshots rotate the log, and that segments left by a crash are replayed"""
+    repository = DurableItemRepository(tmp_path, snapshot_every=2)
+    for name in "abcde":
+        repository.add(_item(name))
+    repository.update(5, {"price": 2.0})
+    repository.close()
+    assert repository.snapshot_error is None
+    assert not list(tmp_path.glob("items.log.*"))
+
+    # As if the process died after rotating the log but before the snapshot was written
+    (tmp_path / "items.log").rename(tmp_path / "items.log.7")
+    reopened = DurableItemRepository(tmp_path)
+    assert [item["name"] for item in reopened.list()] == list("abcde")
+    assert reopened.get(5)["price"] == 2.0
+    reopened.snapshot()
+    assert not list(tmp_path.glob("items.log.*"))
+    reopened.close()
+
+    recovered = DurableItemRepository(tmp_path)
+    assert recovered.recovery_stats["snapshot_items"] == 5
+    assert recovered.add(_item("f"))["id"] == 6
+    recovered.close()
+
+
+def test_snapshot_captures_items_before_later_writes(tmp_path, monkeypatch):
+    """Test that updates made while a snapshot is written stay out of it, and are recovered from the log"""
+    release = threading.Event()
+    write_snapshot = durable.write_snapshot
+
+    def blocked_write_snapshot(*args):
+        release.wait(5)
+        write_snapshot(*args)
+
+    monkeypatch.setattr(durable, "write_snapshot", blocked_write_snapshot)
+    repository = DurableItemRepository(tmp_path)
+    for name in "abc":
+        repository.add(_item(name))
+    repository.snapshot(wait=False)
+    repository.update(1, {"price": 5.0})
+    repository.delete(3)
+    release.set()
+    repository.close()
+
+    snapshot = {}
+    durable.load_snapshot(tmp_path / "items.snapshot", snapshot.__setitem__)
+    assert sorted(snapshot) == [1, 2, 3] and snapshot[1]["price"] == 1.0
+    reopened = DurableItemRepository(tmp_path)
+    assert [(item["name"], item["price"]) for item in reopened.list()] == [("a", 5.0), ("b", 1.0)]
+    reopened.close()
@@ -1,4 +1,5 @@
 import pytest
+import json
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -95,3 +96,197 @@ def test_delete_item():
     # Verify it's deleted
     get_response = client.get(f"/api/v1/items/{created_item['id']}")
     assert get_response.status_code == 404
+
+def test_get_items_paginated():
+    """Test walking the item list with limit and cursor"""
+    for i in range(5):
+        client.post("/api/v1/items", json={"name": f"Page Item {i}", "price": float(i)})
+    all_items = client.get("/api/v1/items").json()
+
+    collected = []
+    params = {"limit": 2}
+    while True:
+        response = client.get("/api/v1/items", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        collected.extend(response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params = {"limit": 2, "cursor": response.headers["X-Next-Cursor"]}
+    assert collected == all_items
+
+def test_get_items_invalid_cursor():
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/api/v1/items", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_get_items_streamed():
+    """Test streaming the item list as JSON and NDJSON"""
+    client.post("/api/v1/items", json={"name": "Streamed Item", "price": 1.5})
+    all_items = client.get("/api/v1/items").json()
+
+    response = client.get("/api/v1/items", params={"stream": "json"})
+    assert response.status_code == 200
+    assert response.json() == all_items
+
+    response = client.get("/api/v1/items", params={"stream": "ndjson"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == all_items
+
+    first = client.get("/api/v1/items", params={"limit": 1})
+    response = client.get("/api/v1/items", params={"stream": "json", "cursor": first.headers["X-Next-Cursor"]})
+    assert response.json() == all_items[1:]
+    assert client.get("/api/v1/items", params={"stream": "json", "limit": 1}).status_code == 400
+
+def test_bulk_create_update_delete():
+    """Test the bulk endpoints and their per-item results"""
+    batch = [
+        {"name": "Bulk Item 1", "price": 1.0},
+        {"name": "Bulk Item 2"},
+        {"name": "Bulk Item 3", "price": 3.0},
+        5,
+    ]
+    response = client.post("/api/v1/items/bulk", json=batch)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (2, 2)
+    assert [result["status_code"] for result in data["results"]] == [201, 422, 201, 422]
+    ids = [result["id"] for result in data["results"] if result["status_code"] == 201]
+
+    updates = [{"id": ids[0], "name": "Bulk Item 1b", "price": 10.0}, {"id": 999999, "name": "Missing", "price": 1.0},
+               "not an item"]
+    response = client.put("/api/v1/items/bulk", json=updates)
+    data = response.json()
+    assert [result["status_code"] for result in data["results"]] == [200, 404, 422]
+    assert client.get(f"/api/v1/items/{ids[0]}").json()["name"] == "Bulk Item 1b"
+
+    response = client.request("DELETE", "/api/v1/items/bulk", json=ids + [999999])
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (2, 1)
+    assert client.get(f"/api/v1/items/{ids[1]}").status_code == 404
+
+def test_item_responses_are_cached_and_invalidated():
+    """Test that reads are served from the cache until the item changes"""
+    created = client.post("/api/v1/items", json={"name": "Cached Item", "price": 2.0}).json()
+    url = f"/api/v1/items/{created['id']}"
+
+    assert client.get(url).headers["X-Cache"] == "MISS"
+    response = client.get(url)
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.json() == created
+    assert client.get("/api/v1/items").headers["X-Cache"] in ("HIT", "MISS")
+    assert client.get("/api/v1/items").headers["X-Cache"] == "HIT"
+
+    client.put(url, json={"name": "Cached Item 2", "price": 3.0})
+    response = client.get(url)
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["name"] == "Cached Item 2"
+    assert client.get("/api/v1/items").headers["X-Cache"] == "MISS"
+
+    stats = client.get("/api/v1/cache/stats").json()
+    assert stats["enabled"] and stats["hits"] >= 2
+
+def test_conditional_get_and_if_match():
+    """Test ETag revalidation and optimistic concurrency with If-Match"""
+    created = client.post("/api/v1/items", json={"name": "Versioned Item", "price": 4.0})
+    etag = created.headers["ETag"]
+    url = f"/api/v1/items/{created.json()['id']}"
+
+    response = client.get(url)
+    assert response.headers["ETag"] == etag
+    assert "Last-Modified" in response.headers
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    list_etag = client.get("/api/v1/items").headers["ETag"]
+    assert client.get("/api/v1/items", headers={"If-None-Match": list_etag}).status_code == 304
+
+    updated = client.put(url, json={"name": "Versioned Item 2", "price": 5.0}, headers={"If-Match": etag})
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] != etag
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/api/v1/items", headers={"If-None-Match": list_etag}).status_code == 200
+
+    assert client.delete(url, headers={"If-Match": etag}).status_code == 412
+    assert client.delete(url, headers={"If-Match": updated.headers["ETag"]}).status_code == 200
+
+def test_price_filters_and_stats():
+    """Test filtering the item list by price and availability"""
+    prices = [1000001.0, 1000002.0, 1000003.0]
+    for i, price in enumerate(prices):
+        client.post("/api/v1/items", json={"name": f"Pricey {i}", "price": price, "is_available": i != 1})
+
+    response = client.get("/api/v1/items", params={"min_price": 1000000, "is_available": True})
+    assert [item["price"] for item in response.json()] == [1000001.0, 1000003.0]
+
+    first = client.get("/api/v1/items", params={"min_price": 1000000, "limit": 2})
+    assert len(first.json()) == 2
+    rest = client.get("/api/v1/items", params={"min_price": 1000000, "limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert [item["price"] for item in rest.json()] == [1000003.0]
+
+    stats = client.get("/api/v1/items/stats").json()
+    assert stats["all"]["max"] >= 1000003.0
+    assert stats["all"]["count"] == stats["available"]["count"] + stats["unavailable"]["count"]
+
+def test_search_items():
+    """Test searching items by name and description"""
+    client.post("/api/v1/items", json={"name": "Zephyr Kite", "description": "Flies in light wind", "price": 12.0})
+    client.post("/api/v1/items", json={"name": "Storm Kite", "description": "For zephyrs and gales", "price": 15.0})
+    response = client.get("/api/v1/items/search", params={"q": "zeph"})
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()] == ["Zephyr Kite", "Storm Kite"]
+    assert len(client.get("/api/v1/items/search", params={"q": "kite", "limit": 1}).json()) == 1
+
+def test_large_responses_are_compressed_and_variants_cached():
+    """Test gzip negotiation on list responses and reuse of the cached compressed body"""
+    client.post("/api/v1/items/bulk", json=[{"name": f"Compressed {i}", "price": i} for i in range(100)])
+    response = client.get("/api/v1/items", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept, Accept-Encoding"
+    assert len(response.json()) >= 100
+    again = client.get("/api/v1/items", headers={"Accept-Encoding": "gzip"})
+    assert again.headers["X-Cache"] == "HIT"
+    assert again.content == response.content
+
+    plain = client.get("/api/v1/items", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.content == response.content
+    assert response.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    revalidated = client.get("/api/v1/items", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304 and revalidated.headers["ETag"] == response.headers["ETag"]
+    refused = client.get("/api/v1/items", headers={"Accept-Encoding": "identity", "If-None-Match": response.headers["ETag"]})
+    assert refused.status_code == 200
+
+    small = client.get(f"/api/v1/items/{response.json()[0]['id']}", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    assert small.headers["Vary"] == "Accept, Accept-Encoding"
+
+def test_ndjson_export_import_round_trip():
+    """Test that exported items import back, with line-level errors for bad lines"""
+    exported = client.get("/api/v1/items/export")
+    assert exported.headers["content-type"].startswith("application/x-ndjson")
+    lines = exported.text.splitlines()
+    assert len(lines) == len(client.get("/api/v1/items").json())
+
+    body = "\n".join([lines[0], "", '{"name": "No price"}', "not json", '{"name": "New", "price": 1}']) + "\n"
+    response = client.post("/api/v1/items/import", content=body)
+    data = response.json()
+    assert (data["imported"], data["failed"]) == (2, 2)
+    assert [error["line"] for error in data["errors"]] == [3, 4]
+
+    # Re-importing with the original ids clashes with the existing items
+    response = client.post("/api/v1/items/import?keep_ids=true", content=lines[0] + "\n" + '{"name": "No id", "price": 1}')
+    data = response.json()
+    assert (data["imported"], data["failed"]) == (0, 2)
+    assert "already exists" in data["errors"][0]["error"]
+    assert data["errors"][1]["error"] == "id is required with keep_ids"
+
+
+def test_ndjson_import_keeps_ids_in_chunks(monkeypatch):
+    """Test that chunked imports keep the given ids across chunk boundaries"""
+    from app.routers import items as items_router
+    monkeypatch.setattr(items_router, "IMPORT_CHUNK_SIZE", 3)
+    body = "".join(json.dumps({"id": 900000 + i, "name": f"Imported {i}", "price": i}) + "\n" for i in range(7))
+    response = client.post("/api/v1/items/import?keep_ids=true", content=body)
+    assert response.json() == {"imported": 7, "failed": 0, "errors": [], "errors_truncated": False}
+    assert client.get("/api/v1/items/900006").json()["name"] == "Imported 6"
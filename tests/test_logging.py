@@ -0,0 +1,138 @@
+import json
+import io
+import logging
+import queue
+
+from app.core import logging as app_logging
+from app.core.logging import BatchingQueueListener, BoundedQueueHandler, setup_logging, shutdown_logging
+
+
+def _record(msg, *args):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_queue_handler_drop_policies():
+    """Test that a full queue drops the right record and counts it"""
+    for overflow, expected in (("drop", ["first"]), ("drop_oldest", ["second"])):
+        handler = BoundedQueueHandler(queue.Queue(maxsize=1), overflow)
+        handler.handle(_record("first"))
+        handler.handle(_record("second"))
+        assert [record.msg for record in list(handler.queue.queue)] == expected
+        assert handler.dropped == 1
+
+
+def test_queue_handler_freezes_message():
+    """Test that arguments are merged into the message before queueing"""
+    handler = BoundedQueueHandler(queue.Queue())
+    handler.handle(_record("Item %s", 42))
+    record = handler.queue.get_nowait()
+    assert (record.msg, record.args) == ("Item 42", None)
+
+
+def test_listener_writes_all_records_on_stop():
+    """Test that the listener drains the queue in order before stopping"""
+    stream = io.StringIO()
+    target = logging.StreamHandler(stream)
+    target.setFormatter(logging.Formatter("%(message)s"))
+    log_queue = queue.Queue()
+    listener = BatchingQueueListener(log_queue, [target], batch_size=4)
+    handler = BoundedQueueHandler(log_queue)
+    listener.start()
+    for i in range(10):
+        handler.handle(_record("line %d", i))
+    listener.stop()
+    assert stream.getvalue().splitlines() == [f"line {i}" for i in range(10)]
+
+
+def test_shutdown_restores_handlers():
+    """Test that records logged after the queue is shut down reach the original handlers"""
+    setup_logging(log_level="INFO", async_logging=True, queue_size=1)
+    console = app_logging._handlers_by_name["console"]
+    stream = io.StringIO()
+    console.setStream(stream)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger("fastapi_app.test")
+    logger.info("queued")
+    shutdown_logging()
+    assert logging.getLogger("fastapi_app").handlers == [console]
+    # The queue holds a single record: this would block forever if it still went through the queue
+    logger.info("after shutdown")
+    logger.info("and again")
+    assert stream.getvalue().splitlines() == ["queued", "after shutdown", "and again"]
+
+
+def test_json_formatter_emits_extras():
+    """Test that every extra field ends up in the JSON output"""
+    from app.core.logging import JSONFormatter
+
+    record = _record("Fetched item")
+    record.created = 0.25
+    record.__dict__.update({"item_id": 7, "duration_ms": 1.5, "client_ip": "10.0.0.1", "request_id": "abc"})
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["timestamp"] == "1970-01-01T00:00:00.250000"
+    assert entry["message"] == "Fetched item"
+    assert (entry["item_id"], entry["duration_ms"], entry["client_ip"], entry["request_id"]) == (7, 1.5, "10.0.0.1", "abc")
+    assert "args" not in entry and "msecs" not in entry
+
+
+def test_json_formatter_encodes_big_integers():
+    """Test that integers orjson can't encode still produce a record"""
+    from app.core.logging import JSONFormatter
+
+    record = _record("Item not found")
+    record.item_id = 99999999999999999999999
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["item_id"] == 99999999999999999999999
+
+
+def _capture(name):
+    from app.core.logging import get_logger
+
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s %(funcName)s"))
+    base = logging.getLogger(name)
+    base.handlers = [handler]
+    base.propagate = False
+    base.setLevel(logging.INFO)
+    return get_logger(name), stream
+
+
+def test_lazy_logger_defers_message_and_fields():
+    """Test that message and field callables only run for emitted records"""
+    logger, stream = _capture("test.lazy")
+    calls = []
+    logger.debug(lambda: calls.append("msg") or "hidden", extra=lambda: calls.append("extra") or {})
+    logger.info(lambda: "shown %d" % 1, extra=lambda: {"item_id": 1})
+    assert calls == []
+    assert stream.getvalue() == "INFO shown 1 test_lazy_logger_defers_message_and_fields\n"
+
+
+def test_sampling_suppresses_info_but_keeps_warnings():
+    """Test that unsampled requests only drop records below WARNING, and count them"""
+    from app.core.logging import get_log_sampler, request_log_sampled
+
+    logger, stream = _capture("test.sampled")
+    sampler = get_log_sampler()
+    before = sampler.suppressed
+    token = request_log_sampled.set(False)
+    try:
+        logger.info("dropped")
+        logger.warning("kept")
+    finally:
+        request_log_sampled.reset(token)
+    assert [line.split()[1] for line in stream.getvalue().splitlines()] == ["kept"]
+    assert sampler.suppressed == before + 1
+
+
+def test_sampler_rules():
+    """Test longest-prefix rate lookup and the error/slow request exceptions"""
+    from app.core.logging import LogSampler, parse_sample_rates
+
+    sampler = LogSampler(parse_sample_rates("/api=1, /api/v1/items=0,/health=0"), slow_request_ms=100)
+    assert sampler.rate_for("/api/v1/items/5") == 0
+    assert sampler.rate_for("/api/v1/other") == 1
+    assert sampler.rate_for("/") == 1.0
+    assert not sampler.sample("/health") and sampler.sample("/api/v2")
+    assert not sampler.keep(200, 0.01)
+    assert sampler.keep(503, 0.01) and sampler.keep(200, 0.5)
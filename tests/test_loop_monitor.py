@@ -0,0 +1,52 @@
+import time
+from fastapi.testclient import TestClient
+from app.core.config import Settings
+from app.main import create_app
+
+
+def _app(**overrides):
+    settings = Settings(loop_monitor_interval_ms=20, loop_slow_callback_ms=100, **overrides)
+    app = create_app(settings)
+
+    @app.get("/block")
+    async def block():
+        time.sleep(0.4)
+        return {}
+
+    return app
+
+
+def test_blocking_route_is_reported():
+    """Test that a stall is measured, logged with its route and exported as a histogram"""
+    app = _app()
+    monitor = app.state.loop_monitor
+    with TestClient(app) as client:
+        client.get("/block")
+        deadline = time.monotonic() + 2
+        while monitor.last_stall is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert monitor.last_stall["route"] == "GET /block"
+        assert monitor.last_stall["lag_ms"] >= 250
+        assert monitor.lag >= 0.25
+        body = client.get("/metrics").text
+        assert 'event_loop_lag_seconds_bucket{le="+Inf"}' in body
+
+
+def test_ready_reports_lag_and_in_flight_limits():
+    """Test that /ready turns 503 while the lag or in-flight requests exceed their limits"""
+    app = _app(ready_max_loop_lag_ms=200, ready_max_in_flight=5)
+    client = TestClient(app)
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+    app.state.loop_monitor.recent.append(0.3)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert "event loop lag" in response.json()["reasons"][0]
+
+    app.state.loop_monitor.recent.clear()
+    app.state.metrics.in_flight += 6
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["in_flight"] == 6
@@ -18,3 +18,34 @@ def test_health_check():
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "healthy"
+
+def test_metrics():
+    """Test that requests are counted per route template"""
+    client.get("/health")
+    client.get("/api/v1/items/424242")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+    assert 'route="/api/v1/items/{item_id}",status="404"' in body
+    assert "/api/v1/items/424242" not in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/health",le="+Inf"}' in body
+    assert "items_store_size" in body
+
+def test_create_app_builds_isolated_apps():
+    """Test that each app gets its own store and a startup timing report"""
+    from app.core.config import Settings
+    from app.main import create_app
+
+    first = TestClient(create_app(Settings(app_name="First")))
+    second = create_app(Settings(app_name="Second"))
+    first.post("/api/v1/items", json={"name": "Only in first", "price": 1.0})
+    assert len(second.state.item_repository) == 0
+    assert first.get("/").json()["message"] == "Welcome to First!"
+
+    timings = second.state.startup_timings
+    assert {"import_ms", "logging_ms", "router_import_ms", "store_ms", "routers_ms", "create_app_ms"} <= set(timings)
+    with TestClient(second) as lifespan_client:
+        assert lifespan_client.get("/health").status_code == 200
+        assert timings["ready_ms"] > 0
@@ -0,0 +1,67 @@
+import logging
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.core.logging import get_log_sampler
+from app.middleware import LoggingMiddleware
+
+app = FastAPI()
+app.add_middleware(LoggingMiddleware)
+
+
+@app.get("/request-id")
+async def request_id(request: Request):
+    return {"request_id": request.state.request_id}
+
+
+@app.get("/stream")
+async def stream():
+    async def chunks():
+        for i in range(3):
+            yield f"{i}\n".encode()
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+@app.get("/fail")
+async def fail():
+    return StreamingResponse(iter([b"oops"]), status_code=503)
+
+
+client = TestClient(app)
+
+
+def test_request_id_matches_state():
+    """Test that the X-Request-ID header is the id exposed on request.state"""
+    response = client.get("/request-id")
+    assert response.status_code == 200
+    assert response.json()["request_id"] == response.headers["X-Request-ID"]
+
+
+def test_streaming_response_passes_through():
+    """Test that streamed bodies are forwarded unchanged"""
+    response = client.get("/stream")
+    assert response.text == "0\n1\n2\n"
+    assert "X-Request-ID" in response.headers
+
+
+def test_unsampled_requests_only_log_errors():
+    """Test that sampled-out routes suppress request logs except for server errors"""
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    middleware_logger = logging.getLogger("fastapi_app.middleware")
+    middleware_logger.addHandler(handler)
+    level = middleware_logger.level
+    middleware_logger.setLevel(logging.INFO)
+    sampler = get_log_sampler()
+    rates, default_rate, suppressed = sampler.rates, sampler.default_rate, sampler.suppressed
+    sampler.configure({"/request-id": 0, "/fail": 0}, 1.0, sampler.slow_request_ms)
+    try:
+        client.get("/request-id")
+        client.get("/fail")
+    finally:
+        sampler.configure(rates, default_rate, sampler.slow_request_ms)
+        middleware_logger.removeHandler(handler)
+        middleware_logger.setLevel(level)
+    assert [record.getMessage() for record in records] == ["Request completed: GET /fail - 503"]
+    assert sampler.suppressed == suppressed + 3
@@ -0,0 +1,65 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from app.core.config import Settings
+from app.core.profiling import DeterministicProfiler, SamplingProfiler
+from app.main import create_app
+
+
+def _client(tmp_path):
+    settings = Settings(profiling_enabled=True, admin_token="secret", profile_dir=str(tmp_path))
+    return TestClient(create_app(settings))
+
+
+def test_profiles_are_named_after_the_request_id(tmp_path):
+    """Test that authorized requests write a profile matching their X-Request-ID"""
+    client = _client(tmp_path)
+    for mode, suffix in (("cprofile", "prof"), ("sample", "collapsed")):
+        response = client.get("/api/v1/items", headers={"X-Profile": mode, "X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert response.headers["X-Profile"] == f"{response.headers['X-Request-ID']}.{suffix}"
+        assert (tmp_path / response.headers["X-Profile"]).exists()
+
+
+def test_profiles_are_written_off_the_event_loop(tmp_path, monkeypatch):
+    """Test that profile files are written from a worker thread rather than the event loop"""
+    loops = []
+
+    def write(self, path):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        path.write_text("")
+
+    monkeypatch.setattr(DeterministicProfiler, "write", write)
+    response = _client(tmp_path).get("/health", headers={"X-Profile": "cprofile", "X-Admin-Token": "secret"})
+    assert (tmp_path / response.headers["X-Profile"]).exists()
+    assert loops == [None]
+
+
+def test_profiling_requires_admin_token(tmp_path):
+    """Test that the profile header is ignored without a valid token"""
+    client = _client(tmp_path)
+    response = client.get("/health", headers={"X-Profile": "cprofile", "X-Admin-Token": "wrong"})
+    assert response.status_code == 200
+    assert "X-Profile" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_sampling_profiler_collapses_stacks(tmp_path):
+    """Test that the sampling profiler writes flamegraph-style collapsed stacks"""
+    import time
+
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    profiler.stop()
+    path = tmp_path / "out.collapsed"
+    profiler.write(path)
+    lines = path.read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert "test_sampling_profiler_collapses_stacks" in stack and int(count) > 0
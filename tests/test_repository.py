@@ -0,0 +1,54 @@
+from app.repositories import IdAllocator, ItemRepository
+
+
+def _item(name="Widget", price=1.0):
+    return {"name": name, "description": None, "price": price, "is_available": True}
+
+
+def test_add_assigns_sequential_ids():
+    """Test that new items get increasing ids"""
+    repository = ItemRepository()
+    first = repository.add(_item("a"))
+    second = repository.add(_item("b"))
+    assert (first["id"], second["id"]) == (1, 2)
+    assert repository.get(2)["name"] == "b"
+
+
+def test_delete_keeps_insertion_order():
+    """Test that deletes don't disturb listing order or reuse ids"""
+    repository = ItemRepository()
+    for name in "abc":
+        repository.add(_item(name))
+    assert repository.delete(2)["name"] == "b"
+    assert repository.delete(2) is None
+    assert [item["name"] for item in repository.list()] == ["a", "c"]
+    assert repository.add(_item("d"))["id"] == 4
+
+
+def test_update_missing_item():
+    """Test updating an item that doesn't exist"""
+    repository = ItemRepository()
+    assert repository.update(1, _item()) is None
+
+
+def test_id_allocator_observe():
+    """Test that observed ids push the allocator forward"""
+    allocator = IdAllocator()
+    allocator.observe(10)
+    assert allocator.allocate() == 11
+
+
+def test_page_resumes_after_deletes_and_compaction(monkeypatch):
+    """Test that cursors stay valid when the insertion log is compacted"""
+    monkeypatch.setattr("app.repositories.item.COMPACT_MIN_TOMBSTONES", 2)
+    repository = ItemRepository()
+    for i in range(6):
+        repository.add(_item(str(i)))
+    page, cursor = repository.page(None, 2)
+    assert [item["name"] for item in page] == ["0", "1"]
+    for item_id in (2, 3, 4, 5):
+        repository.delete(item_id)
+    assert repository._tombstones == 0
+    page, cursor = repository.page(cursor, 2)
+    assert [item["name"] for item in page] == ["5"]
+    assert cursor is None
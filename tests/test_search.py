@@ -0,0 +1,54 @@
+import random
+from app.repositories import ItemRepository, TextIndex
+from app.repositories import search
+
+
+def _repository():
+    repository = ItemRepository()
+    repository.index = TextIndex()
+    repository.subscribe(repository.index.apply)
+    for name, description in [
+        ("Red Apple", "Crisp and sweet"),
+        ("Green Apple", "Sour apple for baking"),
+        ("Apricot Jam", "Made from red apricots"),
+    ]:
+        repository.add({"name": name, "description": description, "price": 1.0, "is_available": True})
+    return repository
+
+
+def test_token_and_prefix_ranking():
+    """Test that exact and name matches outrank prefix and description matches"""
+    index = _repository().index
+    assert [item_id for item_id, _ in index.search("apple")] == [2, 1]
+    assert [item_id for item_id, _ in index.search("ap")] == [2, 3, 1]
+    assert [item_id for item_id, _ in index.search("red ap")] == [1, 3]
+    assert index.search("banana") == []
+
+
+def test_index_follows_updates_and_deletes():
+    """Test that the index is kept in sync with the repository"""
+    repository = _repository()
+    repository.update(1, {"name": "Blue Berry", "description": None})
+    repository.delete(2)
+    assert repository.index.search("apple") == []
+    assert [item_id for item_id, _ in repository.index.search("berry")] == [1]
+    assert "apple" not in repository.index._vocabulary
+
+
+def test_sorted_tokens_stay_sorted(monkeypatch):
+    """Test that chunks split and empty out while the vocabulary stays sorted"""
+    monkeypatch.setattr(search, "VOCABULARY_CHUNK_SIZE", 4)
+    rng = random.Random(1)
+    tokens = search.SortedTokens()
+    expected = set()
+    for _ in range(5000):
+        token = "".join(rng.choice("abc") for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.6 and token not in expected:
+            tokens.add(token)
+            expected.add(token)
+        else:
+            tokens.discard(token)
+            expected.discard(token)
+    assert list(tokens.iter_from("")) == sorted(expected)
+    assert list(tokens.iter_from("b")) == sorted(token for token in expected if token >= "b")
+    assert len(tokens) == len(expected) and all(token in tokens for token in expected)
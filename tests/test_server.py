@@ -0,0 +1,52 @@
+import logging
+import pytest
+from app.core import server
+from app.core.config import Settings
+from app.core.server import PRODUCTION_PROFILE, apply_server_profile, server_workers, uvicorn_options
+from app.main import create_app
+
+
+def test_default_profile_keeps_uvicorn_defaults():
+    """Test that the default profile passes uvicorn's own defaults"""
+    settings = apply_server_profile(Settings())
+    options = uvicorn_options(settings, workers=1)
+    assert options["loop"] == "auto" and options["http"] == "auto"
+    assert options["backlog"] == 2048 and options["timeout_keep_alive"] == 5
+    assert options["limit_concurrency"] is None and options["limit_max_requests"] is None
+    assert options["timeout_graceful_shutdown"] is None
+    assert options["access_log"] is True and options["log_config"] is None
+
+
+def test_production_profile_fills_in_unset_settings():
+    """Test that the production profile leaves explicitly set values alone"""
+    settings = apply_server_profile(Settings(server_profile="production", server_backlog=128))
+    assert settings.server_backlog == 128
+    assert settings.server_keepalive_timeout_s == PRODUCTION_PROFILE["server_keepalive_timeout_s"]
+    assert settings.server_access_log is False
+    assert server_workers(settings) >= 1
+
+    options = uvicorn_options(settings, workers=1)
+    assert options["limit_concurrency"] == PRODUCTION_PROFILE["server_limit_concurrency"]
+    assert options["timeout_graceful_shutdown"] == PRODUCTION_PROFILE["server_graceful_shutdown_s"]
+
+    with pytest.raises(ValueError):
+        apply_server_profile(Settings(server_profile="fast"))
+
+
+def test_missing_loop_and_parser_fall_back(monkeypatch):
+    """Test that uvloop and httptools fall back to the standard implementations"""
+    settings = apply_server_profile(Settings(server_profile="production"))
+    monkeypatch.setattr(server, "_installed", lambda module: False)
+    options = uvicorn_options(settings, workers=1)
+    assert options["loop"] == "asyncio" and options["http"] == "h11"
+
+
+def test_production_profile_drops_uvicorn_access_log():
+    """Test that the app built for the production profile leaves uvicorn's access logger without handlers"""
+    access_logger = logging.getLogger("uvicorn.access")
+    try:
+        create_app(Settings(server_profile="production", enable_file_logging=False))
+        assert not access_logger.hasHandlers()
+    finally:
+        create_app(Settings(enable_file_logging=False))
+    assert access_logger.hasHandlers()
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from app.repositories import PriceIndex, SQLiteItemRepository
+
+
+def _item(name, price=1.0):
+    return {"name": name, "description": None, "price": price, "is_available": True}
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two repositories on one database, standing in for two worker processes"""
+    first = SQLiteItemRepository(tmp_path / "items.db", poll_interval=0)
+    second = SQLiteItemRepository(tmp_path / "items.db", poll_interval=0)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_writes_are_visible_to_other_workers(workers):
+    """Test that each worker's mirror and listeners follow the other's writes"""
+    first, second = workers
+    index = PriceIndex(seq_of=second.seq_of)
+    second.subscribe(index.apply)
+
+    a = first.add(_item("a", 5.0))
+    b = first.add(_item("b", 15.0))
+    first.update(a["id"], {"price": 25.0})
+    second.poll()
+    assert second.get(a["id"])["price"] == 25.0
+    assert index.page(min_price=20)[0] == [a["id"]]
+
+    assert second.delete(b["id"])["name"] == "b"
+    first.poll()
+    assert first.get(b["id"]) is None
+    assert first.list() == second.list()
+
+
+def test_validators_and_cursors_agree_across_workers(workers):
+    """Test that versions, generations and cursors don't depend on the worker"""
+    first, second = workers
+    for name in "abc":
+        first.add(_item(name))
+    first.update(2, {"name": "b2"})
+    second.poll()
+    assert first.epoch == second.epoch
+    assert first.generation == second.generation
+    assert first.version(2) == second.version(2)
+    _, cursor = first.page(None, 1)
+    assert first.page(cursor, 5) == second.page(cursor, 5)
+
+
+def test_new_worker_loads_existing_items(workers, tmp_path):
+    """Test that a worker started later sees the same store"""
+    first, _ = workers
+    first.add(_item("a"))
+    first.delete(first.add(_item("b"))["id"])
+    late = SQLiteItemRepository(tmp_path / "items.db")
+    assert late.list() == first.list()
+    assert late.add(_item("c"))["id"] == 3
+    late.close()
+
+
+def test_follower_queues_changes_for_refresh(workers, tmp_path):
+    """Test that the follower thread picks up other workers' changes and refresh applies them"""
+    first, _ = workers
+    follower = SQLiteItemRepository(tmp_path / "items.db", poll_interval=0.001)
+    try:
+        item = first.add(_item("a"))
+        deadline = time.monotonic() + 5
+        while follower.get(item["id"]) is None and time.monotonic() < deadline:
+            time.sleep(0.005)
+            follower.refresh()
+        assert follower.list() == first.list()
+        assert follower.generation == first.generation
+    finally:
+        follower.close()
+
+
+def test_writes_run_off_the_event_loop(workers):
+    """Test that run() does the database work in the thread pool and changes the mirror on the event loop"""
+    first, _ = workers
+    threads = {}
+    first.subscribe(lambda op, item: threads.setdefault("listener", threading.get_ident()))
+    transaction = first._pool.transaction
+
+    def recorded_transaction():
+        threads["transaction"] = threading.get_ident()
+        return transaction()
+
+    first._pool.transaction = recorded_transaction
+
+    async def write():
+        threads["loop"] = threading.get_ident()
+        return await first.run(first.add, _item("a"))
+
+    assert asyncio.run(write())["name"] == "a"
+    assert threads["listener"] == threads["loop"] != threads["transaction"]
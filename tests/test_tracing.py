@@ -0,0 +1,73 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import Settings
+from app.core.tracing import parse_traceparent
+from app.main import create_app
+
+PARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+def _app(tmp_path, **overrides):
+    settings = Settings(tracing_enabled=True, trace_file=str(tmp_path / "spans.jsonl"), **overrides)
+    return create_app(settings)
+
+
+@pytest.mark.parametrize("value,expected", [
+    (PARENT, ("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331", True)),
+    ("00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-00", ("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331", False)),
+    ("01-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01-extra", ("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331", True)),
+    ("00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01-extra", None),
+    ("ff-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01", None),
+    ("00-00000000000000000000000000000000-b7ad6b7169203331-01", None),
+    ("00-0af7651916cd43dd-b7ad6b7169203331-01", None),
+    (None, None),
+])
+def test_parse_traceparent(value, expected):
+    """Test that traceparent headers are parsed and invalid ones rejected"""
+    assert parse_traceparent(value) == expected
+
+
+def test_sampled_request_exports_stage_spans(tmp_path):
+    """Test that a sampled parent's trace is continued, timed in Server-Timing and exported as OTLP/JSON"""
+    app = _app(tmp_path, trace_server_timing=True)
+    client = TestClient(app)
+    response = client.post("/api/v1/items", json={"name": "Traced", "price": 2.5}, headers={"traceparent": PARENT})
+    assert response.status_code == 200
+    trace_id = "0af7651916cd43dd8448eb211c80319c"
+    assert response.headers["X-Request-ID"] == trace_id
+    assert response.headers["traceparent"].startswith(f"00-{trace_id}-")
+    assert response.headers["traceparent"].endswith("-01")
+    timing = response.headers["Server-Timing"]
+    assert [entry.split(";")[0] for entry in timing.split(", ")] == \
+        ["parse", "validate", "handler", "store.write", "serialize", "total"]
+
+    app.state.span_exporter.close()
+    lines = (tmp_path / "spans.jsonl").read_text().splitlines()
+    assert len(lines) == 1
+    resource_spans = json.loads(lines[0])["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"][0]["key"] == "service.name"
+    spans = {span["name"]: span for span in resource_spans["scopeSpans"][0]["spans"]}
+    root = spans["POST /api/v1/items"]
+    assert root["parentSpanId"] == "b7ad6b7169203331"
+    assert root["spanId"] == response.headers["traceparent"].split("-")[2]
+    assert spans["handler"]["parentSpanId"] == root["spanId"]
+    assert spans["store.write"]["parentSpanId"] == spans["handler"]["spanId"]
+    assert all(span["traceId"] == trace_id for span in spans.values())
+    assert app.state.span_exporter.exported == 1
+
+
+def test_unsampled_requests_only_propagate(tmp_path):
+    """Test that unsampled requests get a traceparent but record nothing"""
+    app = _app(tmp_path, trace_sample_rate=0.0, trace_server_timing=True)
+    client = TestClient(app)
+    response = client.get("/api/v1/items")
+    assert response.status_code == 200
+    trace_id = response.headers["X-Request-ID"]
+    assert response.headers["traceparent"].startswith(f"00-{trace_id}-")
+    assert response.headers["traceparent"].endswith("-00")
+    assert "Server-Timing" not in response.headers
+
+    app.state.span_exporter.close()
+    assert app.state.span_exporter.exported == 0
+    assert not (tmp_path / "spans.jsonl").exists()